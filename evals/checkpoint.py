@@ -0,0 +1,109 @@
+"""
+Append-only prediction checkpoint for the evaluation scripts
+Per-sample predictions are keyed by dataset, sample text hash and run configuration,
+so a restarted or re-run evaluation only runs the model on new or edited samples
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+
+def sample_hash(text: str) -> str:
+    """Content hash of a sample text; edited samples get a new hash"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Hash of everything besides the text that changes predictions (model, threshold, labels)"""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class PredictionCheckpoint:
+    """JSONL file of {"dataset", "sample", "config", "predictions"} records
+
+    Records are only ever appended and flushed one per sample, so a crash loses at
+    most the line being written; a torn last line is skipped on load. Records from
+    other configurations stay in the file but are ignored. Only the byte offset of
+    each record is kept in memory; predictions are read back from the file on `get`.
+    """
+
+    def __init__(self, path: str, config: Dict[str, Any]):
+        self.path = path
+        self.config = config_hash(config)
+        self._offsets: Dict[Key, int] = {}
+        self._file = None
+        self._reader = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        skipped = 0
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    skipped += 1
+                else:
+                    if record.get("config") == self.config:
+                        self._offsets[(record["dataset"], record["sample"])] = offset
+                offset += len(line)
+        if skipped:
+            logger.warning(f"Skipped {skipped} unreadable checkpoint lines in {self.path}")
+        logger.info(f"Loaded {len(self._offsets)} checkpointed samples from {self.path}")
+
+    def get(self, dataset: str, text: str) -> Optional[List[Dict[str, Any]]]:
+        offset = self._offsets.get((dataset, sample_hash(text)))
+        if offset is None:
+            return None
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())["predictions"]
+
+    def add(self, dataset: str, text: str, predictions: List[Dict[str, Any]]):
+        key = (dataset, sample_hash(text))
+        if key in self._offsets:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            torn = self._ends_mid_line()
+            self._file = open(self.path, "ab")
+            if torn:
+                # The previous run died mid-write; start on a fresh line
+                self._file.write(b"\n")
+        record = {"dataset": key[0], "sample": key[1], "config": self.config, "predictions": predictions}
+        self._offsets[key] = self._file.tell()
+        self._file.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._file.flush()
+
+    def _ends_mid_line(self) -> bool:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def close(self):
+        for handle in (self._file, self._reader):
+            if handle is not None:
+                handle.close()
+        self._file = None
+        self._reader = None
+
+    def __enter__(self) -> "PredictionCheckpoint":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
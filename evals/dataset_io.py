@@ -0,0 +1,191 @@
+"""
+Streaming readers and writers for evaluation datasets and prediction outputs
+JSON arrays are parsed item by item and JSONL line by line, so memory stays
+bounded by one record rather than by the file
+"""
+import json
+import os
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, TextIO
+
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_jsonl(path: str) -> Iterator[Any]:
+    """Yield one record per non-empty line"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON line: {e}") from e
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the items of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        reader = _ArrayReader(f, chunk_size)
+        reader.expect("[")
+        if reader.peek() == "]":
+            return
+        while True:
+            yield reader.decode(decoder)
+            separator = reader.peek()
+            if separator == "]":
+                return
+            reader.expect(",")
+
+
+class _ArrayReader:
+    """Buffered cursor over a JSON array that refills when an item spans the buffer end"""
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int) -> bool:
+        if self.eof:
+            return False
+        more = self.f.read(size)
+        if not more:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + more
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(self.chunk_size):
+                raise ValueError("Unexpected end of JSON array")
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON array, found {found!r}")
+        self.pos += 1
+
+    def decode(self, decoder: json.JSONDecoder) -> Any:
+        self.peek()
+        while True:
+            try:
+                item, end = decoder.raw_decode(self.buffer, self.pos)
+                # A number ending exactly at the buffer end may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return item
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow geometrically so huge items are not re-parsed once per chunk
+            self._fill(max(self.chunk_size, len(self.buffer)))
+
+
+def iter_dataset(path: str) -> Iterator[Any]:
+    """Stream records from a JSONL file or a JSON array file (sniffed from the first character)"""
+    if path.lower().endswith(JSONL_EXTENSIONS):
+        return iter_jsonl(path)
+    with open(path, "r", encoding="utf-8-sig") as f:
+        head = f.read(4096).lstrip(_WHITESPACE)
+    return iter_json_array(path) if head.startswith("[") or not head else iter_jsonl(path)
+
+
+def iter_windows(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Consecutive lists of up to `size` items"""
+    iterator = iter(items)
+    while True:
+        window = list(islice(iterator, size))
+        if not window:
+            return
+        yield window
+
+
+class JsonArrayWriter:
+    """Writes a JSON array one item at a time
+
+    The output is byte-for-byte what `json.dump(items, f, indent=indent)` would write.
+    """
+
+    def __init__(self, path: str, indent: Optional[int] = None, ensure_ascii: bool = False):
+        self.path = path
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, item: Any):
+        text = json.dumps(item, ensure_ascii=self.ensure_ascii, indent=self.indent)
+        if self.indent is None:
+            self._file.write(("[" if self.count == 0 else ", ") + text)
+        else:
+            pad = " " * self.indent
+            self._file.write(("[\n" if self.count == 0 else ",\n") + pad + text.replace("\n", "\n" + pad))
+        self.count += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.count == 0:
+            self._file.write("[]")
+        else:
+            self._file.write("]" if self.indent is None else "\n]")
+        self._file.close()
+
+    def abort(self):
+        """Close without terminating the array, so an interrupted write does not parse as complete"""
+        self._file.close()
+
+    def __enter__(self) -> "JsonArrayWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class JsonlWriter:
+    """Writes one JSON record per line"""
+
+    def __init__(self, path: str, ensure_ascii: bool = False):
+        self.path = path
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, item: Any):
+        self._file.write(json.dumps(item, ensure_ascii=self.ensure_ascii) + "\n")
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_writer(path: str, indent: Optional[int] = None):
+    """JSONL writer for .jsonl/.ndjson paths, streaming JSON array writer otherwise"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.lower().endswith(JSONL_EXTENSIONS):
+        return JsonlWriter(path)
+    return JsonArrayWriter(path, indent=indent)
@@ -3,12 +3,21 @@ Comprehensive PII/PHI Evaluation Script
 Tests all evaluation datasets with GLiNER multilingual model
 """
 
+import argparse
 import json
 import os
 import csv
 from datetime import datetime
 from gliner import GLiNER
 from collections import defaultdict
+from contextlib import ExitStack
+
+from checkpoint import PredictionCheckpoint
+from dataset_io import iter_dataset, open_writer
+from span_table import SpanTableWriter
+
+MODEL_NAME = 'urchade/gliner_multi_pii-v1'
+THRESHOLD = 0.3
 
 # All supported entity labels
 LABELS = [
@@ -23,13 +32,11 @@ LABELS = [
 ]
 
 def load_json_dataset(filepath):
-    """Load a JSON evaluation dataset."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Stream a JSON array or JSONL evaluation dataset one sample at a time."""
+    return iter_dataset(filepath)
 
 def load_csv_dataset(filepath):
-    """Load CSV dataset and convert to evaluation format."""
-    data = []
+    """Stream a CSV dataset converted to evaluation format."""
     with open(filepath, 'r', encoding='utf-8') as f:
         for line in f:
             line = line.strip()
@@ -47,22 +54,35 @@ def load_csv_dataset(filepath):
                     {'text': parts[6], 'label': 'medical_condition'},
                     {'text': parts[7], 'label': 'medication'},
                 ]
-                data.append({'text': line, 'entities': entities})
-    return data
+                yield {'text': line, 'entities': entities}
 
-def evaluate_dataset(model, data, dataset_name, predictions_list=None):
-    """Evaluate a dataset and return metrics. Optionally collect predictions."""
+def evaluate_dataset(model, data, dataset_name, predictions_list=None, checkpoint=None, span_table=None):
+    """Evaluate a dataset and return metrics. Optionally collect predictions.
+    
+    `data` can be any iterable of samples and `predictions_list` anything with an
+    `append` method, such as a `PredictionWriter` that streams records to disk.
+    
+    With a checkpoint, samples it already holds for this dataset are not re-predicted
+    and each new prediction is appended to it before moving on. A `SpanTableWriter`
+    gets one row per predicted (TP/FP) and missed (FN) span.
+    """
     tp = defaultdict(int)
     fp = defaultdict(int)
     fn = defaultdict(int)
+    examples = 0
     
-    for item in data:
+    for sample_id, item in enumerate(data):
+        examples += 1
         gold = {(e['text'].lower(), e['label']) for e in item['entities']}
-        preds = model.predict_entities(item['text'], LABELS, threshold=0.3)
+        preds = checkpoint.get(dataset_name, item['text']) if checkpoint is not None else None
+        if preds is None:
+            preds = model.predict_entities(item['text'], LABELS, threshold=THRESHOLD)
+            if checkpoint is not None:
+                checkpoint.add(dataset_name, item['text'], preds)
         pred = {(p['text'].lower(), p['label']) for p in preds}
         
-        # Collect predictions for CSV output if list provided
-        if predictions_list is not None:
+        # Collect predictions for CSV output or the span table if provided
+        if predictions_list is not None or span_table is not None:
             gold_entities = [{'text': e['text'], 'label': e['label']} for e in item['entities']]
             pred_entities = [{'text': p['text'], 'label': p['label'], 'score': p.get('score', 0)} for p in preds]
             
@@ -90,25 +110,45 @@ def evaluate_dataset(model, data, dataset_name, predictions_list=None):
                 if e_key not in matched_gold:
                     missed.append({'text': e['text'], 'label': e['label'], 'status': 'FN'})
             
-            predictions_list.append({
-                'dataset': dataset_name,
-                'text': item['text'][:200] + '...' if len(item['text']) > 200 else item['text'],
-                'full_text': item['text'],
-                'ground_truth': gold_entities,
-                'predictions': pred_with_status,
-                'missed': missed,
-                'language': item.get('language', 'unknown')
-            })
+            if span_table is not None:
+                spans = [
+                    {'label': p['label'], 'start': p.get('start'), 'end': p.get('end'),
+                     'score': p.get('score', 0), 'status': status['status']}
+                    for p, status in zip(preds, pred_with_status)
+                ]
+                spans += [
+                    {'label': e['label'], 'start': e.get('start'), 'end': e.get('end'), 'status': 'FN'}
+                    for e in item['entities'] if (e['text'].lower(), e['label']) not in matched_gold
+                ]
+                span_table.write_spans(dataset_name, item.get('language', 'unknown'), sample_id, spans)
+            
+            if predictions_list is not None:
+                predictions_list.append({
+                    'dataset': dataset_name,
+                    'text': item['text'][:200] + '...' if len(item['text']) > 200 else item['text'],
+                    'full_text': item['text'],
+                    'ground_truth': gold_entities,
+                    'predictions': pred_with_status,
+                    'missed': missed,
+                    'language': item.get('language', 'unknown')
+                })
         
-        for label in LABELS:
-            g = {t for t, l in gold if l == label}
-            p = {t for t, l in pred if l == label}
-            tp[label] += len(g & p)
-            fp[label] += len(p - g)
-            fn[label] += len(g - p)
-    
-    # Calculate metrics
-    results = {'name': dataset_name, 'examples': len(data), 'labels': {}}
+        count_matches(gold, pred, tp, fp, fn)
+    
+    return summarize_counts(dataset_name, examples, tp, fp, fn)
+
+def count_matches(gold, pred, tp, fp, fn):
+    """Add one sample's per-label TP/FP/FN to the running counts; gold and pred are (text, label) sets."""
+    for label in LABELS:
+        g = {t for t, l in gold if l == label}
+        p = {t for t, l in pred if l == label}
+        tp[label] += len(g & p)
+        fp[label] += len(p - g)
+        fn[label] += len(g - p)
+
+def summarize_counts(dataset_name, examples, tp, fp, fn):
+    """Per-label and overall precision/recall/F1 from the accumulated counts."""
+    results = {'name': dataset_name, 'examples': examples, 'labels': {}}
     t_tp, t_fp, t_fn = 0, 0, 0
     
     for label in LABELS:
@@ -139,6 +179,48 @@ def evaluate_dataset(model, data, dataset_name, predictions_list=None):
     
     return results
 
+def sweep_dataset(model, data, dataset_name, thresholds, checkpoint=None):
+    """Score a dataset at several thresholds from one model pass.
+    
+    Each sample is predicted once at the lowest threshold; a higher threshold keeps
+    the spans scoring at least that much, which is what flat NER decoding returns
+    when run at it. Returns {threshold: results} in the same form as `evaluate_dataset`.
+    A checkpoint must have been opened for the lowest threshold.
+    """
+    thresholds = sorted(set(thresholds))
+    floor = thresholds[0]
+    counts = {t: (defaultdict(int), defaultdict(int), defaultdict(int)) for t in thresholds}
+    examples = 0
+    
+    for item in data:
+        examples += 1
+        gold = {(e['text'].lower(), e['label']) for e in item['entities']}
+        preds = checkpoint.get(dataset_name, item['text']) if checkpoint is not None else None
+        if preds is None:
+            preds = model.predict_entities(item['text'], LABELS, threshold=floor)
+            if checkpoint is not None:
+                checkpoint.add(dataset_name, item['text'], preds)
+        for threshold, (tp, fp, fn) in counts.items():
+            pred = {(p['text'].lower(), p['label']) for p in preds if p.get('score', 0) >= threshold}
+            count_matches(gold, pred, tp, fp, fn)
+    
+    return {t: summarize_counts(dataset_name, examples, *counts[t]) for t in thresholds}
+
+def print_sweep(name, sweep):
+    """Print overall scores per threshold for one dataset and the best threshold."""
+    print()
+    print('=' * 75)
+    print(f"THRESHOLD SWEEP: {name}")
+    print('=' * 75)
+    print(f"{'Threshold':<12} {'TP':<6} {'FP':<6} {'FN':<6} {'Prec':<8} {'Rec':<8} {'F1':<8}")
+    print('-' * 75)
+    for threshold, results in sweep.items():
+        o = results['overall']
+        print(f"{threshold:<12g} {o['tp']:<6} {o['fp']:<6} {o['fn']:<6} {o['precision']:<8.3f} {o['recall']:<8.3f} {o['f1']:<8.3f}")
+    best = max(sweep, key=lambda t: (sweep[t]['overall']['f1'], -t))
+    print('-' * 75)
+    print(f"Best threshold: {best:g} (F1 {sweep[best]['overall']['f1']:.3f})")
+
 def print_results(results):
     """Print evaluation results for a dataset."""
     print()
@@ -195,108 +277,209 @@ def print_summary(all_results):
     avg_row = f"{'AVERAGE':<35} {total_examples:<10} {avg_p:<10.3f} {avg_r:<10.3f} {avg_f:<10.3f}"
     print(avg_row)
     
+CSV_HEADER = [
+    'Dataset', 'Language', 'Text (truncated)', 
+    'Ground Truth Entities', 'Predicted Entities', 
+    'True Positives', 'False Positives', 'False Negatives (Missed)',
+    'TP Count', 'FP Count', 'FN Count'
+]
+
+def csv_row(item):
+    """Format one prediction record as a CSV row."""
+    # Format ground truth
+    gt_str = '; '.join([f"{e['label']}:{e['text']}" for e in item['ground_truth']])
+    
+    # Format predictions with scores
+    pred_str = '; '.join([f"{p['label']}:{p['text']}({p['score']:.2f})" for p in item['predictions']])
+    
+    # Separate by status
+    tp_list = [p for p in item['predictions'] if p['status'] == 'TP']
+    fp_list = [p for p in item['predictions'] if p['status'] == 'FP']
+    fn_list = item['missed']
+    
+    tp_str = '; '.join([f"{p['label']}:{p['text']}" for p in tp_list]) or '-'
+    fp_str = '; '.join([f"{p['label']}:{p['text']}" for p in fp_list]) or '-'
+    fn_str = '; '.join([f"{e['label']}:{e['text']}" for e in fn_list]) or '-'
+    
+    return [
+        item['dataset'],
+        item['language'],
+        item['text'],
+        gt_str or '-',
+        pred_str or '-',
+        tp_str,
+        fp_str,
+        fn_str,
+        len(tp_list),
+        len(fp_list),
+        len(fn_list)
+    ]
+
 def save_detailed_predictions_json(predictions_list, output_path):
-    """Save  predictions to JSON for analysis."""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(predictions_list, f, ensure_ascii=False, indent=2)
+    """Save  predictions to JSON (or JSONL for a .jsonl path) for analysis."""
+    with open_writer(output_path, indent=2) as writer:
+        for item in predictions_list:
+            writer.write(item)
     print(f"Detailed predictions (JSON) saved to: {output_path}")
     
 def save_predictions_to_csv(predictions_list, output_path):
     """Save predictions to a CSV for analysis."""
     with open(output_path, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f)
-        
-        # Write header
-        writer.writerow([
-            'Dataset', 'Language', 'Text (truncated)', 
-            'Ground Truth Entities', 'Predicted Entities', 
-            'True Positives', 'False Positives', 'False Negatives (Missed)',
-            'TP Count', 'FP Count', 'FN Count'
-        ])
-        
+        writer.writerow(CSV_HEADER)
         for item in predictions_list:
-            # Format ground truth
-            gt_str = '; '.join([f"{e['label']}:{e['text']}" for e in item['ground_truth']])
-            
-            # Format predictions with scores
-            pred_str = '; '.join([f"{p['label']}:{p['text']}({p['score']:.2f})" for p in item['predictions']])
-            
-            # Separate by status
-            tp_list = [p for p in item['predictions'] if p['status'] == 'TP']
-            fp_list = [p for p in item['predictions'] if p['status'] == 'FP']
-            fn_list = item['missed']
-            
-            tp_str = '; '.join([f"{p['label']}:{p['text']}" for p in tp_list]) or '-'
-            fp_str = '; '.join([f"{p['label']}:{p['text']}" for p in fp_list]) or '-'
-            fn_str = '; '.join([f"{e['label']}:{e['text']}" for e in fn_list]) or '-'
-            
-            writer.writerow([
-                item['dataset'],
-                item['language'],
-                item['text'],
-                gt_str or '-',
-                pred_str or '-',
-                tp_str,
-                fp_str,
-                fn_str,
-                len(tp_list),
-                len(fp_list),
-                len(fn_list)
-            ])
+            writer.writerow(csv_row(item))
     
     print(f"\nPredictions saved to: {output_path}")
 
-def main():
-    print('=' * 75)
-    print('GLiNER Multilingual PII/PHI Evaluation')
-    print('Model: urchade/gliner_multi_pii-v1')
-    print('=' * 75)
+class PredictionWriter:
+    """Streams prediction records to the CSV and JSON outputs as they are appended.
     
-    print('\nLoading model...')
-    model = GLiNER.from_pretrained('urchade/gliner_multi_pii-v1')
+    Pass it to `evaluate_dataset` as `predictions_list`; nothing is kept in memory.
+    """
+    
+    def __init__(self, csv_path, json_path):
+        self.csv_path = csv_path
+        self.json_path = json_path
+        self._csv_file = open(csv_path, 'w', encoding='utf-8', newline='')
+        self._csv = csv.writer(self._csv_file)
+        self._csv.writerow(CSV_HEADER)
+        self._json = open_writer(json_path, indent=2)
+    
+    def append(self, item):
+        self._csv.writerow(csv_row(item))
+        self._json.write(item)
     
+    def close(self):
+        self._csv_file.close()
+        self._json.close()
+        print(f"\nPredictions saved to: {self.csv_path}")
+        print(f"Detailed predictions (JSON) saved to: {self.json_path}")
+    
+    def abort(self):
+        """Close the outputs as they are after a failure; the JSON array is left unterminated"""
+        self._csv_file.close()
+        self._json.abort()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def main():
     # Create predicted_output folder under data
     output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'predicted_output')
     os.makedirs(output_dir, exist_ok=True)
     
-    # Define datasets to evaluate
-    datasets = [
-        ('ner_evaluation_dataset.json', 'NER Evaluation (Original)', 'json'),
-        ('medical_phi_dataset.json', 'Medical PHI', 'json'),
-        ('travel_pii_dataset.json', 'Travel PII', 'json'),
-        ('mixed_language_dataset.json', 'Mixed Language', 'json'),
-        ('structured_pii_phi.csv', 'Structured CSV', 'csv'),
-    ]
+    parser = argparse.ArgumentParser(description='Evaluate GLiNER on all bundled datasets')
+    parser.add_argument(
+        '--checkpoint',
+        default=os.path.join(output_dir, 'predictions_checkpoint.jsonl'),
+        help='Append-only prediction checkpoint; completed samples are skipped on re-runs'
+    )
+    parser.add_argument('--no-checkpoint', action='store_true', help='Re-predict every sample')
+    parser.add_argument(
+        '--jsonl',
+        action='store_true',
+        help='Write detailed predictions as JSONL (one record per line) instead of a JSON array'
+    )
+    parser.add_argument(
+        '--spans',
+        default=None,
+        help='Also write one row per predicted/missed span to a .parquet or .arrow file (needs pyarrow)'
+    )
+    parser.add_argument(
+        '--sweep',
+        nargs='?',
+        const='',
+        default=None,
+        metavar='THRESHOLDS',
+        help='Score every dataset at several thresholds ("0.1,0.3" or start:stop:step, default 0.1:0.9:0.05) '
+             'from one model pass at the lowest one, instead of writing predictions at %g' % THRESHOLD
+    )
+    args = parser.parse_args()
     
-    all_results = []
-    all_predictions = []
+    thresholds = None
+    if args.sweep is not None:
+        if args.spans:
+            parser.error('--spans needs a single threshold and cannot be combined with --sweep')
+        from threshold_sweep import DEFAULT_THRESHOLDS, parse_thresholds
+        thresholds = parse_thresholds(args.sweep or DEFAULT_THRESHOLDS)
+        if not thresholds:
+            parser.error('--sweep needs at least one threshold')
+    # Sweeps predict at their lowest threshold, so they checkpoint separately from regular runs
+    threshold = min(thresholds) if thresholds else THRESHOLD
     
-    for filepath, name, filetype in datasets:
-        if not os.path.exists(filepath):
-            print(f'\nSkipping {name}: {filepath} not found')
-            continue
+    print('=' * 75)
+    print('GLiNER Multilingual PII/PHI Evaluation')
+    print(f'Model: {MODEL_NAME}')
+    print('=' * 75)
+    
+    print('\nLoading model...')
+    model = GLiNER.from_pretrained(MODEL_NAME)
+    
+    # The checkpoint and span table are closed (and flushed) however the run ends
+    with ExitStack() as stack:
+        checkpoint = None
+        if not args.no_checkpoint:
+            checkpoint = stack.enter_context(PredictionCheckpoint(
+                args.checkpoint, {'model': MODEL_NAME, 'threshold': threshold, 'labels': LABELS}
+            ))
+            print(f'Checkpoint: {args.checkpoint} ({len(checkpoint)} samples cached)')
         
-        print(f'\nEvaluating {name}...')
+        span_table = stack.enter_context(SpanTableWriter(args.spans)) if args.spans else None
         
-        # Separate predictions list for each dataset
-        dataset_predictions = []
+        # Define datasets to evaluate
+        datasets = [
+            ('ner_evaluation_dataset.json', 'NER Evaluation (Original)', 'json'),
+            ('medical_phi_dataset.json', 'Medical PHI', 'json'),
+            ('travel_pii_dataset.json', 'Travel PII', 'json'),
+            ('mixed_language_dataset.json', 'Mixed Language', 'json'),
+            ('structured_pii_phi.csv', 'Structured CSV', 'csv'),
+        ]
         
-        if filetype == 'json':
-            data = load_json_dataset(filepath)
-        else:
-            data = load_csv_dataset(filepath)
+        all_results = []
+        sweeps = {}
         
-        results = evaluate_dataset(model, data, name, dataset_predictions)
-        all_results.append(results)
-        all_predictions.extend(dataset_predictions)
-        print_results(results)
-        
-        # Save individual prediction file for this dataset to predicted_output folder
-        base_name = os.path.splitext(os.path.basename(filepath))[0]
-        output_csv = os.path.join(output_dir, f'predictions_{base_name}.csv')
-        output_json = os.path.join(output_dir, f'predictions_{base_name}.json')
-        save_predictions_to_csv(dataset_predictions, output_csv)
-        save_detailed_predictions_json(dataset_predictions, output_json)
+        for filepath, name, filetype in datasets:
+            if not os.path.exists(filepath):
+                print(f'\nSkipping {name}: {filepath} not found')
+                continue
+            
+            print(f'\nEvaluating {name}...')
+            
+            if filetype == 'json':
+                data = load_json_dataset(filepath)
+            else:
+                data = load_csv_dataset(filepath)
+            
+            if thresholds is not None:
+                sweep = sweep_dataset(model, data, name, thresholds, checkpoint)
+                sweeps[name] = {f'{t:g}': results for t, results in sweep.items()}
+                print_sweep(name, sweep)
+                continue
+            
+            # Stream this dataset's prediction records to predicted_output as they are made
+            base_name = os.path.splitext(os.path.basename(filepath))[0]
+            output_csv = os.path.join(output_dir, f'predictions_{base_name}.csv')
+            output_json = os.path.join(output_dir, f'predictions_{base_name}.{"jsonl" if args.jsonl else "json"}')
+            with PredictionWriter(output_csv, output_json) as writer:
+                results = evaluate_dataset(model, data, name, writer, checkpoint, span_table)
+            all_results.append(results)
+            print_results(results)
+    
+    if span_table is not None:
+        print(f'\nSpan table ({span_table.rows} rows) saved to: {args.spans}')
+    
+    if thresholds is not None:
+        sweep_path = os.path.join(output_dir, 'threshold_sweep.json')
+        with open(sweep_path, 'w', encoding='utf-8') as f:
+            json.dump(sweeps, f, indent=2, ensure_ascii=False)
+        print(f'\nThreshold sweep saved to: {sweep_path}')
     
     # Print summary
     if all_results:
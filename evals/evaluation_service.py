@@ -4,11 +4,26 @@ Tests the model against the generated ner_evaluation_dataset.json
 """
 import json
 import logging
+import math
+import multiprocessing
+import os
 import warnings
-from typing import List, Dict, Any, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import List, Dict, Any, Callable, Iterator, Tuple, Optional, Union
 from dataclasses import dataclass, field
 from collections import defaultdict
-from gliner import GLiNER
+
+import numpy as np
+
+from checkpoint import PredictionCheckpoint
+from dataset_io import iter_dataset, iter_windows
+from service_path import add_service_path
+
+# Model loading and prediction are shared with the service so both evaluate exactly what is deployed
+add_service_path()
+from backends import load_model
+from inference import model_predict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -82,6 +97,104 @@ class EvaluationReport:
     entity_type_metrics: Dict[str, EvaluationMetrics] = field(default_factory=dict)
     failed_samples: List[Dict[str, Any]] = field(default_factory=list)
 
+ASSIGNMENT_MODES = ("greedy", "hungarian")
+
+# Below this many prediction x ground truth pairs, NumPy call overhead outweighs the
+# vectorized IoU, so the few overlaps are computed as plain Python floats instead
+VECTORIZE_MIN_PAIRS = 64
+
+Overlaps = Union[np.ndarray, List[List[float]]]
+
+
+def span_iou(start1: int, end1: int, start2: int, end2: int) -> float:
+    """Intersection over union of two character spans"""
+    overlap = min(end1, end2) - max(start1, start2)
+    if overlap <= 0:
+        return 0.0
+    union = (end1 - start1) + (end2 - start2) - overlap
+    return overlap / union if union > 0 else 0.0
+
+
+def overlap_matrix(pred_spans: List[Tuple[int, int]], gt_spans: List[Tuple[int, int]]) -> np.ndarray:
+    """IoU of every (start, end) prediction span with every ground truth span, shape (P, G)"""
+    pred = np.asarray(pred_spans, dtype=np.int64).reshape(-1, 2)
+    gt = np.asarray(gt_spans, dtype=np.int64).reshape(-1, 2)
+    overlap = np.minimum(pred[:, 1:2], gt[:, 1]) - np.maximum(pred[:, 0:1], gt[:, 0])
+    union = (pred[:, 1:2] - pred[:, 0:1]) + (gt[:, 1] - gt[:, 0]) - overlap
+    valid = (overlap > 0) & (union > 0)
+    return np.divide(overlap, union, out=np.zeros(overlap.shape), where=valid)
+
+
+def compute_overlaps(pred_spans: List[Tuple[int, int]], gt_spans: List[Tuple[int, int]]) -> Overlaps:
+    """`overlap_matrix` for large inputs, a list of IoU rows for small ones"""
+    if len(pred_spans) * len(gt_spans) >= VECTORIZE_MIN_PAIRS:
+        return overlap_matrix(pred_spans, gt_spans)
+    return [
+        [span_iou(ps, pe, gs, ge) if ps < ge and gs < pe else 0.0 for gs, ge in gt_spans]
+        for ps, pe in pred_spans
+    ]
+
+
+def assign_greedy(overlaps: Overlaps, overlap_threshold: float) -> Dict[int, int]:
+    """Prediction -> ground truth index, taking predictions in order
+
+    Each prediction takes its highest-IoU unmatched ground truth (the first one on
+    ties) if that IoU is positive and reaches `overlap_threshold`.
+    """
+    assigned: Dict[int, int] = {}
+    if len(overlaps) == 0 or len(overlaps[0]) == 0:
+        return assigned
+    vectorized = isinstance(overlaps, np.ndarray)
+    available = [True] * len(overlaps[0])
+    best = overlaps.argmax(axis=1).tolist() if vectorized else [row.index(max(row)) for row in overlaps]
+    for p_idx, g_idx in enumerate(best):
+        row = overlaps[p_idx]
+        if not available[g_idx]:
+            # The row's best column is taken; rescan the remaining ones
+            if vectorized:
+                row = np.where(available, row, 0.0)
+                g_idx = int(row.argmax())
+            else:
+                row = [overlap if free else 0.0 for overlap, free in zip(row, available)]
+                g_idx = row.index(max(row))
+        overlap = row[g_idx]
+        if overlap > 0 and overlap >= overlap_threshold:
+            assigned[p_idx] = g_idx
+            available[g_idx] = False
+    return assigned
+
+
+def _require_scipy():
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError as e:
+        raise ImportError("Hungarian span matching needs scipy: pip install scipy") from e
+    return linear_sum_assignment
+
+
+def assign_hungarian(
+    overlaps: Overlaps,
+    pred_labels: List[str],
+    gt_labels: List[str],
+    overlap_threshold: float
+) -> Dict[int, int]:
+    """Optimal one-to-one assignment over pairs whose IoU reaches `overlap_threshold`
+
+    Same-label pairs get a bonus larger than any IoU, so the most true positives
+    win first and total IoU breaks ties. Needs scipy.
+    """
+    linear_sum_assignment = _require_scipy()
+    overlaps = np.asarray(overlaps, dtype=float).reshape(len(pred_labels), len(gt_labels))
+    if overlaps.size == 0:
+        return {}
+    
+    same_label = np.equal.outer(np.asarray(pred_labels, dtype=object), np.asarray(gt_labels, dtype=object))
+    eligible = (overlaps > 0) & (overlaps >= overlap_threshold)
+    weights = np.where(eligible, overlaps + same_label.astype(float), 0.0)
+    rows, cols = linear_sum_assignment(weights, maximize=True)
+    return {int(r): int(c) for r, c in zip(rows, cols) if eligible[r, c]}
+
+
 class NERDatasetEvaluator:
     """Evaluates GLiNER model against the NER evaluation dataset"""
     
@@ -150,12 +263,32 @@ class NERDatasetEvaluator:
         "landline_phone_number": "landline_phone_number",
     }
     
-    def __init__(self, model_name: str = "urchade/gliner_multi_pii-v1", threshold: float = 0.4):
-        """Initialize the evaluator with the GLiNER model"""
+    def __init__(
+        self,
+        model_name: str = "urchade/gliner_multi_pii-v1",
+        threshold: float = 0.4,
+        backend: str = "torch",
+        quantize: str = "none",
+        model: Optional[Any] = None,
+        model_factory: Optional[Callable[[], Any]] = None,
+        assignment: str = "greedy"
+    ):
+        """Initialize the evaluator with the GLiNER model (or an already loaded `model`)
+        
+        The model is loaded on first use, so scoring stored predictions never loads it.
+        `model_factory` is a picklable zero-argument callable used instead of
+        `load_model`, here and in every worker process of a parallel run.
+        `assignment` selects how predictions are matched to ground truth.
+        """
+        if assignment not in ASSIGNMENT_MODES:
+            raise ValueError(f"Unknown assignment {assignment!r}; expected one of {ASSIGNMENT_MODES}")
+        self.model_name = model_name
         self.threshold = threshold
-        logger.info(f"Loading GLiNER model: {model_name}")
-        self.model = GLiNER.from_pretrained(model_name)
-        logger.info("Model loaded successfully")
+        self.backend = backend
+        self.quantize = quantize
+        self.model_factory = model_factory
+        self._model = model
+        self.assignment = assignment
         
         # Define labels to extract - consistent with main_service.py
         self.extraction_labels = [
@@ -193,11 +326,23 @@ class NERDatasetEvaluator:
             "landline_phone_number"
         ]
     
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            if self.model_factory is not None:
+                self._model = self.model_factory()
+            else:
+                logger.info(
+                    f"Loading GLiNER model: {self.model_name} ({self.backend} backend, quantize={self.quantize})"
+                )
+                self._model = load_model(self.model_name, backend=self.backend, quantize=self.quantize)
+                logger.info("Model loaded successfully")
+        return self._model
+    
     def load_dataset(self, dataset_path: str = "ner_evaluation_dataset.json") -> List[Dict[str, Any]]:
-        """Load the NER evaluation dataset"""
+        """Load the NER evaluation dataset (JSON array or JSONL)"""
         logger.info(f"Loading dataset from: {dataset_path}")
-        with open(dataset_path, 'r', encoding='utf-8') as f:
-            dataset = json.load(f)
+        dataset = list(iter_dataset(dataset_path))
         logger.info(f"Loaded {len(dataset)} samples")
         return dataset
     
@@ -207,69 +352,56 @@ class NERDatasetEvaluator:
         return self.LABEL_MAPPING.get(label_lower, label_lower)
     
     def compute_overlap(self, start1: int, end1: int, start2: int, end2: int) -> float:
-        """Compute overlap ratio between two spans"""
-        overlap_start = max(start1, start2)
-        overlap_end = min(end1, end2)
-        
-        if overlap_start >= overlap_end:
-            return 0.0
-        
-        overlap_length = overlap_end - overlap_start
-        span1_length = end1 - start1
-        span2_length = end2 - start2
-        
-        # Return IoU (Intersection over Union)
-        union_length = span1_length + span2_length - overlap_length
-        return overlap_length / union_length if union_length > 0 else 0.0
+        """Compute overlap ratio (IoU) between two spans"""
+        return span_iou(start1, end1, start2, end2)
     
     def match_entities(
         self, 
         predicted: List[Dict[str, Any]], 
         ground_truth: List[Dict[str, Any]],
-        overlap_threshold: float = 0.5
+        overlap_threshold: float = 0.5,
+        assignment: Optional[str] = None
     ) -> Tuple[List[EntityMatch], EvaluationMetrics]:
-        """Match predicted entities to ground truth entities"""
+        """Match predicted entities to ground truth entities
+        
+        All prediction x ground truth IoUs are computed up front, in one NumPy call
+        for dense documents (see `compute_overlaps`).
+        `greedy` walks the predictions in order and takes the best unmatched ground
+        truth; `hungarian` finds the assignment with the most same-label matches,
+        then the highest total IoU. Defaults to the evaluator's `assignment`.
+        """
+        assignment = assignment or self.assignment
         metrics = EvaluationMetrics()
         matches = []
         
-        gt_matched = set()
-        pred_matched = set()
+        pred_labels = [self.normalize_label(pred.get("label", "")) for pred in predicted]
+        gt_labels = [self.normalize_label(gt.get("label", "")) for gt in ground_truth]
+        overlaps = compute_overlaps(
+            [(pred.get("start", 0), pred.get("end", 0)) for pred in predicted],
+            [(gt.get("start", 0), gt.get("end", 0)) for gt in ground_truth]
+        )
+        if assignment == "greedy":
+            assigned = assign_greedy(overlaps, overlap_threshold)
+        elif assignment == "hungarian":
+            assigned = assign_hungarian(overlaps, pred_labels, gt_labels, overlap_threshold)
+        else:
+            raise ValueError(f"Unknown assignment {assignment!r}; expected one of {ASSIGNMENT_MODES}")
         
-        # First pass: find exact and partial matches
         for p_idx, pred in enumerate(predicted):
-            pred_label = self.normalize_label(pred.get("label", ""))
-            pred_start = pred.get("start", 0)
-            pred_end = pred.get("end", 0)
-            
-            best_match = None
-            best_overlap = 0.0
-            best_gt_idx = -1
-            
-            for g_idx, gt in enumerate(ground_truth):
-                if g_idx in gt_matched:
-                    continue
-                
-                gt_label = self.normalize_label(gt.get("label", ""))
-                gt_start = gt.get("start", 0)
-                gt_end = gt.get("end", 0)
-                
-                overlap = self.compute_overlap(pred_start, pred_end, gt_start, gt_end)
-                
-                if overlap > best_overlap:
-                    best_overlap = overlap
-                    best_match = gt
-                    best_gt_idx = g_idx
-            
+            pred_label = pred_labels[p_idx]
             match = EntityMatch(
                 predicted_text=pred.get("text", ""),
                 predicted_label=pred_label,
-                predicted_start=pred_start,
-                predicted_end=pred_end,
+                predicted_start=pred.get("start", 0),
+                predicted_end=pred.get("end", 0),
                 predicted_score=pred.get("score", 0.0)
             )
             
-            if best_match and best_overlap >= overlap_threshold:
-                gt_label = self.normalize_label(best_match.get("label", ""))
+            g_idx = assigned.get(p_idx)
+            if g_idx is not None:
+                best_match = ground_truth[g_idx]
+                best_overlap = overlaps[p_idx][g_idx]
+                gt_label = gt_labels[g_idx]
                 match.ground_truth_text = best_match.get("text", "")
                 match.ground_truth_label = gt_label
                 match.ground_truth_start = best_match.get("start", 0)
@@ -286,9 +418,6 @@ class NERDatasetEvaluator:
                     match.match_type = "label_mismatch"
                     metrics.label_mismatches += 1
                     metrics.false_positives += 1
-                
-                gt_matched.add(best_gt_idx)
-                pred_matched.add(p_idx)
             else:
                 match.match_type = "none"
                 metrics.false_positives += 1
@@ -296,20 +425,14 @@ class NERDatasetEvaluator:
             matches.append(match)
         
         # Count unmatched ground truth as false negatives
-        for g_idx, gt in enumerate(ground_truth):
-            if g_idx not in gt_matched:
-                metrics.false_negatives += 1
+        metrics.false_negatives += len(ground_truth) - len(assigned)
         
         return matches, metrics
     
-    def evaluate_sample(self, sample: Dict[str, Any]) -> Tuple[List[EntityMatch], EvaluationMetrics]:
-        """Evaluate a single sample"""
-        text = sample.get("text", "")
-        ground_truth = sample.get("entities", [])
-        
-        # Get predictions from model
+    def predict_sample(self, text: str) -> List[Dict[str, Any]]:
+        """Predict entities for a single text"""
         try:
-            predictions = self.model.predict_entities(
+            return self.model.predict_entities(
                 text,
                 self.extraction_labels,
                 threshold=self.threshold,
@@ -317,20 +440,186 @@ class NERDatasetEvaluator:
             )
         except Exception as e:
             logger.error(f"Error predicting entities: {e}")
-            predictions = []
+            return []
+    
+    def predict_batch(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """Predict entities for several texts in one batched model call"""
+        try:
+            predictions = model_predict(
+                self.model, list(texts), self.extraction_labels, self.threshold, True, len(texts)
+            )
+            if len(predictions) == len(texts):
+                return predictions
+            raise RuntimeError(f"Expected {len(texts)} results, got {len(predictions)}")
+        except Exception as e:
+            # Retry one by one so a single bad text only loses its own predictions
+            logger.error(f"Error predicting batch of {len(texts)} texts: {e}")
+            return [self.predict_sample(text) for text in texts]
+    
+    def predict_texts(self, texts: List[str], batch_size: int = 1) -> List[List[Dict[str, Any]]]:
+        """Predict entities for every text, `batch_size` texts per model call, in input order"""
+        return [entities for chunk in self._iter_batches(texts, batch_size) for entities in chunk]
+    
+    def _iter_batches(self, texts: List[str], batch_size: int) -> Iterator[List[List[Dict[str, Any]]]]:
+        for pos in range(0, len(texts), batch_size):
+            batch = texts[pos:pos + batch_size]
+            yield [self.predict_sample(batch[0])] if batch_size == 1 else self.predict_batch(batch)
+    
+    def worker_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Process pool whose workers each load their own copy of this evaluator's model"""
+        config = {
+            "model_name": self.model_name,
+            "threshold": self.threshold,
+            "backend": self.backend,
+            "quantize": self.quantize,
+            "model_factory": self.model_factory,
+            "torch_threads": max(1, (os.cpu_count() or 1) // workers)
+        }
+        context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=(config,))
+    
+    def _iter_shards(
+        self,
+        texts: List[str],
+        batch_size: int,
+        workers: int,
+        pool: ProcessPoolExecutor
+    ) -> Iterator[List[List[Dict[str, Any]]]]:
+        """Predictions per shard from the process pool, yielded in submission order"""
+        # Several small shards per worker keep the pool busy when text lengths vary
+        shard_size = max(batch_size, math.ceil(len(texts) / (workers * 8)))
+        shards = [texts[pos:pos + shard_size] for pos in range(0, len(texts), shard_size)]
+        logger.info(f"Predicting {len(texts)} samples in {len(shards)} shards on {workers} worker processes")
+        yield from pool.map(_predict_shard, shards, [batch_size] * len(shards))
+    
+    def checkpoint_config(self) -> Dict[str, Any]:
+        """Everything besides the text that a checkpointed prediction depends on"""
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "quantize": self.quantize,
+            "threshold": self.threshold,
+            "labels": self.extraction_labels
+        }
+    
+    def predict_dataset(
+        self,
+        dataset: List[Dict[str, Any]],
+        batch_size: int = 1,
+        workers: int = 1,
+        verbose: bool = True,
+        checkpoint: Optional[PredictionCheckpoint] = None,
+        dataset_key: str = "",
+        pool: Optional[ProcessPoolExecutor] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Predictions for every sample, optionally sharded across `workers` processes
+        
+        Shards are returned in submission order, so the result is the same list the
+        sequential run produces regardless of which worker finishes first. With a
+        `checkpoint`, samples already in it under `dataset_key` are not re-predicted
+        and every new prediction is appended to it as soon as it is made. A `pool`
+        from `worker_pool` is reused instead of starting one for this call.
+        """
+        texts = [sample.get("text", "") for sample in dataset]
+        predictions: List[Optional[List[Dict[str, Any]]]] = [
+            checkpoint.get(dataset_key, text) if checkpoint is not None else None for text in texts
+        ]
+        pending = [idx for idx, entities in enumerate(predictions) if entities is None]
+        if checkpoint is not None:
+            logger.info(f"Restored {len(texts) - len(pending)} samples from checkpoint, {len(pending)} to predict")
+        
+        pending_texts = [texts[idx] for idx in pending]
+        with ExitStack() as stack:
+            if workers > 1 and pending_texts and (pool is not None or len(pending_texts) > batch_size):
+                if pool is None:
+                    pool = stack.enter_context(self.worker_pool(workers))
+                chunks = self._iter_shards(pending_texts, batch_size, workers, pool)
+            else:
+                chunks = self._iter_batches(pending_texts, batch_size)
+            
+            done = 0
+            for chunk in chunks:
+                for entities in chunk:
+                    idx = pending[done]
+                    predictions[idx] = entities
+                    if checkpoint is not None:
+                        checkpoint.add(dataset_key, texts[idx], entities)
+                    done += 1
+                if verbose and (done % 20 < len(chunk) or done == len(pending)):
+                    logger.info(f"Processed {done}/{len(pending)} samples")
+        return predictions
+    
+    def evaluate_sample(
+        self,
+        sample: Dict[str, Any],
+        predictions: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[List[EntityMatch], EvaluationMetrics]:
+        """Evaluate a single sample, predicting it unless `predictions` are given"""
+        text = sample.get("text", "")
+        ground_truth = sample.get("entities", [])
+        
+        if predictions is None:
+            predictions = self.predict_sample(text)
         
         return self.match_entities(predictions, ground_truth)
     
     def evaluate_dataset(
         self, 
         dataset_path: str = "ner_evaluation_dataset.json",
-        verbose: bool = True
+        verbose: bool = True,
+        batch_size: int = 1,
+        workers: int = 1,
+        checkpoint_path: Optional[str] = None,
+        window_size: int = 1024
     ) -> EvaluationReport:
-        """Evaluate the entire dataset and generate a report"""
-        dataset = self.load_dataset(dataset_path)
-        report = EvaluationReport(total_samples=len(dataset))
+        """Evaluate the entire dataset and generate a report
         
-        for idx, sample in enumerate(dataset):
+        Samples are streamed from `dataset_path` (JSON array or JSONL) and predicted
+        and scored `window_size` at a time, so memory stays bounded on large corpora.
+        Prediction is batched (`batch_size` texts per model call) and optionally
+        spread over `workers` processes; scoring always runs in dataset order.
+        With `checkpoint_path`, predictions are resumed from and appended to that
+        checkpoint, keyed by the dataset file name.
+        """
+        logger.info(f"Streaming dataset from: {dataset_path}")
+        report = EvaluationReport()
+        with ExitStack() as stack:
+            checkpoint = None
+            if checkpoint_path:
+                checkpoint = stack.enter_context(PredictionCheckpoint(checkpoint_path, self.checkpoint_config()))
+            pool = stack.enter_context(self.worker_pool(workers)) if workers > 1 else None
+            
+            for window in iter_windows(iter_dataset(dataset_path), window_size):
+                all_predictions = self.predict_dataset(
+                    window,
+                    batch_size=batch_size,
+                    workers=workers,
+                    verbose=verbose,
+                    checkpoint=checkpoint,
+                    dataset_key=os.path.basename(dataset_path),
+                    pool=pool
+                )
+                self.evaluate_predictions(window, all_predictions, report)
+                if verbose:
+                    logger.info(f"Scored {report.total_samples} samples")
+        return report
+    
+    def evaluate_predictions(
+        self,
+        dataset: List[Dict[str, Any]],
+        all_predictions: List[List[Dict[str, Any]]],
+        report: Optional[EvaluationReport] = None
+    ) -> EvaluationReport:
+        """Score one prediction list per sample against the dataset, in dataset order
+        
+        Pass the `report` of earlier windows to keep accumulating into it.
+        """
+        if report is None:
+            report = EvaluationReport()
+        offset = report.total_samples
+        report.total_samples += len(dataset)
+        
+        for idx, (sample, predictions) in enumerate(zip(dataset, all_predictions), start=offset):
             language = sample.get("language", "Unknown")
             
             # Initialize language metrics if needed
@@ -350,7 +639,7 @@ class NERDatasetEvaluator:
                 lang_metrics.positive_samples += 1
             
             # Evaluate sample
-            matches, metrics = self.evaluate_sample(sample)
+            matches, metrics = self.evaluate_sample(sample, predictions)
             
             # For negative samples, track true negatives (no predictions on no-PII sentences)
             if is_negative_sample and metrics.false_positives == 0:
@@ -393,9 +682,6 @@ class NERDatasetEvaluator:
                     "false_positives": metrics.false_positives,
                     "false_negatives": metrics.false_negatives
                 })
-            
-            if verbose and (idx + 1) % 20 == 0:
-                logger.info(f"Processed {idx + 1}/{len(dataset)} samples")
         
         return report
     
@@ -506,6 +792,77 @@ class NERDatasetEvaluator:
         logger.info(f"Report exported to: {output_path}")
 
 
+# Evaluator owned by each worker process of a parallel run
+_worker_evaluator: Optional[NERDatasetEvaluator] = None
+
+
+def _init_worker(config: Dict[str, Any]):
+    """Load the model once per worker, splitting the cores between workers"""
+    global _worker_evaluator
+    config = dict(config)
+    torch_threads = config.pop("torch_threads")
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _worker_evaluator = NERDatasetEvaluator(**config)
+
+
+def _predict_shard(texts: List[str], batch_size: int) -> List[List[Dict[str, Any]]]:
+    return _worker_evaluator.predict_texts(texts, batch_size)
+
+
+def compare_quantization(
+    dataset_path: str,
+    model_name: str = "urchade/gliner_multi_pii-v1",
+    threshold: float = 0.4,
+    backend: str = "torch"
+) -> Dict[str, Any]:
+    """Evaluate the full-precision and int8 models on the same dataset and report the F1 delta"""
+    summary = {}
+    for quantize in ("none", "int8"):
+        evaluator = NERDatasetEvaluator(model_name, threshold=threshold, backend=backend, quantize=quantize)
+        report = evaluator.evaluate_dataset(dataset_path, verbose=False)
+        summary[quantize] = {
+            "precision": report.overall_metrics.precision,
+            "recall": report.overall_metrics.recall,
+            "f1_score": report.overall_metrics.f1_score,
+            "language_f1": {
+                lang: lm.metrics.f1_score for lang, lm in sorted(report.language_metrics.items())
+            }
+        }
+        del evaluator
+
+    return {
+        "backend": backend,
+        "threshold": threshold,
+        "fp32": summary["none"],
+        "int8": summary["int8"],
+        "f1_delta": summary["int8"]["f1_score"] - summary["none"]["f1_score"]
+    }
+
+
+def print_quantization_comparison(comparison: Dict[str, Any]):
+    """Print F1 for both modes side by side"""
+    print("\n" + "="*80)
+    print(f"QUANTIZATION COMPARISON ({comparison['backend']} backend)")
+    print("="*80)
+    print(f"{'Mode':<8} {'Precision':<11} {'Recall':<11} {'F1':<11}")
+    for mode in ("fp32", "int8"):
+        m = comparison[mode]
+        print(f"{mode:<8} {m['precision']:<11.4f} {m['recall']:<11.4f} {m['f1_score']:<11.4f}")
+    print(f"\nF1 delta (int8 - fp32): {comparison['f1_delta']:+.4f}")
+
+    print("\n" + "-"*40)
+    print(f"{'Language':<12} {'fp32 F1':<11} {'int8 F1':<11} {'Delta':<11}")
+    print("-"*40)
+    for lang, fp32_f1 in comparison["fp32"]["language_f1"].items():
+        int8_f1 = comparison["int8"]["language_f1"].get(lang, 0.0)
+        print(f"{lang:<12} {fp32_f1:<11.4f} {int8_f1:<11.4f} {int8_f1 - fp32_f1:<+11.4f}")
+    print("="*80)
+
+
 def main():
     """Main entry point for evaluation"""
     import argparse
@@ -534,12 +891,90 @@ def main():
         action="store_true",
         help="Enable verbose logging"
     )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="urchade/gliner_multi_pii-v1",
+        help="GLiNER model name or local path"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["torch", "onnx"],
+        default="torch",
+        help="Inference backend to evaluate"
+    )
+    parser.add_argument(
+        "--quantize",
+        choices=["none", "int8"],
+        default="none",
+        help="Evaluate the int8 quantized model"
+    )
+    parser.add_argument(
+        "--compare-quantized",
+        action="store_true",
+        help="Evaluate both fp32 and int8 and report the F1 delta"
+    )
+    parser.add_argument(
+        "--max-f1-drop",
+        type=float,
+        default=None,
+        help="With --compare-quantized, exit non-zero if int8 F1 is lower by more than this"
+    )
+    parser.add_argument(
+        "--assignment",
+        choices=list(ASSIGNMENT_MODES),
+        default="greedy",
+        help="Span matching: greedy in prediction order, or optimal (hungarian, needs scipy)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Texts per batched model call"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes to shard the dataset across (each loads its own model)"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Append-only prediction checkpoint (JSONL); completed samples are skipped on re-runs"
+    )
     
     args = parser.parse_args()
+    if args.batch_size < 1 or args.workers < 1:
+        parser.error("--batch-size and --workers must be at least 1")
+    
+    if args.compare_quantized:
+        comparison = compare_quantization(args.dataset, args.model, args.threshold, args.backend)
+        print_quantization_comparison(comparison)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(comparison, f, indent=2, ensure_ascii=False)
+        print(f"\nComparison saved to: {args.output}")
+        if args.max_f1_drop is not None and -comparison["f1_delta"] > args.max_f1_drop:
+            print(f"int8 F1 drop exceeds {args.max_f1_drop}")
+            raise SystemExit(1)
+        return
     
     # Run evaluation
-    evaluator = NERDatasetEvaluator(threshold=args.threshold)
-    report = evaluator.evaluate_dataset(args.dataset, verbose=args.verbose)
+    evaluator = NERDatasetEvaluator(
+        args.model,
+        threshold=args.threshold,
+        backend=args.backend,
+        quantize=args.quantize,
+        assignment=args.assignment
+    )
+    report = evaluator.evaluate_dataset(
+        args.dataset,
+        verbose=args.verbose,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint
+    )
     
     # Print and export report
     evaluator.print_report(report)
@@ -0,0 +1,14 @@
+"""
+Import path for the service modules the evaluation scripts share
+Model loading and prediction live in src/ so the scripts evaluate exactly what is deployed
+"""
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def add_service_path():
+    """Make src/ importable; appended, so anything already on the path (e.g. PYTHONPATH) wins"""
+    if SRC_DIR not in sys.path:
+        sys.path.append(SRC_DIR)
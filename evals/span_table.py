@@ -0,0 +1,114 @@
+"""
+Columnar span output for evaluation runs (requires the optional `pyarrow` package)
+One row per predicted or missed gold span, written as Parquet or Arrow IPC in
+record batches so large runs never sit in memory as Python objects
+"""
+from typing import Any, Dict, Iterable, List
+
+# (column, arrow type name); start/end are null for gold spans without offsets
+# and score is null for missed (FN) gold spans
+SPAN_COLUMNS = (
+    ("dataset", "string"),
+    ("language", "string"),
+    ("sample_id", "int64"),
+    ("label", "string"),
+    ("start", "int32"),
+    ("end", "int32"),
+    ("score", "float32"),
+    ("status", "string"),
+)
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Columnar span output needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def span_schema():
+    pa = _require_pyarrow()
+    return pa.schema([pa.field(name, getattr(pa, type_name)()) for name, type_name in SPAN_COLUMNS])
+
+
+class SpanTableWriter:
+    """Buffers span rows and writes them out `batch_rows` at a time
+
+    `.parquet` paths get zstd-compressed Parquet (which dictionary-encodes the
+    repeated dataset/language/label/status strings); `.arrow`/`.feather` paths get
+    an lz4-compressed Arrow IPC file that can be opened with `pyarrow.memory_map`.
+    """
+
+    def __init__(self, path: str, batch_rows: int = 65536):
+        pa = _require_pyarrow()
+        self.path = path
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self.schema = span_schema()
+        self._columns: Dict[str, List[Any]] = {name: [] for name, _ in SPAN_COLUMNS}
+        self._sink = None
+        lowered = path.lower()
+        if lowered.endswith(PARQUET_EXTENSIONS):
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        elif lowered.endswith(ARROW_EXTENSIONS):
+            import pyarrow.ipc as ipc
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = ipc.new_file(self._sink, self.schema, options=ipc.IpcWriteOptions(compression="lz4"))
+        else:
+            raise ValueError(f"Unsupported span table extension for {path}; use .parquet or .arrow")
+
+    def write_spans(self, dataset: str, language: str, sample_id: int, spans: Iterable[Dict[str, Any]]):
+        """Add one row per span; each span has label, status and optionally start, end and score"""
+        columns = self._columns
+        for span in spans:
+            columns["dataset"].append(dataset)
+            columns["language"].append(language)
+            columns["sample_id"].append(sample_id)
+            columns["label"].append(span["label"])
+            columns["start"].append(span.get("start"))
+            columns["end"].append(span.get("end"))
+            columns["score"].append(span.get("score"))
+            columns["status"].append(span["status"])
+        if len(columns["status"]) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        count = len(self._columns["status"])
+        if count == 0:
+            return
+        pa = _require_pyarrow()
+        arrays = [pa.array(self._columns[field.name], type=field.type) for field in self.schema]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += count
+        self._columns = {name: [] for name, _ in SPAN_COLUMNS}
+
+    def close(self):
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self) -> "SpanTableWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_span_table(path: str, memory_map: bool = True):
+    """Read a span table back as a `pyarrow.Table` (Arrow IPC files are memory-mapped)"""
+    pa = _require_pyarrow()
+    if path.lower().endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=memory_map)
+    import pyarrow.ipc as ipc
+    source = pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb")
+    return ipc.open_file(source).read_all()
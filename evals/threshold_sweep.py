@@ -0,0 +1,311 @@
+"""
+Threshold sweep for the NER evaluation
+Runs the model once at a low threshold, stores every span with its score, then
+recomputes precision/recall/F1 per label and per language for any threshold
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from evaluation_service import EvaluationMetrics, EvaluationReport, NERDatasetEvaluator
+
+DEFAULT_FLOOR = 0.05
+DEFAULT_THRESHOLDS = "0.1:0.9:0.05"
+
+
+def dataset_fingerprint(dataset: Sequence[Dict[str, Any]]) -> str:
+    """Hash of the sample texts, so a store is never scored against a different dataset"""
+    digest = hashlib.sha256()
+    for sample in dataset:
+        digest.update(sample.get("text", "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def parse_thresholds(spec: str) -> List[float]:
+    """Parse "0.1,0.3,0.5" or an inclusive "start:stop:step" range"""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        if step <= 0:
+            raise ValueError("Threshold step must be positive")
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 6) for i in range(count)]
+    return [float(part) for part in spec.split(",") if part.strip()]
+
+
+@dataclass
+class PredictionStore:
+    """Every predicted span of a dataset as flat arrays; sample i owns rows offsets[i]:offsets[i+1]
+
+    Span text is not stored: GLiNER spans are `text[start:end]` of the sample.
+    """
+    labels: List[str]
+    floor: float
+    fingerprint: str
+    offsets: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    label_ids: np.ndarray
+    scores: np.ndarray
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def num_samples(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def num_spans(self) -> int:
+        return len(self.scores)
+
+    @classmethod
+    def from_predictions(
+        cls,
+        dataset: Sequence[Dict[str, Any]],
+        all_predictions: Sequence[List[Dict[str, Any]]],
+        floor: float,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> "PredictionStore":
+        labels: List[str] = []
+        label_index: Dict[str, int] = {}
+        offsets = [0]
+        starts, ends, label_ids, scores = [], [], [], []
+        for predictions in all_predictions:
+            for entity in predictions:
+                label = entity["label"]
+                if label not in label_index:
+                    label_index[label] = len(labels)
+                    labels.append(label)
+                starts.append(entity["start"])
+                ends.append(entity["end"])
+                label_ids.append(label_index[label])
+                scores.append(entity["score"])
+            offsets.append(len(scores))
+        return cls(
+            labels=labels,
+            floor=floor,
+            fingerprint=dataset_fingerprint(dataset),
+            offsets=np.asarray(offsets, dtype=np.int64),
+            starts=np.asarray(starts, dtype=np.int32),
+            ends=np.asarray(ends, dtype=np.int32),
+            label_ids=np.asarray(label_ids, dtype=np.int16),
+            # GLiNER scores are float32 values, so this is lossless
+            scores=np.asarray(scores, dtype=np.float32),
+            metadata=dict(metadata or {})
+        )
+
+    def save(self, path: str):
+        header = {
+            "labels": self.labels,
+            "floor": self.floor,
+            "fingerprint": self.fingerprint,
+            "metadata": self.metadata
+        }
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                header=np.array(json.dumps(header)),
+                offsets=self.offsets,
+                starts=self.starts,
+                ends=self.ends,
+                label_ids=self.label_ids,
+                scores=self.scores
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "PredictionStore":
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            return cls(
+                labels=header["labels"],
+                floor=header["floor"],
+                fingerprint=header["fingerprint"],
+                offsets=data["offsets"],
+                starts=data["starts"],
+                ends=data["ends"],
+                label_ids=data["label_ids"],
+                scores=data["scores"],
+                metadata=header.get("metadata", {})
+            )
+
+    def predictions_at(self, threshold: float, dataset: Sequence[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Spans scoring at least `threshold`, in their original order
+
+        With flat NER decoding this equals running the model at `threshold`: greedy
+        decoding keeps a span only if no higher-scoring overlapping span was kept,
+        and every such span also clears the higher threshold.
+        """
+        if threshold < self.floor:
+            raise ValueError(f"Threshold {threshold} is below the store floor {self.floor}")
+        if dataset_fingerprint(dataset) != self.fingerprint:
+            raise ValueError("Prediction store was built from a different dataset")
+        keep = self.scores >= np.float32(threshold)
+        kept_before = np.concatenate(([0], np.cumsum(keep)))[self.offsets]
+        rows = np.flatnonzero(keep)
+        starts = self.starts[rows].tolist()
+        ends = self.ends[rows].tolist()
+        label_ids = self.label_ids[rows].tolist()
+        scores = self.scores[rows].tolist()
+
+        all_predictions = []
+        for i, sample in enumerate(dataset):
+            text = sample.get("text", "")
+            all_predictions.append([
+                {
+                    "text": text[starts[j]:ends[j]],
+                    "label": self.labels[label_ids[j]],
+                    "start": starts[j],
+                    "end": ends[j],
+                    "score": scores[j]
+                }
+                for j in range(kept_before[i], kept_before[i + 1])
+            ])
+        return all_predictions
+
+
+def collect_predictions(
+    evaluator: NERDatasetEvaluator,
+    dataset: Sequence[Dict[str, Any]],
+    batch_size: int = 1,
+    workers: int = 1,
+    verbose: bool = True
+) -> PredictionStore:
+    """Run the model once over `dataset` at the evaluator's (low) threshold"""
+    all_predictions = evaluator.predict_dataset(list(dataset), batch_size=batch_size, workers=workers, verbose=verbose)
+    metadata = {"model": evaluator.model_name, "backend": evaluator.backend, "quantize": evaluator.quantize}
+    return PredictionStore.from_predictions(dataset, all_predictions, evaluator.threshold, metadata)
+
+
+def _scores(metrics: EvaluationMetrics) -> Dict[str, float]:
+    return {
+        "tp": metrics.true_positives,
+        "fp": metrics.false_positives,
+        "fn": metrics.false_negatives,
+        "precision": metrics.precision,
+        "recall": metrics.recall,
+        "f1_score": metrics.f1_score
+    }
+
+
+def summarize_report(report: EvaluationReport) -> Dict[str, Any]:
+    return {
+        "overall": _scores(report.overall_metrics),
+        "labels": {label: _scores(m) for label, m in sorted(report.entity_type_metrics.items())},
+        "languages": {lang: _scores(lm.metrics) for lang, lm in sorted(report.language_metrics.items())}
+    }
+
+
+def sweep_thresholds(
+    evaluator: NERDatasetEvaluator,
+    dataset: Sequence[Dict[str, Any]],
+    store: PredictionStore,
+    thresholds: Sequence[float]
+) -> Dict[str, Any]:
+    """Overall, per-label and per-language scores at every threshold, without running the model"""
+    results = {}
+    for threshold in sorted(thresholds):
+        report = evaluator.evaluate_predictions(list(dataset), store.predictions_at(threshold, dataset))
+        results[f"{threshold:g}"] = summarize_report(report)
+    return {
+        "floor": store.floor,
+        "metadata": store.metadata,
+        "thresholds": results,
+        "best": best_thresholds(results)
+    }
+
+
+def best_thresholds(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Highest-F1 threshold overall and per label; ties go to the lowest threshold
+
+    Per-label picks come from a global sweep, so they ignore how other labels'
+    thresholds change the greedy matching; treat them as starting points.
+    """
+    def pick(scores_by_threshold: Dict[float, Dict[str, float]]) -> Dict[str, float]:
+        threshold = max(scores_by_threshold, key=lambda t: (scores_by_threshold[t]["f1_score"], -t))
+        return {"threshold": threshold, "f1_score": scores_by_threshold[threshold]["f1_score"]}
+    
+    overall = {float(t): summary["overall"] for t, summary in results.items()}
+    per_label: Dict[str, Dict[float, Dict[str, float]]] = {}
+    for threshold, summary in results.items():
+        for label, scores in summary["labels"].items():
+            per_label.setdefault(label, {})[float(threshold)] = scores
+    return {
+        "overall": pick(overall) if overall else None,
+        "labels": {label: pick(scores) for label, scores in sorted(per_label.items())}
+    }
+
+
+def print_sweep(sweep: Dict[str, Any]):
+    """Print overall scores per threshold and the best threshold per label"""
+    print("\n" + "="*60)
+    print(f"THRESHOLD SWEEP (store floor {sweep['floor']})")
+    print("="*60)
+    print(f"{'Threshold':<11} {'Precision':<11} {'Recall':<11} {'F1':<11}")
+    for threshold, summary in sweep["thresholds"].items():
+        o = summary["overall"]
+        print(f"{threshold:<11} {o['precision']:<11.4f} {o['recall']:<11.4f} {o['f1_score']:<11.4f}")
+
+    best = sweep["best"]
+    if best["overall"]:
+        print(f"\nBest overall: {best['overall']['threshold']:g} (F1 {best['overall']['f1_score']:.4f})")
+    print("\n" + "-"*60)
+    print(f"{'Entity Type':<35} {'Threshold':<11} {'F1':<11}")
+    print("-"*60)
+    for label, entry in sorted(best["labels"].items()):
+        print(f"{label:<35} {entry['threshold']:<11g} {entry['f1_score']:<11.4f}")
+    print("="*60)
+
+
+def main():
+    """Collect predictions once, then sweep thresholds from the stored spans"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sweep NER thresholds from cached predictions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    collect = subparsers.add_parser("collect", help="Run the model once and store every span")
+    collect.add_argument("--dataset", default="ner_evaluation_dataset.json", help="Path to the evaluation dataset")
+    collect.add_argument("--store", default="predictions_store.npz", help="Output prediction store")
+    collect.add_argument("--floor", type=float, default=DEFAULT_FLOOR, help="Lowest threshold the store supports")
+    collect.add_argument("--model", default="urchade/gliner_multi_pii-v1", help="GLiNER model name or local path")
+    collect.add_argument("--backend", choices=["torch", "onnx"], default="torch", help="Inference backend")
+    collect.add_argument("--quantize", choices=["none", "int8"], default="none", help="Quantization mode")
+    collect.add_argument("--batch-size", type=int, default=8, help="Texts per batched model call")
+    collect.add_argument("--workers", type=int, default=1, help="Worker processes to shard the dataset across")
+
+    sweep = subparsers.add_parser("sweep", help="Score stored spans at several thresholds")
+    sweep.add_argument("--dataset", default="ner_evaluation_dataset.json", help="Path to the evaluation dataset")
+    sweep.add_argument("--store", default="predictions_store.npz", help="Prediction store from `collect`")
+    sweep.add_argument(
+        "--thresholds",
+        default=DEFAULT_THRESHOLDS,
+        help="Comma-separated thresholds or an inclusive start:stop:step range"
+    )
+    sweep.add_argument("--output", default="threshold_sweep.json", help="Output path for the sweep results")
+
+    args = parser.parse_args()
+
+    if args.command == "collect":
+        evaluator = NERDatasetEvaluator(
+            args.model, threshold=args.floor, backend=args.backend, quantize=args.quantize
+        )
+        dataset = evaluator.load_dataset(args.dataset)
+        store = collect_predictions(evaluator, dataset, batch_size=args.batch_size, workers=args.workers)
+        store.save(args.store)
+        print(f"Stored {store.num_spans} spans for {store.num_samples} samples in {args.store}")
+        return
+
+    evaluator = NERDatasetEvaluator()
+    dataset = evaluator.load_dataset(args.dataset)
+    store = PredictionStore.load(args.store)
+    results = sweep_thresholds(evaluator, dataset, store, parse_thresholds(args.thresholds))
+    print_sweep(results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nSweep saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Model backends for the PII extraction service
+Loads GLiNER with PyTorch or as an exported ONNX graph run by onnxruntime on CPU
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+from gliner import GLiNER
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx")
+QUANTIZATION_MODES = ("none", "int8")
+DEFAULT_ONNX_FILE = "model.onnx"
+
+
+def quantized_onnx_file(onnx_file: str) -> str:
+    """File name GLiNER's exporter uses for the int8 copy of `onnx_file`"""
+    if onnx_file.endswith("_quantized.onnx"):
+        return onnx_file
+    return onnx_file.replace(".onnx", "_quantized.onnx")
+
+
+def default_onnx_dir(model_name: str) -> str:
+    """Per-model export directory next to the service"""
+    slug = model_name.replace("/", "--")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", f"{slug}-onnx")
+
+
+def default_shared_dir(model_name: str) -> str:
+    """Per-model directory holding the safetensors copy shared by all workers"""
+    slug = model_name.replace("/", "--")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", f"{slug}-shared")
+
+
+def prepare_shared_weights(
+    model_name: str,
+    shared_dir: str,
+    model: Optional[Any] = None,
+    local_files_only: bool = False
+) -> str:
+    """Write config, tokenizer and weights as model.safetensors to `shared_dir` once
+
+    The directory is filled under a temporary name and renamed into place, so
+    workers starting at the same time never see a half-written checkpoint.
+    """
+    if os.path.exists(os.path.join(shared_dir, "model.safetensors")):
+        return shared_dir
+
+    parent = os.path.dirname(os.path.abspath(shared_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".shared-", dir=parent)
+    try:
+        model = model or GLiNER.from_pretrained(model_name, local_files_only=local_files_only)
+        model.save_pretrained(tmp_dir, safe_serialization=True)
+        os.rename(tmp_dir, shared_dir)
+        logger.info(f"Wrote shared weights for {model_name} to {shared_dir}")
+    except OSError:
+        if not os.path.exists(os.path.join(shared_dir, "model.safetensors")):
+            raise
+        # Another worker finished first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return shared_dir
+
+
+def export_onnx(
+    model_name: str,
+    save_dir: str,
+    onnx_file: str = DEFAULT_ONNX_FILE,
+    quantize: bool = False,
+    model: Optional[Any] = None,
+    local_files_only: bool = False
+) -> Dict[str, Optional[str]]:
+    """Export a GLiNER model to `save_dir` as config + tokenizer + ONNX graph"""
+    model = model or GLiNER.from_pretrained(model_name, local_files_only=local_files_only)
+    os.makedirs(save_dir, exist_ok=True)
+    model.save_pretrained(save_dir)
+
+    if hasattr(model, "export_to_onnx"):
+        paths = model.export_to_onnx(
+            save_dir,
+            onnx_filename=onnx_file,
+            quantized_filename=quantized_onnx_file(onnx_file),
+            quantize=quantize
+        )
+        logger.info(f"Exported ONNX model to {paths}")
+        return paths
+    return _export_onnx_legacy(model, save_dir, onnx_file, quantize)
+
+
+def _export_onnx_legacy(model: Any, save_dir: str, onnx_file: str, quantize: bool) -> Dict[str, Optional[str]]:
+    """torch.onnx export for GLiNER releases without `export_to_onnx` (span models)"""
+    import torch
+
+    onnx_path = os.path.join(save_dir, onnx_file)
+    inputs, _ = model.prepare_model_inputs(
+        ["Export sample text for John Smith at john@example.com"], ["person", "email"]
+    )
+    input_names = ["input_ids", "attention_mask", "words_mask", "text_lengths", "span_idx", "span_mask"]
+    torch.onnx.export(
+        model.model,
+        tuple(inputs[name] for name in input_names),
+        f=onnx_path,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch_size", 1: "sequence_length"},
+            "attention_mask": {0: "batch_size", 1: "sequence_length"},
+            "words_mask": {0: "batch_size", 1: "sequence_length"},
+            "text_lengths": {0: "batch_size", 1: "value"},
+            "span_idx": {0: "batch_size", 1: "num_spans", 2: "idx"},
+            "span_mask": {0: "batch_size", 1: "num_spans"},
+            "logits": {0: "position", 1: "batch_size", 2: "sequence_length", 3: "num_classes"},
+        },
+        opset_version=14
+    )
+    paths = {"onnx_path": onnx_path, "quantized_path": None}
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(save_dir, quantized_onnx_file(onnx_file))
+        quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QUInt8)
+        paths["quantized_path"] = quantized_path
+    logger.info(f"Exported ONNX model to {paths}")
+    return paths
+
+
+def quantize_dynamic_int8(model: Any) -> Any:
+    """Replace the Linear layers of a PyTorch GLiNER model with dynamic int8 versions
+
+    Weights are stored as int8 and activations are quantized on the fly, which
+    cuts the encoder's memory roughly 4x and speeds up CPU matmuls. Quantized
+    kernels are CPU-only, so the model is moved to CPU first.
+    """
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    model.model = quantize_dynamic(model.model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8)
+    if hasattr(model, "device"):
+        model.device = torch.device("cpu")
+    return model
+
+
+def load_model(
+    model_name: str,
+    backend: str = "torch",
+    onnx_dir: Optional[str] = None,
+    onnx_file: str = DEFAULT_ONNX_FILE,
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+    quantize: str = "none",
+    shared_weights_dir: Optional[str] = None,
+    local_files_only: bool = False
+) -> Any:
+    """Load GLiNER on the selected backend
+
+    For "onnx" the graph is exported on first use if `onnx_dir` does not hold it
+    yet. Thread counts of 0 let onnxruntime pick its defaults. `quantize="int8"`
+    applies torch dynamic quantization, or selects the int8 ONNX graph.
+
+    With `shared_weights_dir` the torch backend loads its parameters straight
+    from a memory-mapped model.safetensors, so every process on the host shares
+    one copy of the weights through the page cache. `local_files_only` never
+    contacts the hub; `model_name` must then be a local directory or already cached.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    if quantize not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization '{quantize}', expected one of {QUANTIZATION_MODES}")
+
+    if backend == "torch":
+        if shared_weights_dir:
+            prepare_shared_weights(model_name, shared_weights_dir, local_files_only=local_files_only)
+            logger.info(f"Memory-mapping shared weights from {shared_weights_dir}")
+            # The meta-device load path assigns the mmap-backed tensors as parameters without copying
+            model = GLiNER.from_pretrained(shared_weights_dir, low_cpu_mem_usage=True, local_files_only=True)
+        else:
+            model = GLiNER.from_pretrained(model_name, local_files_only=local_files_only)
+        if quantize == "int8":
+            if shared_weights_dir:
+                logger.warning("int8 quantization makes a private copy of the weights in every worker")
+            logger.info("Applying dynamic int8 quantization to Linear layers")
+            model = quantize_dynamic_int8(model)
+        return model
+
+    import onnxruntime as ort
+
+    if shared_weights_dir:
+        logger.warning("Shared weights apply to the torch backend only; onnxruntime loads its own copy")
+    if quantize == "int8":
+        onnx_file = quantized_onnx_file(onnx_file)
+    onnx_dir = onnx_dir or default_onnx_dir(model_name)
+    if not os.path.exists(os.path.join(onnx_dir, onnx_file)):
+        logger.info(f"No ONNX graph at {onnx_dir}/{onnx_file}, exporting {model_name}...")
+        quantized = onnx_file.endswith("_quantized.onnx")
+        base_file = onnx_file.replace("_quantized.onnx", ".onnx") if quantized else onnx_file
+        export_onnx(model_name, onnx_dir, base_file, quantize=quantized, local_files_only=local_files_only)
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session_options.intra_op_num_threads = intra_op_threads
+    session_options.inter_op_num_threads = inter_op_threads
+    if inter_op_threads > 1:
+        session_options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+    logger.info(
+        f"Loading ONNX model {onnx_dir}/{onnx_file} "
+        f"(intra_op_threads={intra_op_threads}, inter_op_threads={inter_op_threads})"
+    )
+    return GLiNER.from_pretrained(
+        onnx_dir,
+        load_onnx_model=True,
+        load_tokenizer=True,
+        onnx_model_file=onnx_file,
+        session_options=session_options,
+        local_files_only=True
+    )
+
+
+def compare_backends(
+    reference: Any,
+    candidate: Any,
+    texts: Sequence[str],
+    labels: Sequence[str],
+    threshold: float = 0.5,
+    score_tolerance: float = 0.02
+) -> Dict[str, Any]:
+    """Check that two models return the same spans with scores within tolerance"""
+    mismatched_texts = 0
+    max_score_diff = 0.0
+    missing = 0
+    extra = 0
+    for text in texts:
+        ref = {(e["start"], e["end"], e["label"]): e["score"] for e in reference.predict_entities(text, list(labels), threshold=threshold)}
+        cand = {(e["start"], e["end"], e["label"]): e["score"] for e in candidate.predict_entities(text, list(labels), threshold=threshold)}
+        missing += len(ref.keys() - cand.keys())
+        extra += len(cand.keys() - ref.keys())
+        for span in ref.keys() & cand.keys():
+            max_score_diff = max(max_score_diff, abs(ref[span] - cand[span]))
+        if ref.keys() != cand.keys():
+            mismatched_texts += 1
+
+    return {
+        "texts": len(texts),
+        "mismatched_texts": mismatched_texts,
+        "missing_spans": missing,
+        "extra_spans": extra,
+        "max_score_diff": max_score_diff,
+        # Spans right at the threshold may flip, so allow a small share of mismatches
+        "within_tolerance": max_score_diff <= score_tolerance and mismatched_texts <= max(1, len(texts) // 50)
+    }
+
+
+def load_sample_texts(dataset_path: str, limit: int) -> List[str]:
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        return [sample["text"] for sample in json.load(f)[:limit]]
+
+
+def main():
+    """Export an ONNX graph, verify it against the PyTorch model, or write shared weights"""
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Export and verify GLiNER model backends")
+    parser.add_argument("command", choices=["export", "verify", "share"])
+    parser.add_argument("--model", default="urchade/gliner_multi_pii-v1")
+    parser.add_argument("--onnx-dir", default=None, help="Export directory (default: models/<model>-onnx)")
+    parser.add_argument("--onnx-file", default=DEFAULT_ONNX_FILE)
+    parser.add_argument("--shared-dir", default=None, help="Shared weights directory (default: models/<model>-shared)")
+    parser.add_argument("--quantize", action="store_true", help="Export: also write an int8 graph; verify: check the int8 graph")
+    parser.add_argument("--dataset", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "ner_evaluation_dataset.json"))
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    args = parser.parse_args()
+
+    if args.command == "share":
+        print(prepare_shared_weights(args.model, args.shared_dir or default_shared_dir(args.model)))
+        return
+
+    onnx_dir = args.onnx_dir or default_onnx_dir(args.model)
+    if args.command == "export":
+        print(json.dumps(export_onnx(args.model, onnx_dir, args.onnx_file, quantize=args.quantize), indent=2))
+        return
+
+    from main_service import SUPPORTED_ENTITIES
+
+    reference = load_model(args.model, backend="torch")
+    candidate = load_model(
+        args.model,
+        backend="onnx",
+        onnx_dir=onnx_dir,
+        onnx_file=args.onnx_file,
+        quantize="int8" if args.quantize else "none"
+    )
+    report = compare_backends(
+        reference,
+        candidate,
+        load_sample_texts(args.dataset, args.samples),
+        SUPPORTED_ENTITIES,
+        threshold=args.threshold,
+        score_tolerance=args.tolerance
+    )
+    print(json.dumps(report, indent=2))
+    if not report["within_tolerance"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Dynamic micro-batching scheduler for GLiNER inference
+Queues concurrent extraction requests and runs them as batched model calls
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Requests can only share a forward pass when labels, threshold and flat_ner agree
+BatchKey = Tuple[Tuple[str, ...], float, bool]
+
+# predict_fn(texts, labels, threshold, flat_ner) -> one entity list per text
+PredictFn = Callable[[List[str], List[str], float, bool], List[List[Dict[str, Any]]]]
+
+
+@dataclass
+class PendingText:
+    """A single text waiting in the batching queue"""
+    text: str
+    key: BatchKey
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatcher:
+    """Groups queued texts by (labels, threshold, flat_ner) into batched predictions"""
+
+    def __init__(
+        self,
+        predict_fn: PredictFn,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        executor: Optional[Any] = None,
+        on_queue_wait: Optional[Callable[[float], None]] = None
+    ):
+        """
+        Args:
+            predict_fn: Blocking batched prediction function
+            max_batch_size: Maximum number of texts per model call
+            max_wait_ms: How long the first queued text waits for the batch to fill
+            executor: Optional InferenceExecutor; when set, batches run on its pool and
+                at most `executor.max_workers` batches are in flight at once
+            on_queue_wait: Optional callback receiving, for every text, the seconds
+                between `submit` and the start of its model call
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be non-negative")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+        self.on_queue_wait = on_queue_wait
+        self.max_in_flight = executor.max_workers if executor is not None else 1
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Start the background batching loop on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._worker = asyncio.create_task(self._run())
+        logger.info(
+            f"Micro-batcher started (max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms})"
+        )
+
+    async def stop(self):
+        """Stop the batching loop and fail anything still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._in_flight):
+            task.cancel()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if not item.future.done():
+                    item.future.set_exception(RuntimeError("Batcher stopped"))
+            self._queue = None
+
+    async def submit(
+        self,
+        text: str,
+        labels: Sequence[str],
+        threshold: float,
+        flat_ner: bool
+    ) -> List[Dict[str, Any]]:
+        """Queue a text and wait for its slice of the batched prediction"""
+        if not self.running:
+            raise RuntimeError("Batcher is not running")
+        loop = asyncio.get_running_loop()
+        item = PendingText(
+            text=text,
+            key=(tuple(labels), float(threshold), bool(flat_ner)),
+            future=loop.create_future(),
+            enqueued_at=loop.time()
+        )
+        self._queue.put_nowait(item)
+        return await item.future
+
+    async def _collect(self) -> List[PendingText]:
+        """Wait for the first item, then fill the batch until it is full or the wait window closes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without yielding to the timer
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Hold back while every worker is busy so the queue keeps filling the next batch
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[PendingText]):
+        try:
+            groups: Dict[BatchKey, List[PendingText]] = defaultdict(list)
+            for item in batch:
+                # Skip requests whose caller already went away
+                if not item.future.done():
+                    groups[item.key].append(item)
+
+            for key, items in groups.items():
+                if self.on_queue_wait is not None:
+                    now = asyncio.get_running_loop().time()
+                    for item in items:
+                        self.on_queue_wait(now - item.enqueued_at)
+                await self._run_group(key, items)
+        finally:
+            self._slots.release()
+
+    async def _predict(self, texts: List[str], labels: List[str], threshold: float, flat_ner: bool):
+        if self.executor is None:
+            return self.predict_fn(texts, labels, threshold, flat_ner)
+        return await self.executor.run(self.predict_fn, texts, labels, threshold, flat_ner)
+
+    async def _run_group(self, key: BatchKey, items: List[PendingText]):
+        labels, threshold, flat_ner = key
+        texts = [item.text for item in items]
+        try:
+            results = await self._predict(texts, list(labels), threshold, flat_ner)
+            if len(results) != len(items):
+                raise RuntimeError(f"Expected {len(items)} results, got {len(results)}")
+        except asyncio.CancelledError:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(RuntimeError("Batcher stopped"))
+            raise
+        except Exception as e:
+            logger.error(f"Batched prediction failed for {len(items)} texts: {e}")
+            if len(items) > 1:
+                # Retry one by one so a single bad text does not fail its neighbours
+                for item in items:
+                    await self._run_group(key, [item])
+                return
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for item, entities in zip(items, results):
+            if not item.future.done():
+                item.future.set_result(entities)
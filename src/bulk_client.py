@@ -0,0 +1,207 @@
+"""
+Bulk extraction client for the Streamlit tester
+Parses uploaded CSV, JSONL or text files into documents and sends them to
+/extract/batch in batched, concurrent requests
+"""
+import csv
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import requests
+
+from redaction import redact_text
+
+# Column or field names treated as the document text, in order of preference
+TEXT_FIELDS = ("text", "content", "document", "note")
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+
+@dataclass
+class Document:
+    id: Union[int, str]
+    text: str
+
+
+@dataclass
+class BulkResult:
+    """Per-document extraction results (aligned with `documents`) and wall-clock time"""
+    documents: List[Document]
+    results: List[Optional[Dict[str, Any]]]
+    errors: List[Optional[str]]
+    seconds: float = 0.0
+    requests: int = 0
+    characters: int = field(init=False)
+
+    def __post_init__(self):
+        self.characters = sum(len(d.text) for d in self.documents)
+
+    @property
+    def error_count(self) -> int:
+        return sum(1 for e in self.errors if e is not None)
+
+    @property
+    def docs_per_second(self) -> float:
+        return len(self.documents) / self.seconds if self.seconds else 0.0
+
+    @property
+    def chars_per_second(self) -> float:
+        return self.characters / self.seconds if self.seconds else 0.0
+
+
+def _text_field(record: Dict[str, Any]) -> Optional[str]:
+    for name in TEXT_FIELDS:
+        if isinstance(record.get(name), str):
+            return name
+    return None
+
+
+def parse_upload(name: str, data: bytes) -> List[Document]:
+    """Split an uploaded file into documents
+
+    JSONL: one document per line, either a string or an object with a text field.
+    CSV: the text column when the header names one, otherwise each row's non-empty
+    cells joined with ", " (as in data/structured_pii_phi.csv).
+    Anything else: one document per non-empty line.
+    """
+    content = data.decode("utf-8-sig")
+    lowered = name.lower()
+    documents = []
+    if lowered.endswith(JSONL_EXTENSIONS):
+        for line_number, line in enumerate(content.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{name}:{line_number}: invalid JSON line: {e}") from e
+            if isinstance(record, str):
+                documents.append(Document(id=len(documents), text=record))
+                continue
+            text_field = _text_field(record) if isinstance(record, dict) else None
+            if text_field is None:
+                raise ValueError(f"{name}:{line_number}: expected a string or an object with one of {TEXT_FIELDS}")
+            documents.append(Document(id=record.get("id", len(documents)), text=record[text_field]))
+    elif lowered.endswith(".csv"):
+        rows = [row for row in csv.reader(io.StringIO(content)) if any(cell.strip() for cell in row)]
+        header = [cell.strip().lower() for cell in rows[0]] if rows else []
+        column = next((header.index(f) for f in TEXT_FIELDS if f in header), None)
+        if column is not None:
+            rows = rows[1:]
+        for row in rows:
+            if column is not None:
+                text = row[column] if column < len(row) else ""
+            else:
+                text = ", ".join(cell.strip() for cell in row if cell.strip())
+            documents.append(Document(id=len(documents), text=text))
+    else:
+        lines = [line for line in content.splitlines() if line.strip()]
+        documents = [Document(id=i, text=line) for i, line in enumerate(lines)]
+    return documents
+
+
+def iter_batches(documents: Sequence[Document], batch_size: int) -> Iterator[range]:
+    """Index ranges of consecutive `batch_size` documents"""
+    for start in range(0, len(documents), batch_size):
+        yield range(start, min(start + batch_size, len(documents)))
+
+
+def post_batch(
+    session: requests.Session,
+    api_url: str,
+    documents: Sequence[Document],
+    indices: range,
+    entities: Optional[List[str]],
+    threshold: float,
+    timeout: float
+) -> Dict[str, Any]:
+    """One /extract/batch call; items are identified by their position in `documents`"""
+    items = []
+    for i in indices:
+        item = {"id": i, "text": documents[i].text}
+        if entities:
+            item["entities"] = entities
+        items.append(item)
+    response = session.post(
+        f"{api_url}/extract/batch",
+        json={"items": items, "threshold": threshold, "flat_ner": True},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def extract_bulk(
+    session: requests.Session,
+    api_url: str,
+    documents: Sequence[Document],
+    entities: Optional[List[str]],
+    threshold: float,
+    batch_size: int = 32,
+    concurrency: int = 4,
+    timeout: float = 120,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> BulkResult:
+    """Extract entities for every document with up to `concurrency` batch requests in flight
+
+    A failed request marks each document in its batch with the error; the other
+    batches still complete. `on_progress(done, total)` runs on the calling thread.
+    """
+    documents = list(documents)
+    result = BulkResult(documents=documents, results=[None] * len(documents), errors=[None] * len(documents))
+    started = time.perf_counter()
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {
+            pool.submit(post_batch, session, api_url, documents, indices, entities, threshold, timeout): indices
+            for indices in iter_batches(documents, max(1, batch_size))
+        }
+        result.requests = len(futures)
+        for future in as_completed(futures):
+            indices = futures[future]
+            try:
+                body = future.result()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                for i in indices:
+                    result.errors[i] = str(e) or type(e).__name__
+            else:
+                for item in body["results"]:
+                    result.results[item["id"]] = item.get("result")
+                    result.errors[item["id"]] = item.get("error")
+            done += len(indices)
+            if on_progress is not None:
+                on_progress(done, len(documents))
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def annotated_jsonl(result: BulkResult) -> str:
+    """One {"id", "text", "entities"} line per document ({"id", "text", "error"} on failure)"""
+    lines = []
+    for document, extraction, error in zip(result.documents, result.results, result.errors):
+        record = {"id": document.id, "text": document.text}
+        if error is not None or extraction is None:
+            record["error"] = error or "No result"
+        else:
+            record["entities"] = extraction["entities"]
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def redacted_jsonl(result: BulkResult) -> str:
+    """One {"id", "text"} line per document with entities replaced by label tokens
+
+    Documents whose extraction failed get `"text": null` and the error, so
+    unredacted text never ends up in the download.
+    """
+    lines = []
+    for document, extraction, error in zip(result.documents, result.results, result.errors):
+        if error is not None or extraction is None:
+            record = {"id": document.id, "text": None, "error": error or "No result"}
+        else:
+            record = {"id": document.id, "text": redact_text(document.text, extraction["entities"])}
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return "\n".join(lines) + "\n" if lines else ""
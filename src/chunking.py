@@ -0,0 +1,139 @@
+"""
+Long-document chunking for GLiNER inference
+Splits text into overlapping, sentence-aligned windows and stitches entities back together
+"""
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+# Same word splitting GLiNER applies before encoding, so budgets count real model words
+WORD_PATTERN = re.compile(r"\w+(?:[-_]\w+)*|\S")
+SENTENCE_END_WORDS = {".", "!", "?", ";", "。", "！", "？"}
+
+
+@dataclass
+class Chunk:
+    """A window of the source text, located by character offsets"""
+    start: int
+    end: int
+    text: str
+    word_count: int
+
+
+# (clipped at a window edge, start, end, entity) with offsets into the whole document
+Candidate = Tuple[bool, int, int, Dict[str, Any]]
+
+
+def plan_chunks(text: str, max_words: int = 256, overlap_words: int = 32) -> List[Chunk]:
+    """Split text into windows of at most `max_words` words, preferring sentence ends
+
+    Consecutive windows share `overlap_words` words so an entity cut by one
+    window boundary appears whole in the neighbouring window.
+    """
+    if max_words < 1:
+        raise ValueError("max_words must be at least 1")
+    overlap_words = max(0, min(overlap_words, max_words // 2))
+
+    words = [(m.start(), m.end()) for m in WORD_PATTERN.finditer(text)]
+    if len(words) <= max_words:
+        return [Chunk(start=0, end=len(text), text=text, word_count=len(words))]
+
+    # Word indices after which a sentence (or line) ends; "." inside emails or numbers does not count
+    boundaries = [
+        i for i, (start, end) in enumerate(words)
+        if (text[start:end] in SENTENCE_END_WORDS and (end == len(text) or text[end].isspace()))
+        or (i + 1 < len(words) and "\n" in text[end:words[i + 1][0]])
+    ]
+
+    chunks = []
+    first = 0
+    while first < len(words):
+        last = min(first + max_words, len(words)) - 1
+        if last < len(words) - 1:
+            # Latest sentence end in the second half of the window, if any
+            pos = bisect.bisect_right(boundaries, last) - 1
+            if pos >= 0 and boundaries[pos] >= first + max_words // 2:
+                last = boundaries[pos]
+
+        char_start, char_end = words[first][0], words[last][1]
+        chunks.append(Chunk(
+            start=char_start,
+            end=char_end,
+            text=text[char_start:char_end],
+            word_count=last - first + 1
+        ))
+        if last == len(words) - 1:
+            break
+        first = max(last + 1 - overlap_words, first + 1)
+    return chunks
+
+
+def stitch_entities(
+    text: str,
+    chunks: Sequence[Chunk],
+    chunk_entities: Sequence[List[Dict[str, Any]]],
+    flat_ner: bool = True
+) -> List[Dict[str, Any]]:
+    """Map per-chunk predictions to document offsets and merge the overlap regions
+
+    Spans touching an interior window edge may be truncated, so whole spans from
+    the neighbouring window win over them; otherwise higher scores win. With
+    flat_ner the result has no overlapping spans, mirroring GLiNER's decoding.
+    """
+    if len(chunks) == 1:
+        return list(chunk_entities[0])
+
+    candidates: List[Candidate] = []
+    for idx, (chunk, entities) in enumerate(zip(chunks, chunk_entities)):
+        for entity in entities:
+            start = chunk.start + entity["start"]
+            end = chunk.start + entity["end"]
+            clipped = (idx > 0 and entity["start"] == 0) or (idx < len(chunks) - 1 and entity["end"] >= len(chunk.text))
+            candidates.append((clipped, start, end, entity))
+
+    kept = []
+    for _, start, end, entity in merge_candidates(candidates, flat_ner=flat_ner):
+        merged = dict(entity)
+        merged.update(start=start, end=end, text=text[start:end])
+        kept.append(merged)
+    return kept
+
+
+def merge_candidates(candidates: Sequence[Candidate], flat_ner: bool = True) -> List[Candidate]:
+    """Resolve (clipped, start, end, entity) candidates given in document offsets
+
+    Unclipped spans win over clipped ones, then higher scores, then longer spans win. Exact duplicates
+    are dropped, and with flat_ner no two kept spans overlap. Returns the kept
+    candidates in document order.
+    """
+    ordered = sorted(candidates, key=lambda c: (c[0], -c[3]["score"], c[1], c[1] - c[2]))
+
+    kept: List[Candidate] = []
+    seen = set()
+    # Flat mode: kept spans never overlap, so sorted starts/ends allow neighbour lookups
+    starts: List[int] = []
+    ends: List[int] = []
+    for candidate in ordered:
+        clipped, start, end, entity = candidate
+        key = (start, end, entity["label"])
+        if key in seen:
+            continue
+        if flat_ner:
+            pos = bisect.bisect_left(starts, start)
+            if pos > 0 and ends[pos - 1] > start:
+                continue
+            if pos < len(starts) and starts[pos] < end:
+                continue
+            starts.insert(pos, start)
+            ends.insert(pos, end)
+        elif clipped and any(
+            k[3]["label"] == entity["label"] and k[1] < end and start < k[2] for k in kept
+        ):
+            continue
+
+        seen.add(key)
+        kept.append(candidate)
+
+    kept.sort(key=lambda c: (c[1], c[2]))
+    return kept
@@ -0,0 +1,64 @@
+"""
+Bounded inference executor for the PII extraction service
+Runs blocking model calls on a dedicated thread pool with admission control
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the executor cannot admit more work"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """Thread pool for model inference with a bounded number of admitted requests"""
+
+    def __init__(self, max_workers: int = 1, max_pending: int = 64, retry_after: int = 1):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        # torch releases the GIL inside forward passes, so threads keep the model shared
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gliner-inference")
+
+    @contextmanager
+    def admission(self, slots: int = 1):
+        """Reserve `slots` slots (one per text) for a request; raises InferenceQueueFull when saturated
+
+        A request is charged at most `max_pending` slots, so an oversized batch is still
+        admitted on an idle executor. Only used from the event loop thread, so a plain
+        counter is enough.
+        """
+        slots = max(1, min(slots, self.max_pending))
+        if self.pending + slots > self.max_pending:
+            self.rejected += 1
+            raise InferenceQueueFull(self.retry_after)
+        self.pending += slots
+        try:
+            yield
+        finally:
+            self.pending -= slots
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the inference pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Inference executor shut down")
@@ -0,0 +1,83 @@
+"""
+HTML entity highlighting for the Streamlit tester
+Renders a document with its entity spans marked up in a single linear pass, so
+megabyte-sized notes with thousands of entities stay interactive
+"""
+import html
+from typing import Any, Dict, List, Sequence, Tuple
+
+Span = Tuple[int, int, Dict[str, Any]]
+
+# Color mapping for different entity types
+ENTITY_COLORS = {
+    "person": "#FF6B6B",
+    "organization": "#4ECDC4",
+    "phone number": "#45B7D1",
+    "mobile phone number": "#45B7D1",
+    "address": "#96CEB4",
+    "email": "#FFEAA7",
+    "email address": "#FFEAA7",
+    "credit card number": "#DDA0DD",
+    "social security number": "#FF7F50",
+    "date of birth": "#98D8C8",
+    "medication": "#F7DC6F",
+    "medical condition": "#BB8FCE",
+    "passport number": "#85C1E9",
+    "driver's license number": "#F8B500",
+    "bank account number": "#82E0AA",
+    "health insurance id number": "#F1948A",
+    "tax identification number": "#AED6F1",
+    "medical record number": "#FAD7A0",
+    "iban": "#D7BDE2",
+    "ip address": "#A9DFBF",
+    "national id number": "#F5B7B1",
+    "identity card number": "#D5DBDB",
+    "cpf": "#ABEBC6",
+}
+DEFAULT_COLOR = "#E8E8E8"
+
+
+def resolve_overlaps(entities: Sequence[Dict[str, Any]], text_length: int) -> List[Span]:
+    """Non-overlapping (start, end, entity) spans in text order
+
+    Offsets are clamped to the text and empty spans dropped. When two spans overlap
+    the higher-scoring one is kept (the longer one on ties), after one sort by start.
+    """
+    spans = []
+    for entity in entities:
+        start = max(0, min(int(entity["start"]), text_length))
+        end = max(0, min(int(entity["end"]), text_length))
+        if start < end:
+            spans.append((start, end, entity))
+    spans.sort(key=lambda s: (s[0], -s[1]))
+
+    kept: List[Span] = []
+    for span in spans:
+        if kept and span[0] < kept[-1][1]:
+            previous = kept[-1]
+            if (span[2].get("score", 0.0), span[1] - span[0]) > (previous[2].get("score", 0.0), previous[1] - previous[0]):
+                kept[-1] = span
+            continue
+        kept.append(span)
+    return kept
+
+
+def highlight_entities(text: str, entities: Sequence[Dict[str, Any]]) -> str:
+    """Create HTML-escaped text with `<mark>` annotations for each entity"""
+    if not entities:
+        return html.escape(text)
+
+    parts = []
+    cursor = 0
+    for start, end, entity in resolve_overlaps(entities, len(text)):
+        label = entity["label"]
+        color = ENTITY_COLORS.get(label.lower(), DEFAULT_COLOR)
+        title = html.escape(f"{label}: {entity.get('score', 0.0):.2f}")
+        parts.append(html.escape(text[cursor:start]))
+        parts.append(
+            f'<mark style="background-color: {color}; padding: 2px 4px; border-radius: 3px;" title="{title}">'
+            f'{html.escape(text[start:end])}</mark>'
+        )
+        cursor = end
+    parts.append(html.escape(text[cursor:]))
+    return "".join(parts)
@@ -0,0 +1,158 @@
+"""
+Model inference helpers shared by the PII extraction service
+Wraps the GLiNER batched prediction API behind a single call
+"""
+import functools
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from chunking import plan_chunks, stitch_entities
+
+# Mixed-language sentence with the kinds of values the service extracts
+WARMUP_SENTENCE = (
+    "Dr. Maria Schmidt (maria.schmidt@example.com, +49 30 1234567) treated Jean Dupont "
+    "for diabetes; payment from IBAN DE89370400440532013000 was confirmed on 12/03/2024. "
+)
+
+
+def model_predict(
+    model: Any,
+    texts: List[str],
+    labels: List[str],
+    threshold: float,
+    flat_ner: bool,
+    batch_size: int,
+    label_embeddings: Optional[Any] = None
+) -> List[List[Dict[str, Any]]]:
+    """One GLiNER call over `texts`; the model splits it into `batch_size` forward passes"""
+    if label_embeddings is not None:
+        # Bi-encoder models can reuse label embeddings computed once per label set
+        return model.batch_predict_with_embeds(
+            texts,
+            label_embeddings,
+            labels,
+            flat_ner=flat_ner,
+            threshold=threshold,
+            batch_size=batch_size
+        )
+    # Newer GLiNER releases expose `inference`; `batch_predict_entities` is kept as a fallback
+    if hasattr(model, "inference"):
+        return model.inference(
+            texts,
+            labels,
+            flat_ner=flat_ner,
+            threshold=threshold,
+            batch_size=batch_size
+        )
+    return model.batch_predict_entities(
+        texts,
+        labels,
+        flat_ner=flat_ner,
+        threshold=threshold,
+        batch_size=batch_size
+    )
+
+
+def batch_predict(
+    model: Any,
+    texts: Sequence[str],
+    labels: Sequence[str],
+    threshold: float = 0.5,
+    flat_ner: bool = True,
+    max_words: Optional[int] = None,
+    overlap_words: int = 32,
+    batch_size: int = 8,
+    label_embeddings: Optional[Any] = None
+) -> List[List[Dict[str, Any]]]:
+    """Run one batched GLiNER call and return one entity list per input text
+
+    When `max_words` is set, texts longer than the model window are split into
+    overlapping chunks; all chunks of all texts share the batched call and their
+    entities are stitched back into document offsets. `label_embeddings`, if
+    given, must be the pre-encoded embeddings of `labels` (bi-encoder models only).
+    """
+    if not texts:
+        return []
+
+    texts = list(texts)
+    labels = list(labels)
+
+    if not max_words:
+        return model_predict(
+            model, texts, labels, threshold, flat_ner, max(1, min(batch_size, len(texts))), label_embeddings
+        )
+
+    plans = [plan_chunks(text, max_words=max_words, overlap_words=overlap_words) for text in texts]
+    chunk_texts = [chunk.text for plan in plans for chunk in plan]
+    chunk_results = model_predict(
+        model, chunk_texts, labels, threshold, flat_ner, max(1, min(batch_size, len(chunk_texts))), label_embeddings
+    )
+
+    results = []
+    pos = 0
+    for text, plan in zip(texts, plans):
+        results.append(stitch_entities(text, plan, chunk_results[pos:pos + len(plan)], flat_ner=flat_ner))
+        pos += len(plan)
+    return results
+
+
+# GLiNER methods called once per `inference` call or per batch, by pipeline stage
+MODEL_STAGES = {
+    "prepare_batch": "tokenize",
+    "collate_batch": "tokenize",
+    "run_batch": "forward",
+    "decode_batch": "decode",
+    "map_entities_to_text": "decode"
+}
+
+
+def instrument_stages(model: Any, observe: Callable[[str, float], None]) -> List[str]:
+    """Time GLiNER's tokenize / forward / decode steps by wrapping them on this model instance
+
+    `observe(stage, seconds)` is called from the inference thread after every
+    wrapped call. Methods missing from the installed GLiNER release are skipped;
+    the names that were wrapped are returned.
+    """
+    wrapped = []
+    for method_name, stage in MODEL_STAGES.items():
+        method = getattr(model, method_name, None)
+        if method is None:
+            continue
+
+        def timed(*args, _method=method, _stage=stage, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                observe(_stage, time.perf_counter() - started)
+
+        setattr(model, method_name, functools.wraps(method)(timed))
+        wrapped.append(method_name)
+    return wrapped
+
+
+def build_warmup_texts(word_counts: Sequence[int]) -> List[str]:
+    """One synthetic text per requested length, cut to roughly that many words"""
+    words = WARMUP_SENTENCE.split()
+    texts = []
+    for count in word_counts:
+        repeated = words * (count // len(words) + 1)
+        texts.append(" ".join(repeated[:count]))
+    return texts
+
+
+def run_warmup(
+    predict_fn: Callable[[List[str], List[str], float, bool], Any],
+    labels: Sequence[str],
+    word_counts: Sequence[int],
+    batch_size: int = 8
+) -> float:
+    """Push one full batch per warmup length through `predict_fn`; returns the seconds spent
+
+    The first forward passes pay for lazy kernel selection, allocator growth and
+    tokenizer setup, so they are done here rather than on the first request.
+    """
+    started = time.perf_counter()
+    for text in build_warmup_texts(word_counts):
+        predict_fn([text] * max(1, batch_size), list(labels), 0.5, True)
+    return time.perf_counter() - started
@@ -0,0 +1,98 @@
+"""
+Label-set registry for GLiNER inference
+Canonicalizes requested label lists and reuses pre-encoded label embeddings across requests
+"""
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelSet = Tuple[str, ...]
+
+
+def canonical_labels(labels: Sequence[str]) -> LabelSet:
+    """Strip and de-duplicate labels, keeping first-seen order
+
+    Order is kept because it is part of the prompt the model sees; duplicates
+    only lengthen the prompt without changing what can be predicted.
+    """
+    seen = OrderedDict()
+    for label in labels:
+        label = label.strip()
+        if label:
+            seen.setdefault(label, None)
+    return tuple(seen)
+
+
+class LabelSetRegistry:
+    """Keeps label embeddings for the default label set and any set seen repeatedly
+
+    Only bi-encoder GLiNER models can encode labels independently of the text.
+    Uni-encoder models (such as urchade/gliner_multi_pii-v1) put the labels in
+    the same sequence as the text, so for them the registry only canonicalizes
+    label sets and every request takes the regular path.
+    """
+
+    def __init__(self, model: Any, enabled: bool = True, promote_after: int = 3, max_sets: int = 32):
+        self.model = model
+        self.supported = hasattr(model, "encode_labels") and hasattr(model, "batch_predict_with_embeds")
+        self.enabled = enabled and self.supported
+        self.promote_after = promote_after
+        self.max_sets = max_sets
+        self._seen: Counter = Counter()
+        self._embeddings: "OrderedDict[LabelSet, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if enabled and not self.supported:
+            logger.info(f"{type(model).__name__} encodes labels jointly with the text; label embedding cache disabled")
+
+    def register(self, labels: Sequence[str]) -> Optional[Any]:
+        """Encode a label set now (e.g. at startup) and keep it"""
+        if not self.enabled:
+            return None
+        label_set = canonical_labels(labels)
+        with self._lock:
+            if label_set in self._embeddings:
+                return self._embeddings[label_set]
+        embeddings = self.model.encode_labels(list(label_set))
+        with self._lock:
+            self._embeddings[label_set] = embeddings
+            while len(self._embeddings) > self.max_sets:
+                self._embeddings.popitem(last=False)
+        logger.info(f"Pre-encoded label set with {len(label_set)} labels")
+        return embeddings
+
+    def lookup(self, labels: Sequence[str]) -> Optional[Any]:
+        """Return cached embeddings for a label set, encoding it once it has been seen often enough"""
+        if not self.enabled:
+            return None
+        label_set = canonical_labels(labels)
+        with self._lock:
+            embeddings = self._embeddings.get(label_set)
+            if embeddings is not None:
+                self._embeddings.move_to_end(label_set)
+                self.hits += 1
+                return embeddings
+            self.misses += 1
+            if len(self._seen) > 100 * self.max_sets:
+                # Forget one-off label sets so the counter stays bounded
+                self._seen.clear()
+            self._seen[label_set] += 1
+            promote = self._seen[label_set] >= self.promote_after
+        if promote:
+            return self.register(label_set)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "embedding_cache_enabled": self.enabled,
+                "embedding_cache_supported": self.supported,
+                "cached_label_sets": len(self._embeddings),
+                "hits": self.hits,
+                "misses": self.misses
+            }
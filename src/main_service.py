@@ -6,14 +6,34 @@ import warnings
 # Suppress the sentencepiece tokenizer byte fallback warning
 warnings.filterwarnings("ignore", message=".*sentencepiece tokenizer.*byte fallback.*")
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from starlette.background import BackgroundTask
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Union
+from collections import deque
+from contextlib import ExitStack
+import asyncio
+import hmac
+import json
+import os
+import time
 import torch
-from gliner import GLiNER
 import logging
 from contextlib import asynccontextmanager
 
+from batching import MicroBatcher
+from executor import InferenceExecutor, InferenceQueueFull
+from streaming import SegmentStitcher, TextSegmenter, iter_segments
+from result_cache import ResultCache
+from label_sets import LabelSetRegistry, canonical_labels
+from backends import default_shared_dir, load_model, prepare_shared_weights
+from inference import batch_predict, instrument_stages, run_warmup
+from metrics import MetricsRegistry
+from profiling import count_inputs, profile_call, record_stage
+from redaction import Redactor
+from structured_pii import detect_structured, is_structured_label, merge_entities
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,6 +41,98 @@ logger = logging.getLogger(__name__)
 # Model state
 model_state = {}
 
+# Service metrics exposed at /metrics (per process; each uvicorn worker keeps its own)
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram(
+    "gliner_stage_seconds",
+    "Time per pipeline stage: queue_wait, tokenize, forward, decode, postprocess, serialize",
+    ["stage"]
+)
+REQUEST_SECONDS = metrics.histogram("gliner_request_seconds", "Extraction handler time", ["endpoint"])
+REQUESTS = metrics.counter("gliner_requests_total", "Extraction requests received", ["endpoint"])
+TEXTS = metrics.counter("gliner_texts_total", "Texts (documents, batch items, stream segments) processed")
+CHARACTERS = metrics.counter("gliner_characters_total", "Characters of text processed")
+ENTITIES = metrics.counter("gliner_entities_total", "Entities returned", ["label"])
+CACHE_LOOKUPS = metrics.counter("gliner_cache_lookups_total", "Result cache lookups", ["result"])
+PATTERN_ONLY = metrics.counter(
+    "gliner_pattern_only_total", "Texts answered by the structured-identifier pre-pass without the model"
+)
+REJECTIONS = metrics.counter("gliner_rejections_total", "Requests rejected with 503", ["reason"])
+
+MODEL_NAME = os.getenv("GLINER_MODEL_NAME", "urchade/gliner_multi_pii-v1")
+
+# Pinned local model directory (e.g. written by `python src/backends.py share`); loaded instead of the hub
+MODEL_PATH = os.getenv("GLINER_MODEL_PATH", "")
+MODEL_SOURCE = MODEL_PATH or MODEL_NAME
+# Never contact the Hugging Face hub; the model and tokenizer must be local or cached
+OFFLINE = os.getenv("GLINER_OFFLINE", "true" if MODEL_PATH else "false").lower() in ("1", "true", "yes")
+
+# Token required in X-Admin-Token for cProfile dumps of single requests ("" disables them)
+ADMIN_TOKEN = os.getenv("GLINER_ADMIN_TOKEN", "")
+
+# Warmup batch run before the service reports ready: text lengths in words ("" disables)
+WARMUP_WORD_COUNTS = [int(n) for n in os.getenv("GLINER_WARMUP_WORDS", "32,128,384").split(",") if n.strip()]
+
+# Inference backend: "torch" or "onnx" (onnxruntime on CPU)
+BACKEND = os.getenv("GLINER_BACKEND", "torch").lower()
+ONNX_DIR = os.getenv("GLINER_ONNX_DIR") or None
+ONNX_MODEL_FILE = os.getenv("GLINER_ONNX_MODEL_FILE", "model.onnx")
+ONNX_INTRA_OP_THREADS = int(os.getenv("GLINER_ONNX_INTRA_OP_THREADS", "0"))
+ONNX_INTER_OP_THREADS = int(os.getenv("GLINER_ONNX_INTER_OP_THREADS", "0"))
+
+# Opt-in int8 mode for CPU hosts: "none" or "int8" (torch dynamic quantization / int8 ONNX graph)
+QUANTIZE = os.getenv("GLINER_QUANTIZE", "none").lower()
+
+# Multi-worker mode: uvicorn worker processes share one memory-mapped copy of the weights
+WORKERS = int(os.getenv("GLINER_WORKERS", "1"))
+SHARED_WEIGHTS = os.getenv("GLINER_SHARED_WEIGHTS", "true" if WORKERS > 1 else "false").lower() in ("1", "true", "yes")
+SHARED_WEIGHTS_DIR = os.getenv("GLINER_SHARED_WEIGHTS_DIR") or default_shared_dir(MODEL_NAME)
+# Intra-op threads per worker; 0 splits the host's cores evenly between workers
+TORCH_THREADS = int(os.getenv("GLINER_TORCH_THREADS", "0"))
+
+# Micro-batching configuration
+MAX_BATCH_SIZE = int(os.getenv("GLINER_MAX_BATCH_SIZE", "8"))
+MAX_WAIT_MS = float(os.getenv("GLINER_MAX_WAIT_MS", "5"))
+
+# Inference pool configuration
+INFERENCE_WORKERS = int(os.getenv("GLINER_INFERENCE_WORKERS", "1"))
+MAX_PENDING_REQUESTS = int(os.getenv("GLINER_MAX_PENDING_REQUESTS", "64"))
+RETRY_AFTER_SECONDS = int(os.getenv("GLINER_RETRY_AFTER_SECONDS", "1"))
+
+# Long-document chunking: window size in model words (capped by the model's max_len) and overlap
+CHUNK_MAX_WORDS = int(os.getenv("GLINER_CHUNK_MAX_WORDS", "256"))
+CHUNK_OVERLAP_WORDS = int(os.getenv("GLINER_CHUNK_OVERLAP_WORDS", "32"))
+
+# Identifies everything that changes predictions, e.g. for cache keys
+MODEL_ID = (
+    f"{MODEL_SOURCE}:{BACKEND}:{QUANTIZE}" + (f":{ONNX_MODEL_FILE}" if BACKEND == "onnx" else "")
+    + f":chunk={CHUNK_MAX_WORDS}/{CHUNK_OVERLAP_WORDS}"
+)
+
+# Reuse pre-encoded label embeddings for the default and frequently seen label sets
+LABEL_EMBEDDING_CACHE = os.getenv("GLINER_LABEL_EMBEDDING_CACHE", "true").lower() in ("1", "true", "yes")
+LABEL_SET_PROMOTE_AFTER = int(os.getenv("GLINER_LABEL_SET_PROMOTE_AFTER", "3"))
+
+# Regex/checksum pre-pass for structured identifiers (email, IP, IBAN, card, SSN, CPF);
+# requests asking only for these labels skip the model
+PATTERN_PREPASS = os.getenv("GLINER_PATTERN_PREPASS", "true").lower() in ("1", "true", "yes")
+
+# Maximum number of documents accepted by /extract/batch
+MAX_BATCH_ITEMS = int(os.getenv("GLINER_MAX_BATCH_ITEMS", "1000"))
+
+# Result cache: repeated (text, labels, threshold, flat_ner) requests skip the model
+CACHE_ENABLED = os.getenv("GLINER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.getenv("GLINER_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_MB = float(os.getenv("GLINER_CACHE_MAX_MB", "64"))
+CACHE_TTL_SECONDS = float(os.getenv("GLINER_CACHE_TTL_SECONDS", "3600"))
+CACHE_DISK_PATH = os.getenv("GLINER_CACHE_DISK_PATH", "")
+
+# Streaming extraction: segment size and how many segments may be in flight
+STREAM_SEGMENT_CHARS = int(os.getenv("GLINER_STREAM_SEGMENT_CHARS", "2000"))
+# Characters repeated between consecutive segments so boundary-crossing entities are seen whole
+STREAM_OVERLAP_CHARS = int(os.getenv("GLINER_STREAM_OVERLAP_CHARS", "200"))
+STREAM_MAX_IN_FLIGHT = int(os.getenv("GLINER_STREAM_MAX_IN_FLIGHT", str(MAX_BATCH_SIZE)))
+
 # Supported PII/PHI entity types
 SUPPORTED_ENTITIES = [
     "person",
@@ -66,16 +178,113 @@ SUPPORTED_ENTITIES = [
     "landline_phone_number"
 ]
 
+def observe_stage(stage: str, seconds: float):
+    """Stage timings go to the metrics histogram and to a request profile being collected"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    record_stage(stage, seconds)
+
+async def start_model():
+    """Load the model, build the inference pipeline and warm it up
+
+    Runs in the background so /livez answers while the model loads; the model is
+    only published in model_state, and /readyz only succeeds, once warmup is done.
+    """
+    logger.info(f"Loading GLiNER PII model from {MODEL_SOURCE} ({BACKEND} backend, quantize={QUANTIZE})...")
+    started = time.perf_counter()
+    model = await asyncio.to_thread(
+        load_model,
+        MODEL_SOURCE,
+        backend=BACKEND,
+        onnx_dir=ONNX_DIR,
+        onnx_file=ONNX_MODEL_FILE,
+        intra_op_threads=ONNX_INTRA_OP_THREADS,
+        inter_op_threads=ONNX_INTER_OP_THREADS,
+        quantize=QUANTIZE,
+        shared_weights_dir=SHARED_WEIGHTS_DIR if SHARED_WEIGHTS else None,
+        local_files_only=OFFLINE
+    )
+    model_state["load_seconds"] = time.perf_counter() - started
+    logger.info(f"Model loaded successfully in {model_state['load_seconds']:.2f}s")
+
+    executor = InferenceExecutor(
+        max_workers=INFERENCE_WORKERS,
+        max_pending=MAX_PENDING_REQUESTS,
+        retry_after=RETRY_AFTER_SECONDS
+    )
+    model_state["executor"] = executor
+    max_words = min(CHUNK_MAX_WORDS, getattr(getattr(model, "config", None), "max_len", CHUNK_MAX_WORDS))
+    model_state["chunk_max_words"] = max_words
+    
+    label_sets = LabelSetRegistry(model, enabled=LABEL_EMBEDDING_CACHE, promote_after=LABEL_SET_PROMOTE_AFTER)
+    await asyncio.to_thread(label_sets.register, SUPPORTED_ENTITIES)
+    model_state["label_sets"] = label_sets
+    
+    def run_batch(texts, labels, threshold, flat_ner):
+        return batch_predict(
+            model, texts, labels, threshold, flat_ner,
+            max_words=max_words,
+            overlap_words=CHUNK_OVERLAP_WORDS,
+            batch_size=MAX_BATCH_SIZE,
+            label_embeddings=label_sets.lookup(labels)
+        )
+    
+    # Warm up on the inference pool itself so its threads are the ones that get initialized
+    warmup_seconds = 0.0
+    if WARMUP_WORD_COUNTS:
+        logger.info(f"Warming up with {MAX_BATCH_SIZE} texts of {WARMUP_WORD_COUNTS} words...")
+        warmup_seconds = await executor.run(
+            run_warmup, run_batch, SUPPORTED_ENTITIES, WARMUP_WORD_COUNTS, batch_size=MAX_BATCH_SIZE
+        )
+        logger.info(f"Warmup finished in {warmup_seconds:.2f}s")
+    model_state["warmup_seconds"] = warmup_seconds
+    
+    # Instrumented after warmup so the stage histograms only see real traffic
+    instrument_stages(model, observe_stage)
+    batcher = MicroBatcher(
+        run_batch,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_wait_ms=MAX_WAIT_MS,
+        executor=executor,
+        on_queue_wait=lambda seconds: STAGE_SECONDS.observe(seconds, stage="queue_wait")
+    )
+    await batcher.start()
+    model_state["batcher"] = batcher
+    model_state["run_batch"] = run_batch
+    if CACHE_ENABLED:
+        model_state["cache"] = ResultCache(
+            max_entries=CACHE_MAX_ENTRIES,
+            max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+            ttl_seconds=CACHE_TTL_SECONDS,
+            disk_path=CACHE_DISK_PATH
+        )
+    model_state["model"] = model
+    logger.info(f"Service ready ({model_state['load_seconds'] + warmup_seconds:.2f}s after start of load)")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Loading GLiNER PII model...")
-    try:
-        model_state["model"] = GLiNER.from_pretrained("urchade/gliner_multi_pii-v1")
-        logger.info("Model loaded successfully")
-    except Exception as e:
-        logger.error(f"Failed to load model: {e}")
-        raise
+    torch_threads = TORCH_THREADS or (max(1, (os.cpu_count() or 1) // WORKERS) if WORKERS > 1 else 0)
+    if torch_threads:
+        # Without this every worker would start one thread per core and oversubscribe the host
+        torch.set_num_threads(torch_threads)
+    
+    startup = asyncio.create_task(start_model())
+    
+    def on_startup_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            model_state["startup_error"] = str(task.exception())
+            logger.error(f"Failed to load model: {task.exception()}")
+    
+    startup.add_done_callback(on_startup_done)
     yield
+    if not startup.done():
+        startup.cancel()
+    await asyncio.gather(startup, return_exceptions=True)
+    if "batcher" in model_state:
+        await model_state["batcher"].stop()
+    if "executor" in model_state:
+        model_state["executor"].shutdown()
+    if "cache" in model_state:
+        await asyncio.to_thread(model_state["cache"].close)
     model_state.clear()
 
 app = FastAPI(
@@ -91,6 +300,7 @@ class ExtractionRequest(BaseModel):
     entities: Optional[List[str]] = Field(None, description="Specific entities to extract")
     threshold: float = Field(0.5, ge=0.0, le=1.0, description="Confidence threshold")
     flat_ner: bool = Field(True, description="Whether to use flat NER")
+    profile: bool = Field(False, description="Return a timings block; model calls run unbatched")
 
 class Entity(BaseModel):
     text: str
@@ -99,16 +309,232 @@ class Entity(BaseModel):
     end: int
     score: float
 
+class RequestTimings(BaseModel):
+    # "model", "cache" or "pattern"; model stages are None unless the model ran
+    source: str
+    queue_wait_ms: Optional[float] = None
+    tokenize_ms: Optional[float] = None
+    forward_ms: Optional[float] = None
+    decode_ms: Optional[float] = None
+    format_ms: float
+    total_ms: float
+    words: int
+    tokens: Optional[int] = None
+    labels: int
+    chunks: int
+
 class ExtractionResponse(BaseModel):
     entities: List[Entity]
     text: str
     entity_count: int
     entity_types: Dict[str, int]
+    timings: Optional[RequestTimings] = None
+    profile: Optional[str] = None
+
+class BatchExtractionItem(BaseModel):
+    id: Union[int, str] = Field(..., description="Caller-supplied identifier echoed in the result")
+    text: str = Field(..., description="Text to extract PII from")
+    entities: Optional[List[str]] = Field(None, description="Specific entities to extract")
+    threshold: Optional[float] = Field(None, ge=0.0, le=1.0, description="Overrides the batch threshold")
+
+class BatchExtractionRequest(BaseModel):
+    items: List[BatchExtractionItem] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+    threshold: float = Field(0.5, ge=0.0, le=1.0, description="Default confidence threshold")
+    flat_ner: bool = Field(True, description="Whether to use flat NER")
+
+class BatchItemResult(BaseModel):
+    id: Union[int, str]
+    result: Optional[ExtractionResponse] = None
+    error: Optional[str] = None
+
+class BatchExtractionResponse(BaseModel):
+    results: List[BatchItemResult]
+    item_count: int
+    error_count: int
+
+RedactionStrategy = Literal["mask", "token", "pseudonym"]
+
+class RedactionRequest(BaseModel):
+    text: str = Field(..., description="Text to redact")
+    entities: Optional[List[str]] = Field(None, description="Specific entities to redact")
+    threshold: float = Field(0.5, ge=0.0, le=1.0, description="Confidence threshold")
+    flat_ner: bool = Field(True, description="Whether to use flat NER")
+    strategy: RedactionStrategy = Field("token", description="Default strategy: mask, token or pseudonym")
+    strategies: Optional[Dict[str, RedactionStrategy]] = Field(None, description="Per-label strategy overrides")
+    mask_char: str = Field("*", min_length=1, max_length=1, description="Character used by the mask strategy")
+    token: Optional[str] = Field(None, description='Fixed token for the token strategy (default "[LABEL]")')
+    include_text: bool = Field(True, description="Echo the original text in the response")
+
+class RedactedEntity(BaseModel):
+    label: str
+    start: int
+    end: int
+    score: float
+    replacement: str
+
+class RedactionResponse(BaseModel):
+    redacted_text: str
+    text: Optional[str] = None
+    entities: List[RedactedEntity]
+    entity_count: int
+    entity_types: Dict[str, int]
+
+class CacheStats(BaseModel):
+    enabled: bool
+    entries: int = 0
+    bytes: int = 0
+    max_entries: int = 0
+    max_bytes: int = 0
+    ttl_seconds: Optional[float] = None
+    hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+    disk_hits: int = 0
+    evictions: int = 0
+    disk_path: Optional[str] = None
+
+class LabelSetStats(BaseModel):
+    embedding_cache_enabled: bool
+    embedding_cache_supported: bool
+    cached_label_sets: int
+    hits: int
+    misses: int
+
+class BatchingConfig(BaseModel):
+    max_batch_size: int
+    max_wait_ms: float
+    chunk_max_words: Optional[int] = None
+    chunk_overlap_words: int
+
+class InferencePoolStatus(BaseModel):
+    workers: int
+    max_pending: int
+    pending: int
+    rejected: int
 
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
+    backend: str
+    quantize: str
+    workers: int
+    shared_weights: bool
     supported_entities: List[str]
+    batching: BatchingConfig
+    inference: Optional[InferencePoolStatus] = None
+    label_sets: Optional[LabelSetStats] = None
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+
+class ProbeResponse(BaseModel):
+    status: str
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+@app.exception_handler(InferenceQueueFull)
+async def inference_queue_full_handler(request: Request, exc: InferenceQueueFull):
+    REJECTIONS.inc(reason="queue_full")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Inference queue is full, retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def ensure_model_ready():
+    """Reject work until startup (load and warmup) has finished"""
+    if "model" not in model_state:
+        REJECTIONS.inc(reason="not_ready")
+        detail = "Model failed to load" if "startup_error" in model_state else "Model not loaded yet"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+async def predict_entities(
+    text: str,
+    labels: List[str],
+    threshold: float,
+    flat_ner: bool
+) -> List[Dict[str, Any]]:
+    """Predict entities for one text, answering from the pattern pre-pass or result cache when possible"""
+    entities = await run_prediction(text, labels, threshold, flat_ner, cache=model_state.get("cache"))
+    record_prediction(text, entities)
+    return entities
+
+async def run_prediction(
+    text: str,
+    labels: List[str],
+    threshold: float,
+    flat_ner: bool,
+    cache: Optional[ResultCache] = None,
+    predict: Optional[Callable[[str, List[str], float, bool], Awaitable[List[Dict[str, Any]]]]] = None
+) -> List[Dict[str, Any]]:
+    """Pattern pre-pass hits merged with model predictions; the model is skipped when every label is structured
+
+    `predict` replaces the micro-batcher for the model call, e.g. to profile it.
+    """
+    labels = list(canonical_labels(labels))
+    pattern_entities = []
+    if PATTERN_PREPASS:
+        structured = [label for label in labels if is_structured_label(label)]
+        if structured:
+            pattern_entities = detect_structured(text, structured)
+            if is_pattern_only(labels):
+                PATTERN_ONLY.inc()
+                return pattern_entities
+    
+    key = None
+    entities = None
+    if cache is not None:
+        key = ResultCache.make_key(text, labels, threshold, flat_ner, MODEL_ID)
+        entities = cache.get(key, memory_only=cache.disk_path is not None)
+        if entities is None and cache.disk_path is not None:
+            # SQLite lookups block, so the disk tier is read off the event loop
+            entities = await asyncio.to_thread(cache.get, key)
+        CACHE_LOOKUPS.inc(result="hit" if entities is not None else "miss")
+    if entities is None:
+        if predict is None:
+            entities = await model_state["batcher"].submit(text, labels, threshold=threshold, flat_ner=flat_ner)
+        else:
+            entities = await predict(text, labels, threshold, flat_ner)
+        if cache is not None:
+            cache.put(key, entities)
+    return merge_entities(entities, pattern_entities)
+
+def is_pattern_only(labels: List[str]) -> bool:
+    """Whether the pre-pass answers every label, so the model is never called"""
+    return PATTERN_PREPASS and all(is_structured_label(label) for label in labels)
+
+def record_prediction(text: str, entities: List[Dict[str, Any]]):
+    TEXTS.inc()
+    CHARACTERS.inc(len(text))
+    for e in entities:
+        ENTITIES.inc(label=e["label"])
+
+def serialize_response(response: BaseModel, endpoint: str, started: float, exclude: Optional[set] = None) -> Response:
+    """Render the response model to JSON ourselves so serialization can be timed"""
+    serialize_started = time.perf_counter()
+    body = response.model_dump_json(exclude=exclude)
+    now = time.perf_counter()
+    STAGE_SECONDS.observe(now - serialize_started, stage="serialize")
+    REQUEST_SECONDS.observe(now - started, endpoint=endpoint)
+    return Response(content=body, media_type="application/json")
+
+def build_extraction_response(text: str, entities: List[Dict[str, Any]]) -> ExtractionResponse:
+    """Format raw model predictions into an ExtractionResponse"""
+    formatted_entities = [
+        Entity(text=e["text"], label=e["label"], start=e["start"], end=e["end"], score=e["score"])
+        for e in entities
+    ]
+    
+    entity_types = {}
+    for entity in formatted_entities:
+        entity_types[entity.label] = entity_types.get(entity.label, 0) + 1
+    
+    return ExtractionResponse(
+        entities=formatted_entities,
+        text=text,
+        entity_count=len(formatted_entities),
+        entity_types=entity_types
+    )
 
 @app.get("/")
 async def root():
@@ -116,47 +542,387 @@ async def root():
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
+    executor = model_state.get("executor")
     return HealthResponse(
-        status="healthy" if "model" in model_state else "unhealthy",
+        status=startup_status(),
         model_loaded="model" in model_state,
-        supported_entities=SUPPORTED_ENTITIES
+        backend=BACKEND,
+        quantize=QUANTIZE,
+        workers=WORKERS,
+        shared_weights=SHARED_WEIGHTS and BACKEND == "torch",
+        supported_entities=SUPPORTED_ENTITIES,
+        batching=BatchingConfig(
+            max_batch_size=MAX_BATCH_SIZE,
+            max_wait_ms=MAX_WAIT_MS,
+            chunk_max_words=model_state.get("chunk_max_words"),
+            chunk_overlap_words=CHUNK_OVERLAP_WORDS
+        ),
+        inference=InferencePoolStatus(
+            workers=executor.max_workers,
+            max_pending=executor.max_pending,
+            pending=executor.pending,
+            rejected=executor.rejected
+        ) if executor else None,
+        label_sets=LabelSetStats(**model_state["label_sets"].stats()) if "label_sets" in model_state else None,
+        load_seconds=model_state.get("load_seconds"),
+        warmup_seconds=model_state.get("warmup_seconds")
+    )
+
+def startup_status() -> str:
+    if "model" in model_state:
+        return "healthy"
+    return "unhealthy" if "startup_error" in model_state else "starting"
+
+def probe_response(status_code: int) -> JSONResponse:
+    body = ProbeResponse(
+        status=startup_status(),
+        load_seconds=model_state.get("load_seconds"),
+        warmup_seconds=model_state.get("warmup_seconds"),
+        error=model_state.get("startup_error")
     )
+    return JSONResponse(status_code=status_code, content=body.model_dump())
+
+@app.get("/livez", response_model=ProbeResponse)
+async def liveness():
+    """The process is up; fails only when the model could not be loaded, so the worker gets restarted"""
+    return probe_response(500 if "startup_error" in model_state else 200)
+
+@app.get("/readyz", response_model=ProbeResponse)
+async def readiness():
+    """Model loaded and warmed up; route traffic here only when this returns 200"""
+    return probe_response(200 if "model" in model_state else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of request counters and per-stage latency histograms"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/entities")
 async def get_supported_entities():
     return SUPPORTED_ENTITIES
 
+@app.get("/cache", response_model=CacheStats)
+async def get_cache_stats():
+    cache = model_state.get("cache")
+    if cache is None:
+        return CacheStats(enabled=False)
+    return CacheStats(enabled=True, **cache.stats())
+
+@app.delete("/cache", response_model=CacheStats)
+async def clear_cache():
+    cache = model_state.get("cache")
+    if cache is None:
+        return CacheStats(enabled=False)
+    await asyncio.to_thread(cache.clear)
+    return CacheStats(enabled=True, **cache.stats())
+
+def profiling_mode(profile_flag: bool, header: Optional[str], admin_token: Optional[str]) -> Optional[str]:
+    """None, "timings" or "cprofile" from the request flag and X-Profile header"""
+    mode = (header or "").strip().lower()
+    if mode == "cprofile":
+        if not ADMIN_TOKEN or not hmac.compare_digest(admin_token or "", ADMIN_TOKEN):
+            raise HTTPException(status_code=403, detail="cProfile dumps require a valid X-Admin-Token")
+        return "cprofile"
+    if profile_flag or mode in ("1", "true", "timings"):
+        return "timings"
+    return None
+
 @app.post("/extract", response_model=ExtractionResponse)
-async def extract_pii(request: ExtractionRequest):
-    if "model" not in model_state:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+async def extract_pii(
+    request: ExtractionRequest,
+    x_profile: Optional[str] = Header(None, description='"timings" for a timing breakdown, "cprofile" (admin) for a profile dump'),
+    x_admin_token: Optional[str] = Header(None)
+):
+    started = time.perf_counter()
+    REQUESTS.inc(endpoint="/extract")
+    ensure_model_ready()
+    mode = profiling_mode(request.profile, x_profile, x_admin_token)
     
-    model = model_state["model"]
     entities_to_extract = request.entities or SUPPORTED_ENTITIES
     
-    entities = model.predict_entities(
+    with model_state["executor"].admission():
+        if mode is None:
+            entities = await predict_entities(
+                request.text,
+                entities_to_extract,
+                threshold=request.threshold,
+                flat_ner=request.flat_ner
+            )
+        else:
+            # Profiled model calls run alone so every stage is attributable to this text; pattern-only
+            # requests and cache hits never reach the model, so their timings name the source instead
+            profiled = {}
+            
+            async def predict_profiled(text, labels, threshold, flat_ner):
+                entities, profiled["stages"], profiled["report"] = await model_state["executor"].run(
+                    profile_call,
+                    model_state["run_batch"],
+                    text,
+                    labels,
+                    threshold,
+                    flat_ner,
+                    submitted_at=time.perf_counter(),
+                    cprofile=mode == "cprofile"
+                )
+                return entities
+            
+            entities = await run_prediction(
+                request.text,
+                entities_to_extract,
+                request.threshold,
+                request.flat_ner,
+                cache=model_state.get("cache"),
+                predict=predict_profiled
+            )
+            record_prediction(request.text, entities)
+            stages = profiled.get("stages", {})
+            report = profiled.get("report")
+    
+    postprocess_started = time.perf_counter()
+    response = build_extraction_response(request.text, entities)
+    format_seconds = time.perf_counter() - postprocess_started
+    STAGE_SECONDS.observe(format_seconds, stage="postprocess")
+    if mode is None:
+        return serialize_response(response, "/extract", started, exclude={"timings", "profile"})
+    
+    # Tokenizing is blocking work, and the tokenizer belongs to the inference threads
+    counts = await model_state["executor"].run(
+        count_inputs,
+        model_state["model"],
         request.text,
-        entities_to_extract,
-        threshold=request.threshold,
-        flat_ner=request.flat_ner
+        list(canonical_labels(entities_to_extract)),
+        model_state.get("chunk_max_words"),
+        CHUNK_OVERLAP_WORDS
     )
+    if "stages" in profiled:
+        source = "model"
+    elif is_pattern_only(list(canonical_labels(entities_to_extract))):
+        source = "pattern"
+    else:
+        source = "cache"
+    model_ms = {
+        f"{stage}_ms": stages.get(stage, 0.0) * 1000 if source == "model" else None
+        for stage in ("queue_wait", "tokenize", "forward", "decode")
+    }
+    response.timings = RequestTimings(
+        source=source,
+        **model_ms,
+        format_ms=format_seconds * 1000,
+        total_ms=(time.perf_counter() - started) * 1000,
+        **counts
+    )
+    response.profile = report
+    logger.info(f"Profiled /extract request: {response.timings.model_dump()}")
+    return serialize_response(response, "/extract", started, exclude=None if report else {"profile"})
+
+@app.post("/extract/batch", response_model=BatchExtractionResponse)
+async def extract_pii_batch(request: BatchExtractionRequest):
+    started = time.perf_counter()
+    REQUESTS.inc(endpoint="/extract/batch")
+    ensure_model_ready()
     
-    formatted_entities = [
-        Entity(text=e["text"], label=e["label"], start=e["start"], end=e["end"], score=e["score"])
-        for e in entities
-    ]
+    # All items are queued at once; the batcher slices them into model-sized batches.
+    # Each item counts against the bounded queue, so large batches see backpressure too
+    with model_state["executor"].admission(len(request.items)):
+        outcomes = await asyncio.gather(
+            *(
+                predict_entities(
+                    item.text,
+                    item.entities or SUPPORTED_ENTITIES,
+                    threshold=item.threshold if item.threshold is not None else request.threshold,
+                    flat_ner=request.flat_ner
+                )
+                for item in request.items
+            ),
+            return_exceptions=True
+        )
     
-    entity_types = {}
-    for entity in formatted_entities:
-        entity_types[entity.label] = entity_types.get(entity.label, 0) + 1
+    postprocess_started = time.perf_counter()
+    results = []
+    for item, outcome in zip(request.items, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Batch item {item.id!r} failed: {outcome}")
+            results.append(BatchItemResult(id=item.id, error=str(outcome) or type(outcome).__name__))
+        else:
+            results.append(BatchItemResult(id=item.id, result=build_extraction_response(item.text, outcome)))
     
-    return ExtractionResponse(
-        entities=formatted_entities,
-        text=request.text,
-        entity_count=len(formatted_entities),
+    response = BatchExtractionResponse(
+        results=results,
+        item_count=len(results),
+        error_count=sum(1 for r in results if r.error is not None)
+    )
+    STAGE_SECONDS.observe(time.perf_counter() - postprocess_started, stage="postprocess")
+    return serialize_response(
+        response, "/extract/batch", started, exclude={"results": {"__all__": {"result": {"timings", "profile"}}}}
+    )
+
+@app.post("/redact", response_model=RedactionResponse)
+async def redact_pii(request: RedactionRequest):
+    started = time.perf_counter()
+    REQUESTS.inc(endpoint="/redact")
+    ensure_model_ready()
+    
+    with model_state["executor"].admission():
+        entities = await predict_entities(
+            request.text,
+            request.entities or SUPPORTED_ENTITIES,
+            threshold=request.threshold,
+            flat_ner=request.flat_ner
+        )
+    
+    postprocess_started = time.perf_counter()
+    redactor = Redactor(request.strategy, request.strategies, mask_char=request.mask_char, token=request.token)
+    redacted_text, replaced = redactor.redact(request.text, entities)
+    entity_types = {}
+    for entity in replaced:
+        entity_types[entity["label"]] = entity_types.get(entity["label"], 0) + 1
+    response = RedactionResponse(
+        redacted_text=redacted_text,
+        text=request.text if request.include_text else None,
+        entities=[RedactedEntity(**entity) for entity in replaced],
+        entity_count=len(replaced),
         entity_types=entity_types
     )
+    STAGE_SECONDS.observe(time.perf_counter() - postprocess_started, stage="postprocess")
+    return serialize_response(response, "/redact", started, exclude=None if request.include_text else {"text"})
+
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse for generators that are still reading the request body
+
+    The stock response listens for client disconnects on `receive`, which would
+    swallow the request body chunks the generator is waiting for. A disconnect
+    still surfaces here as ClientDisconnect from `request.stream()`.
+    
+    The body generator is closed and the background task (used for cleanup such as
+    releasing the admission slot) runs however the response ends, including when it
+    fails or the client goes away before the first chunk.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        finally:
+            try:
+                aclose = getattr(self.body_iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+            finally:
+                if self.background is not None:
+                    await self.background()
+
+@app.post("/extract/stream")
+async def extract_pii_stream(
+    request: Request,
+    entities: Optional[List[str]] = Query(None, description="Specific entities to extract"),
+    threshold: float = Query(0.5, ge=0.0, le=1.0, description="Confidence threshold"),
+    flat_ner: bool = Query(True, description="Whether to use flat NER")
+):
+    """Extract entities from a chunked plain-text or NDJSON body, streaming NDJSON results
+
+    Results are emitted per segment as `{"type": "entity", ...}` lines with offsets into
+    the whole input, followed by one `{"type": "summary", ...}` line. The input text is
+    never echoed back. NDJSON bodies (`application/x-ndjson`) are read as consecutive
+    pieces of one document, one `{"text": ...}` object or JSON string per line.
+    Consecutive segments overlap by GLINER_STREAM_OVERLAP_CHARS so entities crossing
+    a segment boundary are found whole; entities in the overlap are emitted once.
+    """
+    REQUESTS.inc(endpoint="/extract/stream")
+    ensure_model_ready()
+    
+    entities_to_extract = entities or SUPPORTED_ENTITIES
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    
+    # Hold one admission slot for the lifetime of the stream; the response releases it
+    admission = ExitStack()
+    admission.enter_context(model_state["executor"].admission())
+    
+    async def generate():
+        in_flight = deque()
+        stitcher = SegmentStitcher(overlap_chars=segmenter.overlap_chars, flat_ner=flat_ner)
+        entity_types = {}
+        entity_count = 0
+        chars = 0
+        
+        def emit(stitched: List[Dict[str, Any]]):
+            nonlocal entity_count
+            for e in stitched:
+                entity_count += 1
+                entity_types[e["label"]] = entity_types.get(e["label"], 0) + 1
+                yield json.dumps({
+                    "type": "entity",
+                    "text": e["text"],
+                    "label": e["label"],
+                    "start": e["start"],
+                    "end": e["end"],
+                    "score": e["score"]
+                }, ensure_ascii=False) + "\n"
+        
+        def drain(segment_offset: int, segment: str, task: asyncio.Future):
+            try:
+                segment_entities = task.result()
+                record_prediction(segment, segment_entities)
+            except Exception as e:
+                logger.warning(f"Stream segment at offset {segment_offset} failed: {e}")
+                yield json.dumps({"type": "error", "offset": segment_offset, "detail": str(e)}) + "\n"
+                return
+            yield from emit(stitcher.add(segment_offset, segment, segment_entities))
+        
+        try:
+            try:
+                async for offset, segment in iter_segments(request.stream(), segmenter, ndjson=ndjson):
+                    chars = offset + len(segment)
+                    in_flight.append((offset, segment, asyncio.ensure_future(
+                        run_prediction(segment, entities_to_extract, threshold, flat_ner)
+                    )))
+                    # Emit finished segments in order; wait only when the window is full
+                    while in_flight and (in_flight[0][2].done() or len(in_flight) >= STREAM_MAX_IN_FLIGHT):
+                        segment_offset, segment_text, task = in_flight.popleft()
+                        await asyncio.wait([task])
+                        for line in drain(segment_offset, segment_text, task):
+                            yield line
+            except ValueError as e:
+                yield json.dumps({"type": "error", "offset": chars, "detail": str(e)}) + "\n"
+                # Text received before the bad record is still extracted
+                for offset, segment in segmenter.flush():
+                    chars = offset + len(segment)
+                    in_flight.append((offset, segment, asyncio.ensure_future(
+                        run_prediction(segment, entities_to_extract, threshold, flat_ner)
+                    )))
+            
+            while in_flight:
+                segment_offset, segment_text, task = in_flight.popleft()
+                await asyncio.wait([task])
+                for line in drain(segment_offset, segment_text, task):
+                    yield line
+            for line in emit(stitcher.flush()):
+                yield line
+            
+            yield json.dumps({
+                "type": "summary",
+                "characters": chars,
+                "entity_count": entity_count,
+                "entity_types": entity_types
+            }) + "\n"
+        finally:
+            for _, _, task in in_flight:
+                task.cancel()
+            admission.close()
+    
+    try:
+        segmenter = TextSegmenter(segment_chars=STREAM_SEGMENT_CHARS, overlap_chars=STREAM_OVERLAP_CHARS)
+        return BodyStreamingResponse(
+            generate(), media_type="application/x-ndjson", background=BackgroundTask(admission.close)
+        )
+    except BaseException:
+        admission.close()
+        raise
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WORKERS > 1:
+        if SHARED_WEIGHTS and BACKEND == "torch":
+            # Write the shared checkpoint once before the workers start mapping it
+            prepare_shared_weights(MODEL_SOURCE, SHARED_WEIGHTS_DIR, local_files_only=OFFLINE)
+        uvicorn.run("main_service:app", host="0.0.0.0", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,89 @@
+"""
+Per-request profiling for the PII extraction service
+Collects a stage-by-stage timing breakdown, input sizes and optionally a cProfile dump for one request
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from chunking import WORD_PATTERN, plan_chunks
+
+_local = threading.local()
+
+
+@contextmanager
+def collect_stage_timings() -> Iterator[Dict[str, float]]:
+    """Accumulate `record_stage` calls made on this thread into the yielded dict"""
+    previous = getattr(_local, "timings", None)
+    _local.timings = timings = defaultdict(float)
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+
+
+def record_stage(stage: str, seconds: float):
+    """Add to the profile being collected on this thread, if any; a no-op otherwise"""
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        timings[stage] += seconds
+
+
+def count_inputs(
+    model: Any,
+    text: str,
+    labels: Sequence[str],
+    max_words: Optional[int],
+    overlap_words: int
+) -> Dict[str, int]:
+    """Words, subword tokens, labels and chunks the model sees for `text`"""
+    words = WORD_PATTERN.findall(text)
+    chunks = len(plan_chunks(text, max_words=max_words, overlap_words=overlap_words)) if max_words else 1
+    tokenizer = getattr(getattr(model, "data_processor", None), "transformer_tokenizer", None)
+    tokens = None
+    if tokenizer is not None and words:
+        # Text tokens only; the label prompt adds a few tokens per label on top
+        tokens = len(tokenizer(words, is_split_into_words=True, add_special_tokens=False)["input_ids"])
+    return {"words": len(words), "tokens": tokens, "labels": len(labels), "chunks": chunks}
+
+
+def profile_call(
+    predict_fn: Callable[[List[str], List[str], float, bool], List[List[Dict[str, Any]]]],
+    text: str,
+    labels: Sequence[str],
+    threshold: float,
+    flat_ner: bool,
+    submitted_at: float,
+    cprofile: bool = False,
+    top: int = 40
+) -> Tuple[List[Dict[str, Any]], Dict[str, float], Optional[str]]:
+    """Run one unbatched prediction on the calling thread and time its stages
+
+    Returns (entities, seconds per stage, cProfile report or None). `submitted_at`
+    is the perf_counter value when the call was handed to the inference pool.
+    """
+    started = time.perf_counter()
+    profiler = cProfile.Profile() if cprofile else None
+    with collect_stage_timings() as timings:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            entities = predict_fn([text], list(labels), threshold, flat_ner)[0]
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    timings = dict(timings)
+    timings["queue_wait"] = started - submitted_at
+    timings["model_total"] = time.perf_counter() - started
+
+    report = None
+    if profiler is not None:
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        report = out.getvalue()
+    return entities, timings, report
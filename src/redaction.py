@@ -0,0 +1,89 @@
+"""
+Text redaction from extracted entity spans
+Rewrites a document in a single pass over its sorted, non-overlapping spans with
+a mask, fixed-token or consistent-pseudonym strategy per label
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from highlighting import resolve_overlaps
+
+REDACTION_STRATEGIES = ("mask", "token", "pseudonym")
+
+
+def label_token(label: str) -> str:
+    """Placeholder for a redacted span, e.g. "email address" -> "[EMAIL_ADDRESS]" """
+    return "[" + label_name(label) + "]"
+
+
+def label_name(label: str) -> str:
+    return "_".join(label.upper().split())
+
+
+class Redactor:
+    """Computes replacements for one document
+
+    - mask: every non-whitespace character becomes `mask_char`, so length and layout are kept
+    - token: a fixed token, `token` if given, otherwise the label token ("[EMAIL]")
+    - pseudonym: "[PERSON_1]", "[PERSON_2]", ... numbered in order of first appearance;
+      repeated mentions of the same (label, text) get the same pseudonym
+    """
+
+    def __init__(
+        self,
+        strategy: str = "token",
+        strategies: Optional[Mapping[str, str]] = None,
+        mask_char: str = "*",
+        token: Optional[str] = None
+    ):
+        overrides = {label.lower(): value for label, value in (strategies or {}).items()}
+        for value in [strategy, *overrides.values()]:
+            if value not in REDACTION_STRATEGIES:
+                raise ValueError(f"Unknown redaction strategy {value!r}; expected one of {REDACTION_STRATEGIES}")
+        self.strategy = strategy
+        self.strategies = overrides
+        self.mask_char = mask_char
+        self.token = token
+        self._pseudonyms: Dict[Tuple[str, str], str] = {}
+        self._counts: Dict[str, int] = {}
+
+    def strategy_for(self, label: str) -> str:
+        return self.strategies.get(label.lower(), self.strategy)
+
+    def replacement(self, label: str, original: str) -> str:
+        strategy = self.strategy_for(label)
+        if strategy == "mask":
+            return "".join(c if c.isspace() else self.mask_char for c in original)
+        if strategy == "token":
+            return self.token if self.token is not None else label_token(label)
+        name = label_name(label)
+        key = (name, " ".join(original.lower().split()))
+        pseudonym = self._pseudonyms.get(key)
+        if pseudonym is None:
+            self._counts[name] = self._counts.get(name, 0) + 1
+            pseudonym = self._pseudonyms[key] = f"[{name}_{self._counts[name]}]"
+        return pseudonym
+
+    def redact(self, text: str, entities: Sequence[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+        """Redacted text and the spans that were replaced (original offsets plus replacement)"""
+        parts = []
+        replaced = []
+        cursor = 0
+        for start, end, entity in resolve_overlaps(entities, len(text)):
+            replacement = self.replacement(entity["label"], text[start:end])
+            parts.append(text[cursor:start])
+            parts.append(replacement)
+            replaced.append({
+                "label": entity["label"],
+                "start": start,
+                "end": end,
+                "score": entity.get("score", 0.0),
+                "replacement": replacement
+            })
+            cursor = end
+        parts.append(text[cursor:])
+        return "".join(parts), replaced
+
+
+def redact_text(text: str, entities: Sequence[Dict[str, Any]]) -> str:
+    """Replace every entity span with its label token"""
+    return Redactor().redact(text, entities)[0]
@@ -0,0 +1,246 @@
+"""
+Content-addressed result cache for PII extraction
+In-memory LRU with TTL and a byte budget, plus an optional SQLite tier that survives restarts
+Disk writes are queued to a writer thread that commits them in batches, so callers never wait on SQLite
+"""
+import hashlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from label_sets import canonical_labels
+
+logger = logging.getLogger(__name__)
+
+Entities = List[Dict[str, Any]]
+
+
+def _copy(entities: Entities) -> Entities:
+    """Entity dicts are flat, so copying each one isolates the cache from its callers"""
+    return [dict(e) for e in entities]
+
+
+# Most disk writes committed in one transaction
+WRITE_BATCH_SIZE = 256
+
+
+class ResultCache:
+    """Caches model predictions keyed on a hash of everything that affects them"""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 3600,
+        disk_path: Optional[str] = None,
+        max_disk_entries: int = 1000000
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds or None
+        self.disk_path = disk_path or None
+        self.max_disk_entries = max_disk_entries
+
+        # key -> (created_at, size_bytes, entities), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, int, Entities]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Guards the SQLite connection, which the writer thread and disk readers share
+        self._db_lock = threading.Lock()
+        self._disk_writes = 0
+        self._writes: "queue.Queue[Optional[Tuple[str, float, str]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if self.disk_path:
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, created REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            self._db.commit()
+            self._writer = threading.Thread(target=self._write_loop, name="result-cache-writer", daemon=True)
+            self._writer.start()
+            logger.info(f"Result cache disk tier at {self.disk_path}")
+
+    @staticmethod
+    def make_key(text: str, labels: Sequence[str], threshold: float, flat_ner: bool, model_id: str) -> str:
+        """Hash of (text, canonical labels, threshold, flat_ner, model id)
+
+        Labels keep their order, since it is part of the prompt the model sees; only
+        blanks and duplicates are dropped.
+        """
+        params = json.dumps(
+            [model_id, list(canonical_labels(labels)), float(threshold), bool(flat_ner)], ensure_ascii=False
+        )
+        digest = hashlib.sha256(params.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8", errors="surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, key: str, memory_only: bool = False) -> Optional[Entities]:
+        """Cached entities for `key`, or None
+
+        The disk tier blocks on SQLite, so async callers should look up with memory_only=True
+        first and only fall back to a full lookup in a worker thread; a memory_only miss is not
+        counted, since the full lookup that follows counts it.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry[0], now):
+                    self._remove(key)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _copy(entry[2])
+            if memory_only:
+                return None
+
+        entities = self._disk_get(key, now)
+        with self._lock:
+            if entities is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, now, entities)
+        return _copy(entities)
+
+    def put(self, key: str, entities: Entities):
+        now = time.time()
+        with self._lock:
+            self._store(key, now, _copy(entities))
+        self._disk_put(key, now, entities)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._db is not None:
+            # Writes queued before the clear must not bring entries back
+            self.flush()
+            with self._db_lock:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def flush(self):
+        """Wait until every queued disk write is committed"""
+        if self._writer is not None:
+            self._writes.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "disk_path": self.disk_path
+            }
+
+    def close(self):
+        """Commit queued disk writes, then close the disk tier"""
+        if self._writer is not None:
+            self._writes.put(None)
+            self._writer.join()
+            self._writer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def _store(self, key: str, created: float, entities: Entities):
+        """Insert into the memory tier; caller holds the lock"""
+        # Rough footprint: key, entity strings and a fixed per-entity overhead
+        size = len(key) + sum(64 + len(e.get("text", "")) + len(e.get("label", "")) for e in entities)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (created, size, entities)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _disk_get(self, key: str, now: float) -> Optional[Entities]:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute("SELECT created, value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None or self._expired(row[0], now):
+            return None
+        return json.loads(row[1])
+
+    def _disk_put(self, key: str, created: float, entities: Entities):
+        if self._writer is None:
+            return
+        self._writes.put((key, created, json.dumps(entities, ensure_ascii=False)))
+
+    def _write_loop(self):
+        """Writer thread: commit whatever has queued up since the last batch in one transaction"""
+        while True:
+            batch = [self._writes.get()]
+            while batch[-1] is not None and len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not None]
+            try:
+                if rows:
+                    self._write_rows(rows)
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache disk write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+            if batch[-1] is None:
+                return
+
+    def _write_rows(self, rows: List[Tuple[str, float, str]]):
+        with self._db_lock:
+            self._db.executemany("INSERT OR REPLACE INTO results (key, created, value) VALUES (?, ?, ?)", rows)
+            # Prune occasionally rather than on every write
+            previous = self._disk_writes
+            self._disk_writes += len(rows)
+            if self._disk_writes // 1000 != previous // 1000:
+                self._prune_disk(rows[-1][1])
+            self._db.commit()
+
+    def _prune_disk(self, now: float):
+        if self.ttl_seconds is not None:
+            self._db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,))
+        count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_disk_entries:
+            self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY created ASC LIMIT ?)",
+                (count - self.max_disk_entries,)
+            )
@@ -0,0 +1,206 @@
+"""
+Incremental text segmentation for streaming extraction
+Turns chunked plain-text or NDJSON request bodies into bounded text segments
+"""
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from chunking import Candidate, merge_candidates
+
+# Preferred cut points, strongest first: blank line, line break, sentence end, any whitespace
+BOUNDARY_PATTERNS = [
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"[.!?;]\s"),
+    re.compile(r"\s"),
+]
+
+WHITESPACE = re.compile(r"\s+")
+
+# (absolute character offset, segment text)
+Segment = Tuple[int, str]
+
+
+class TextSegmenter:
+    """Cuts an incoming character stream into segments at natural boundaries
+
+    Only the unfinished tail is buffered, so memory stays bounded by
+    `max_segment_chars` regardless of how large the input is. With
+    `overlap_chars`, each segment repeats up to that many characters (whole
+    words where possible) from the end of the previous one, so an entity cut
+    by a segment boundary appears whole in the next segment.
+    """
+
+    def __init__(self, segment_chars: int = 2000, max_segment_chars: Optional[int] = None, overlap_chars: int = 0):
+        if segment_chars < 1:
+            raise ValueError("segment_chars must be at least 1")
+        self.segment_chars = segment_chars
+        self.max_segment_chars = max(max_segment_chars or 2 * segment_chars, segment_chars)
+        # Cuts are never before segment_chars // 2, so this keeps every segment advancing
+        self.overlap_chars = max(0, min(overlap_chars, segment_chars // 4))
+        self._buffer = ""
+        self._offset = 0
+        # Absolute end of the last emitted segment
+        self._emitted = 0
+
+    def feed(self, text: str) -> List[Segment]:
+        """Add text and return every segment that is ready"""
+        self._buffer += text
+        segments = []
+        while len(self._buffer) >= self.segment_chars:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            segments.append(self._emit(cut))
+        return segments
+
+    def flush(self) -> List[Segment]:
+        """Return whatever is left once the input is exhausted"""
+        if self._offset + len(self._buffer) <= self._emitted:
+            return []
+        return [self._emit(len(self._buffer))]
+
+    def _find_cut(self) -> Optional[int]:
+        window = self._buffer[:self.max_segment_chars]
+        for pattern in BOUNDARY_PATTERNS:
+            cut = None
+            for match in pattern.finditer(window, self.segment_chars // 2):
+                cut = match.end()
+            if cut is not None:
+                return cut
+        if len(self._buffer) >= self.max_segment_chars:
+            # No boundary at all (e.g. a base64 blob): hard cut
+            return self.max_segment_chars
+        return None
+
+    def _emit(self, cut: int) -> Segment:
+        segment = (self._offset, self._buffer[:cut])
+        self._emitted = self._offset + cut
+        keep = self._overlap_start(cut)
+        self._buffer = self._buffer[keep:]
+        self._offset += keep
+        return segment
+
+    def _overlap_start(self, cut: int) -> int:
+        """Where the next segment starts: the first word start within `overlap_chars` of the cut"""
+        if not self.overlap_chars:
+            return cut
+        start = cut - self.overlap_chars
+        space = WHITESPACE.search(self._buffer, start, cut)
+        return space.end() if space is not None and space.end() < cut else start
+
+
+async def iter_plain_text(chunks: AsyncIterator[bytes], encoding: str = "utf-8") -> AsyncIterator[str]:
+    """Decode a byte stream incrementally, never splitting multi-byte characters"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_ndjson_text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Yield the `text` of each NDJSON record; records are pieces of one document
+
+    Each line is either a JSON object with a `text` field or a bare JSON string.
+    """
+    pending = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        # Only the new bytes can hold a newline; earlier ones were scanned already
+        line_start = 0
+        pending += chunk
+        newline = pending.find(b"\n", len(pending) - len(chunk))
+        while newline != -1:
+            line_number += 1
+            text = _parse_ndjson_line(bytes(pending[line_start:newline]), line_number)
+            if text:
+                yield text
+            line_start = newline + 1
+            newline = pending.find(b"\n", line_start)
+        if line_start:
+            del pending[:line_start]
+    if pending.strip():
+        text = _parse_ndjson_line(bytes(pending), line_number + 1)
+        if text:
+            yield text
+
+
+def _parse_ndjson_line(line: bytes, line_number: int) -> str:
+    line = line.strip()
+    if not line:
+        return ""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+    if isinstance(record, str):
+        return record
+    if isinstance(record, dict) and isinstance(record.get("text"), str):
+        return record["text"]
+    raise ValueError(f"Line {line_number} must be a JSON string or an object with a 'text' field")
+
+
+async def iter_segments(
+    chunks: AsyncIterator[bytes],
+    segmenter: TextSegmenter,
+    ndjson: bool = False
+) -> AsyncIterator[Segment]:
+    """Stream segments with absolute offsets out of a chunked request body"""
+    texts = iter_ndjson_text(chunks) if ndjson else iter_plain_text(chunks)
+    async for text in texts:
+        for segment in segmenter.feed(text):
+            yield segment
+    for segment in segmenter.flush():
+        yield segment
+
+
+class SegmentStitcher:
+    """Merges entities from overlapping stream segments and releases them in order
+
+    Entities that reach into the tail a following segment may overlap are held
+    back until that segment's entities arrive, then resolved with the same rules
+    as long-document chunking (`chunking.merge_candidates`). Everything else is
+    final and returned right away with offsets into the whole input.
+    """
+
+    def __init__(self, overlap_chars: int = 0, flat_ner: bool = True):
+        self.overlap_chars = overlap_chars
+        self.flat_ner = flat_ner
+        self._held: List[Candidate] = []
+
+    def add(self, offset: int, segment: str, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Entities of the segment at `offset` (in segment offsets); returns the ones now final"""
+        candidates = list(self._held)
+        # Segments are cut at whitespace, so an entity touching the first or last word may continue past it
+        first_word = len(segment) - len(segment.lstrip())
+        last_word_end = len(segment.rstrip())
+        for entity in entities:
+            clipped = (offset > 0 and entity["start"] <= first_word) or entity["end"] >= last_word_end
+            candidates.append((clipped, offset + entity["start"], offset + entity["end"], entity))
+        if not self.overlap_chars:
+            self._held = []
+            return [_absolute(c) for c in sorted(candidates, key=lambda c: (c[1], c[2]))]
+
+        merged = merge_candidates(candidates, flat_ner=self.flat_ner)
+        # The next segment starts no earlier than this
+        tail = offset + len(segment) - self.overlap_chars
+        self._held = [c for c in merged if c[2] > tail]
+        return [_absolute(c) for c in merged if c[2] <= tail]
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Entities still held once the input is exhausted"""
+        held, self._held = self._held, []
+        return [_absolute(c) for c in held]
+
+
+def _absolute(candidate: Candidate) -> Dict[str, Any]:
+    _, start, end, entity = candidate
+    merged = dict(entity)
+    merged.update(start=start, end=end)
+    return merged
@@ -4,10 +4,20 @@ Streamlit App for testing GLiNER PII/PHI Extraction Service
 import streamlit as st
 import requests
 import json
-from typing import List, Optional
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+
+from bulk_client import annotated_jsonl, extract_bulk, parse_upload, redacted_jsonl
+from highlighting import highlight_entities
 
 # Configuration
 DEFAULT_API_URL = "http://localhost:8000"
+HEALTH_TTL_SECONDS = 5
+HTTP_POOL_SIZE = 16
+# Successful extractions remembered per browser session
+EXTRACTION_CACHE_SIZE = 32
 
 # Supported PII/PHI entity types
 SUPPORTED_ENTITIES = [
@@ -77,10 +87,21 @@ CPF: 123.456.789-00"""
 }
 
 
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """Keep-alive HTTP session shared by every rerun and browser session."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=HEALTH_TTL_SECONDS, show_spinner=False)
 def check_service_health(api_url: str) -> dict:
-    """Check if the GLiNER service is running and healthy."""
+    """Check if the GLiNER service is running and healthy (cached for a few seconds)."""
     try:
-        response = requests.get(f"{api_url}/health", timeout=5)
+        response = get_http_session().get(f"{api_url}/health", timeout=5)
         return response.json()
     except requests.exceptions.ConnectionError:
         return {"status": "unreachable", "model_loaded": False}
@@ -99,7 +120,7 @@ def extract_entities(api_url: str, text: str, entities: Optional[List[str]], thr
         if entities:
             payload["entities"] = entities
             
-        response = requests.post(f"{api_url}/extract", json=payload, timeout=30)
+        response = get_http_session().post(f"{api_url}/extract", json=payload, timeout=30)
         response.raise_for_status()
         return {"success": True, "data": response.json()}
     except requests.exceptions.ConnectionError:
@@ -110,53 +131,105 @@ def extract_entities(api_url: str, text: str, entities: Optional[List[str]], thr
         return {"success": False, "error": str(e)}
 
 
-def highlight_entities(text: str, entities: list) -> str:
-    """Create highlighted text with entity annotations."""
-    if not entities:
-        return text
+ExtractionKey = Tuple[str, str, Optional[Tuple[str, ...]], float]
+
+
+def extraction_key(api_url: str, text: str, entities: Optional[List[str]], threshold: float) -> ExtractionKey:
+    return (api_url, text, tuple(entities) if entities else None, threshold)
+
+
+def cached_extraction(key: ExtractionKey) -> Optional[dict]:
+    """Result already extracted in this browser session for `key`, if any."""
+    return st.session_state.get("extractions", {}).get(key)
+
+
+def get_extraction(api_url: str, text: str, entities: Optional[List[str]], threshold: float) -> dict:
+    """Extract once per unique (text, labels, threshold); later reruns reuse the session result."""
+    cache = st.session_state.setdefault("extractions", OrderedDict())
+    key = extraction_key(api_url, text, entities, threshold)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
     
-    # Sort entities by start position in reverse order
-    sorted_entities = sorted(entities, key=lambda x: x["start"], reverse=True)
+    result = extract_entities(api_url, text, entities, threshold)
+    if result["success"]:
+        cache[key] = result
+        while len(cache) > EXTRACTION_CACHE_SIZE:
+            cache.popitem(last=False)
+    return result
+
+
+def render_bulk(api_url: str, health: dict, entities: Optional[List[str]], threshold: float):
+    """Bulk mode: upload a file, extract through /extract/batch and download the results."""
+    st.header("📁 Bulk Extraction")
+    uploaded = st.file_uploader(
+        "Upload a CSV, JSONL or text file (one document per row or line)",
+        type=["csv", "jsonl", "ndjson", "txt"]
+    )
     
-    # Color mapping for different entity types
-    colors = {
-        "person": "#FF6B6B",
-        "organization": "#4ECDC4",
-        "phone number": "#45B7D1",
-        "mobile phone number": "#45B7D1",
-        "address": "#96CEB4",
-        "email": "#FFEAA7",
-        "email address": "#FFEAA7",
-        "credit card number": "#DDA0DD",
-        "social security number": "#FF7F50",
-        "date of birth": "#98D8C8",
-        "medication": "#F7DC6F",
-        "medical condition": "#BB8FCE",
-        "passport number": "#85C1E9",
-        "driver's license number": "#F8B500",
-        "bank account number": "#82E0AA",
-        "health insurance id number": "#F1948A",
-        "tax identification number": "#AED6F1",
-        "medical record number": "#FAD7A0",
-        "iban": "#D7BDE2",
-        "ip address": "#A9DFBF",
-        "national id number": "#F5B7B1",
-        "identity card number": "#D5DBDB",
-        "cpf": "#ABEBC6",
-    }
+    settings_cols = st.columns(2)
+    with settings_cols[0]:
+        batch_size = st.number_input("Documents per request", min_value=1, max_value=1000, value=32, step=8)
+    with settings_cols[1]:
+        concurrency = st.number_input("Concurrent requests", min_value=1, max_value=HTTP_POOL_SIZE, value=4)
     
-    highlighted = text
-    for entity in sorted_entities:
-        start = entity["start"]
-        end = entity["end"]
-        label = entity["label"]
-        score = entity["score"]
-        color = colors.get(label.lower(), "#E8E8E8")
-        
-        entity_html = f'<mark style="background-color: {color}; padding: 2px 4px; border-radius: 3px;" title="{label}: {score:.2f}">{text[start:end]}</mark>'
-        highlighted = highlighted[:start] + entity_html + highlighted[end:]
+    if uploaded is None:
+        return
+    try:
+        documents = parse_upload(uploaded.name, uploaded.getvalue())
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.write(f"**{len(documents)}** documents, **{sum(len(d.text) for d in documents):,}** characters")
+    
+    if st.button("🚀 Run Bulk Extraction", type="primary", disabled=not documents):
+        if health["status"] != "healthy":
+            st.error("Cannot extract entities. Please ensure the API service is running.")
+            return
+        progress = st.progress(0.0, text="Extracting entities...")
+        result = extract_bulk(
+            get_http_session(),
+            api_url,
+            documents,
+            entities,
+            threshold,
+            batch_size=int(batch_size),
+            concurrency=int(concurrency),
+            on_progress=lambda done, total: progress.progress(done / total, text=f"{done}/{total} documents")
+        )
+        st.session_state["bulk_result"] = (uploaded.name, result)
+    
+    if st.session_state.get("bulk_result", (None,))[0] != uploaded.name:
+        return
+    result = st.session_state["bulk_result"][1]
     
-    return highlighted
+    # Throughput of the configured API, measured end to end from this client
+    metric_cols = st.columns(4)
+    with metric_cols[0]:
+        st.metric("Docs/s", f"{result.docs_per_second:,.1f}")
+    with metric_cols[1]:
+        st.metric("Chars/s", f"{result.chars_per_second:,.0f}")
+    with metric_cols[2]:
+        st.metric("Elapsed", f"{result.seconds:.2f}s")
+    with metric_cols[3]:
+        st.metric("Failed Docs", result.error_count)
+    
+    stem = uploaded.name.rsplit(".", 1)[0]
+    download_cols = st.columns(2)
+    with download_cols[0]:
+        st.download_button(
+            "⬇️ Annotated JSONL",
+            annotated_jsonl(result),
+            file_name=f"{stem}.annotated.jsonl",
+            mime="application/jsonl"
+        )
+    with download_cols[1]:
+        st.download_button(
+            "⬇️ Redacted JSONL",
+            redacted_jsonl(result),
+            file_name=f"{stem}.redacted.jsonl",
+            mime="application/jsonl"
+        )
 
 
 def main():
@@ -206,6 +279,13 @@ def main():
             default=["person", "email", "phone number", "address", "organization"]
         )
     
+    request_entities = selected_entities if not select_all else None
+    
+    mode = st.sidebar.radio("Mode", ["Single text", "Bulk file"], horizontal=True)
+    if mode == "Bulk file":
+        render_bulk(api_url, health, request_entities, threshold)
+        return
+    
     # Main content area
     col1, col2 = st.columns([1, 1])
     
@@ -232,6 +312,8 @@ def main():
         
         extract_button = st.button("🔍 Extract Entities", type="primary", use_container_width=True)
     
+    result = None
+    
     with col2:
         st.header("📊 Results")
         
@@ -242,98 +324,95 @@ def main():
                 st.error("Cannot extract entities. Please ensure the API service is running.")
             else:
                 with st.spinner("Extracting entities..."):
-                    result = extract_entities(
-                        api_url, 
-                        input_text, 
-                        selected_entities if not select_all else None,
-                        threshold
-                    )
+                    result = get_extraction(api_url, input_text, request_entities, threshold)
+        elif input_text.strip():
+            # Keep showing the last extraction for unchanged inputs across widget reruns
+            result = cached_extraction(extraction_key(api_url, input_text, request_entities, threshold))
+        
+        if result is not None:
+            if result["success"]:
+                data = result["data"]
+                entities = data["entities"]
                 
-                if result["success"]:
-                    data = result["data"]
-                    entities = data["entities"]
-                    
-                    # Summary metrics
-                    metric_cols = st.columns(3)
-                    with metric_cols[0]:
-                        st.metric("Total Entities", data["entity_count"])
-                    with metric_cols[1]:
-                        st.metric("Unique Types", len(data["entity_types"]))
-                    with metric_cols[2]:
-                        if entities:
-                            avg_score = sum(e["score"] for e in entities) / len(entities)
-                            st.metric("Avg Confidence", f"{avg_score:.2%}")
-                        else:
-                            st.metric("Avg Confidence", "N/A")
-                    
-                    # Entity type breakdown
-                    if data["entity_types"]:
-                        st.subheader("Entity Types Found")
-                        for entity_type, count in sorted(data["entity_types"].items()):
-                            st.write(f"- **{entity_type}**: {count}")
-                    
-                    # Detailed entity list
+                # Summary metrics
+                metric_cols = st.columns(3)
+                with metric_cols[0]:
+                    st.metric("Total Entities", data["entity_count"])
+                with metric_cols[1]:
+                    st.metric("Unique Types", len(data["entity_types"]))
+                with metric_cols[2]:
                     if entities:
-                        st.subheader("Detected Entities")
-                        for i, entity in enumerate(entities, 1):
-                            with st.expander(f"{i}. {entity['text']} ({entity['label']})"):
-                                st.write(f"**Label:** {entity['label']}")
-                                st.write(f"**Text:** `{entity['text']}`")
-                                st.write(f"**Position:** {entity['start']} - {entity['end']}")
-                                st.progress(entity['score'], text=f"Confidence: {entity['score']:.2%}")
+                        avg_score = sum(e["score"] for e in entities) / len(entities)
+                        st.metric("Avg Confidence", f"{avg_score:.2%}")
                     else:
-                        st.info("No entities found with the current threshold.")
+                        st.metric("Avg Confidence", "N/A")
+                
+                # Entity type breakdown
+                if data["entity_types"]:
+                    st.subheader("Entity Types Found")
+                    for entity_type, count in sorted(data["entity_types"].items()):
+                        st.write(f"- **{entity_type}**: {count}")
+                
+                # Detailed entity list: one table, however many entities were found
+                if entities:
+                    st.subheader("Detected Entities")
+                    st.dataframe(
+                        {
+                            "#": list(range(1, len(entities) + 1)),
+                            "Text": [e["text"] for e in entities],
+                            "Label": [e["label"] for e in entities],
+                            "Start": [e["start"] for e in entities],
+                            "End": [e["end"] for e in entities],
+                            "Confidence": [e["score"] for e in entities],
+                        },
+                        column_config={
+                            "Confidence": st.column_config.ProgressColumn(
+                                "Confidence", format="%.2f", min_value=0.0, max_value=1.0
+                            )
+                        },
+                        hide_index=True,
+                        use_container_width=True
+                    )
                 else:
-                    st.error(result["error"])
+                    st.info("No entities found with the current threshold.")
+            else:
+                st.error(result["error"])
+    
+    if result is None or not result["success"]:
+        return
     
     # Highlighted text section (full width)
-    if extract_button and input_text.strip() and health["status"] == "healthy":
-        result = extract_entities(
-            api_url, 
-            input_text, 
-            selected_entities if not select_all else None,
-            threshold
+    if result["data"]["entities"]:
+        st.header("🎨 Highlighted Text")
+        highlighted_html = highlight_entities(input_text, result["data"]["entities"])
+        st.markdown(
+            f'<div style="background-color: #f0f2f6; padding: 20px; border-radius: 10px; line-height: 1.8;">{highlighted_html}</div>',
+            unsafe_allow_html=True
         )
-        if result["success"] and result["data"]["entities"]:
-            st.header("🎨 Highlighted Text")
-            highlighted_html = highlight_entities(input_text, result["data"]["entities"])
-            st.markdown(
-                f'<div style="background-color: #f0f2f6; padding: 20px; border-radius: 10px; line-height: 1.8;">{highlighted_html}</div>',
-                unsafe_allow_html=True
-            )
-            
-            # Legend
-            st.subheader("Legend")
-            legend_cols = st.columns(4)
-            legend_items = [
-                ("Person", "#FF6B6B"),
-                ("Organization", "#4ECDC4"),
-                ("Phone", "#45B7D1"),
-                ("Address", "#96CEB4"),
-                ("Email", "#FFEAA7"),
-                ("Credit Card", "#DDA0DD"),
-                ("SSN", "#FF7F50"),
-                ("DOB", "#98D8C8"),
-            ]
-            for i, (name, color) in enumerate(legend_items):
-                with legend_cols[i % 4]:
-                    st.markdown(
-                        f'<span style="background-color: {color}; padding: 2px 8px; border-radius: 3px;">{name}</span>',
-                        unsafe_allow_html=True
-                    )
+        
+        # Legend
+        st.subheader("Legend")
+        legend_cols = st.columns(4)
+        legend_items = [
+            ("Person", "#FF6B6B"),
+            ("Organization", "#4ECDC4"),
+            ("Phone", "#45B7D1"),
+            ("Address", "#96CEB4"),
+            ("Email", "#FFEAA7"),
+            ("Credit Card", "#DDA0DD"),
+            ("SSN", "#FF7F50"),
+            ("DOB", "#98D8C8"),
+        ]
+        for i, (name, color) in enumerate(legend_items):
+            with legend_cols[i % 4]:
+                st.markdown(
+                    f'<span style="background-color: {color}; padding: 2px 8px; border-radius: 3px;">{name}</span>',
+                    unsafe_allow_html=True
+                )
     
     # JSON output section
-    if extract_button and input_text.strip() and health["status"] == "healthy":
-        result = extract_entities(
-            api_url, 
-            input_text, 
-            selected_entities if not select_all else None,
-            threshold
-        )
-        if result["success"]:
-            with st.expander("📋 Raw JSON Response"):
-                st.json(result["data"])
-
+    with st.expander("📋 Raw JSON Response"):
+        st.json(result["data"])
 
 if __name__ == "__main__":
     main()
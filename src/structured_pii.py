@@ -0,0 +1,210 @@
+"""
+Pattern and checksum detection for structured identifiers
+Emails, IP addresses, IBANs (mod-97), credit card numbers (Luhn), US social security
+numbers and Brazilian CPFs (check digits) are found with compiled regexes before the
+model runs, so requests for only these labels never need a forward pass
+"""
+import bisect
+import ipaddress
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Validated pattern hits are reported with full confidence
+PATTERN_SCORE = 1.0
+
+EMAIL_PATTERN = re.compile(
+    r"(?<![\w.%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}(?![\w-])"
+)
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+IPV4_PATTERN = re.compile(rf"(?<![\d.]){_OCTET}(?:\.{_OCTET}){{3}}(?!\d|\.\d)")
+IPV6_PATTERN = re.compile(r"(?<![\w:])(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4}(?![\w:])")
+IBAN_PATTERN = re.compile(r"\b[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,4})?\b")
+CARD_PATTERN = re.compile(r"(?<![\d-])[2-6]\d(?:[ -]?\d){11,17}(?!\d|-\d)")
+SSN_PATTERN = re.compile(r"(?<![\d-])(?!000|666|9\d\d)\d{3}([- ])(?!00)\d{2}\1(?!0000)\d{4}(?![\d-])")
+# Bare 11-digit runs look like phone and account numbers, so an unpunctuated CPF needs a "CPF" label in front
+CPF_PATTERN = re.compile(r"(?<![\d.-])\d{3}\.\d{3}\.\d{3}-\d{2}(?![\d-]|\.\d)")
+CPF_LABELED_PATTERN = re.compile(r"\bCPF\b[\s:#.-]{0,3}(?P<value>\d{11})(?![\d-]|\.\d)", re.IGNORECASE)
+
+
+def _digits(value: str) -> str:
+    return "".join(c for c in value if c.isdigit())
+
+
+def luhn_valid(number: str) -> bool:
+    digits = _digits(number)
+    if not 13 <= len(digits) <= 19 or len(set(digits)) == 1:
+        return False
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        n = int(d)
+        if i % 2 == 1:
+            n = n * 2 - 9 if n > 4 else n * 2
+        total += n
+    return total % 10 == 0
+
+
+def iban_valid(iban: str) -> bool:
+    compact = iban.replace(" ", "").upper()
+    if not 15 <= len(compact) <= 34:
+        return False
+    # Move the country code and check digits to the end, map letters to 10..35, then mod 97
+    rearranged = compact[4:] + compact[:4]
+    return int("".join(str(int(c, 36)) for c in rearranged)) % 97 == 1
+
+
+def cpf_valid(cpf: str) -> bool:
+    digits = [int(d) for d in _digits(cpf)]
+    if len(digits) != 11 or len(set(digits)) == 1:
+        return False
+    for length in (9, 10):
+        total = sum(d * weight for d, weight in zip(digits[:length], range(length + 1, 1, -1)))
+        if (total * 10 % 11) % 10 != digits[length]:
+            return False
+    return True
+
+
+def ipv6_valid(address: str) -> bool:
+    try:
+        ipaddress.IPv6Address(address)
+    except ValueError:
+        return False
+    return any(c.isalnum() for c in address)
+
+
+Detector = Tuple[Tuple[re.Pattern, ...], Optional[Callable[[str], bool]]]
+
+DETECTORS: Dict[str, Detector] = {
+    "email": ((EMAIL_PATTERN,), None),
+    "ip_address": ((IPV4_PATTERN, IPV6_PATTERN), lambda match: ":" not in match or ipv6_valid(match)),
+    "iban": ((IBAN_PATTERN,), iban_valid),
+    "credit_card_number": ((CARD_PATTERN,), luhn_valid),
+    "social_security_number": ((SSN_PATTERN,), None),
+    "cpf": ((CPF_PATTERN, CPF_LABELED_PATTERN), cpf_valid),
+}
+
+# Label spellings (after normalize_label) that map onto a detector
+LABEL_ALIASES = {
+    "email": "email",
+    "email_address": "email",
+    "ip_address": "ip_address",
+    "ip": "ip_address",
+    "iban": "iban",
+    "credit_card_number": "credit_card_number",
+    "credit_card": "credit_card_number",
+    "social_security_number": "social_security_number",
+    "ssn": "social_security_number",
+    "cpf": "cpf",
+}
+
+
+def normalize_label(label: str) -> str:
+    """"Email Address", "email-address" and "email_address" all become "email_address" """
+    return re.sub(r"[\s-]+", "_", label.strip().lower())
+
+
+def is_structured_label(label: str) -> bool:
+    return normalize_label(label) in LABEL_ALIASES
+
+
+def detector_for(label: str) -> Optional[str]:
+    """The detector a label spelling maps onto, or None for labels only the model predicts"""
+    return LABEL_ALIASES.get(normalize_label(label))
+
+
+def detect_structured(text: str, labels: Sequence[str]) -> List[Dict[str, Any]]:
+    """Validated pattern hits for the structured labels among `labels`, in text order
+
+    Entities carry the label as requested (the first one, if several spellings map to
+    the same detector). Only the detectors for requested labels run; hits overlapping
+    an earlier one are dropped.
+    """
+    hits = []
+    seen = set()
+    for label in labels:
+        detector = detector_for(label)
+        if detector is None or detector in seen:
+            continue
+        seen.add(detector)
+        patterns, validate = DETECTORS[detector]
+        for pattern in patterns:
+            # Patterns that also match surrounding context mark the identifier itself as "value"
+            group = "value" if "value" in pattern.groupindex else 0
+            for match in pattern.finditer(text):
+                value = match.group(group)
+                if validate is None or validate(value):
+                    hits.append({
+                        "text": value,
+                        "label": label,
+                        "start": match.start(group),
+                        "end": match.end(group),
+                        "score": PATTERN_SCORE
+                    })
+    hits.sort(key=lambda e: (e["start"], -e["end"]))
+    merged = []
+    for hit in hits:
+        if not merged or hit["start"] >= merged[-1]["end"]:
+            merged.append(hit)
+    return merged
+
+
+def merge_entities(model_entities: Sequence[Dict[str, Any]], pattern_entities: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pattern hits merged with the model entities, in text order, without overlaps
+
+    A model span overlapping a hit for the same kind of identifier is replaced by the
+    validated hit. Model spans with other labels keep their context: one that encloses
+    the hits it overlaps (an address or record number containing a card-like digit run)
+    is kept and those hits are dropped; one that only partly overlaps is trimmed to its
+    longest part outside them.
+    """
+    if not pattern_entities:
+        return list(model_entities)
+    # pattern_entities are sorted and disjoint, so the hits overlapping a span are a contiguous run
+    starts = [e["start"] for e in pattern_entities]
+    ends = [e["end"] for e in pattern_entities]
+    detectors = [detector_for(e["label"]) for e in pattern_entities]
+    dropped = set()
+    kept = []
+    for entity in model_entities:
+        first = bisect.bisect_right(ends, entity["start"])
+        last = bisect.bisect_left(starts, entity["end"])
+        if first >= last:
+            kept.append(entity)
+            continue
+        detector = detector_for(entity["label"])
+        if detector is not None and detector in detectors[first:last]:
+            continue
+        if entity["start"] <= starts[first] and ends[last - 1] <= entity["end"]:
+            kept.append(entity)
+            dropped.update(range(first, last))
+            continue
+        trimmed = _trim(entity, starts[first:last], ends[first:last])
+        if trimmed is not None:
+            kept.append(trimmed)
+    kept.extend(hit for i, hit in enumerate(pattern_entities) if i not in dropped)
+    kept.sort(key=lambda e: (e["start"], e["end"]))
+    return kept
+
+
+def _trim(entity: Dict[str, Any], hit_starts: Sequence[int], hit_ends: Sequence[int]) -> Optional[Dict[str, Any]]:
+    """The longest non-blank part of `entity` outside the given (sorted, disjoint) hits, or None"""
+    text = entity["text"]
+    offset = entity["start"]
+    best = None
+    pieces = []
+    cursor = offset
+    for hit_start, hit_end in zip(hit_starts, hit_ends):
+        pieces.append((cursor, hit_start))
+        cursor = max(cursor, hit_end)
+    pieces.append((cursor, entity["end"]))
+    for piece_start, piece_end in pieces:
+        piece = text[max(0, piece_start - offset):max(0, piece_end - offset)]
+        stripped = piece.strip()
+        if not stripped:
+            continue
+        lead = len(piece) - len(piece.lstrip())
+        candidate = (piece_start + lead, piece_start + lead + len(stripped), stripped)
+        if best is None or len(stripped) > len(best[2]):
+            best = candidate
+    if best is None:
+        return None
+    return {**entity, "start": best[0], "end": best[1], "text": best[2]}
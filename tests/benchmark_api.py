@@ -0,0 +1,355 @@
+"""
+Load-testing and latency benchmark for the PII extraction API
+Drives the FastAPI app in-process or over a real socket with texts drawn from the bundled datasets
+
+Usage:
+    # Offline, stub model, in-process ASGI transport
+    python tests/benchmark_api.py --stub --requests 500 --concurrency 16
+
+    # Real socket (uvicorn started in this process), compare against the stored baseline
+    python tests/benchmark_api.py --stub --mode socket --baseline tests/benchmark_baseline.json
+
+    # Against an already running service
+    python tests/benchmark_api.py --url http://127.0.0.1:8000 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import re
+import resource
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+DEFAULT_DATASETS = [
+    os.path.join(ROOT, "data", name)
+    for name in (
+        "ner_evaluation_dataset.json",
+        "medical_phi_dataset.json",
+        "mixed_language_dataset.json",
+        "travel_pii_dataset.json"
+    )
+]
+
+# Metrics compared against the baseline: (key, higher_is_better)
+REGRESSION_METRICS = (("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("throughput_rps", True))
+
+logger = logging.getLogger("benchmark")
+
+
+class StubModel:
+    """Deterministic stand-in for GLiNER so the benchmark runs without model weights
+
+    Cost is simulated per word and per label so latency still tracks input size;
+    emails, numbers and capitalized word pairs are returned as entities.
+    """
+
+    PATTERNS = (
+        ("email", re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")),
+        ("phone_number", re.compile(r"\+?\d[\d\s().-]{7,}\d")),
+        ("person", re.compile(r"\b[A-Z][a-z]+ [A-Z][a-z]+\b")),
+    )
+
+    def __init__(self, ms_per_100_words: float = 2.0, ms_per_label: float = 0.05, max_len: int = 384):
+        self.ms_per_100_words = ms_per_100_words
+        self.ms_per_label = ms_per_label
+        self.config = type("StubConfig", (), {"max_len": max_len})()
+
+    def prepare_batch(self, texts: List[str]) -> List[str]:
+        return texts
+
+    def run_batch(self, texts: List[str], labels: List[str]) -> List[str]:
+        words = sum(len(text.split()) for text in texts)
+        time.sleep(words / 100 * self.ms_per_100_words / 1000 + len(labels) * self.ms_per_label / 1000)
+        return texts
+
+    def decode_batch(self, texts: List[str], labels: List[str], threshold: float) -> List[List[Dict[str, Any]]]:
+        results = []
+        for text in texts:
+            entities = []
+            for label, pattern in self.PATTERNS:
+                if label in labels:
+                    entities.extend(
+                        {"text": m.group(), "label": label, "start": m.start(), "end": m.end(), "score": 0.9}
+                        for m in pattern.finditer(text)
+                    )
+            results.append(sorted(entities, key=lambda e: e["start"]))
+        return results
+
+    def inference(self, texts, labels, flat_ner=True, threshold=0.5, batch_size=8, **kwargs):
+        texts = self.prepare_batch(list(texts))
+        return self.decode_batch(self.run_batch(texts, list(labels)), list(labels), threshold)
+
+    def predict_entities(self, text, labels, flat_ner=True, threshold=0.5, **kwargs):
+        return self.inference([text], labels, flat_ner=flat_ner, threshold=threshold)[0]
+
+
+def load_texts(paths: Sequence[str]) -> List[str]:
+    texts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            texts.extend(sample["text"] for sample in json.load(f) if sample.get("text"))
+    return texts
+
+
+def build_workload(
+    texts: Sequence[str],
+    labels: Sequence[str],
+    requests: int,
+    concat: Sequence[int],
+    label_set_sizes: Sequence[int],
+    seed: int
+) -> List[Tuple[str, Optional[List[str]]]]:
+    """(text, labels) pairs; each text joins `concat`-many dataset samples to spread lengths"""
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(requests):
+        text = " ".join(rng.choice(texts) for _ in range(rng.choice(concat)))
+        size = rng.choice(label_set_sizes)
+        # 0 means "all supported labels", i.e. the request omits `entities`
+        workload.append((text, sorted(rng.sample(list(labels), min(size, len(labels)))) if size else None))
+    return workload
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 600.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/readyz")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise TimeoutError("Service did not become ready")
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    workload: Sequence[Tuple[str, Optional[List[str]]]],
+    concurrency: int,
+    endpoint: str,
+    batch_items: int,
+    threshold: float
+) -> Dict[str, Any]:
+    """Send the workload with `concurrency` concurrent clients and collect latencies"""
+    if endpoint == "batch":
+        requests = [
+            {"items": [{"id": i, "text": text} for i, (text, _) in enumerate(workload[pos:pos + batch_items])],
+             "threshold": threshold}
+            for pos in range(0, len(workload), batch_items)
+        ]
+        path = "/extract/batch"
+    else:
+        requests = [
+            {"text": text, "entities": labels, "threshold": threshold} if labels else {"text": text, "threshold": threshold}
+            for text, labels in workload
+        ]
+        path = "/extract"
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for body in requests:
+        queue.put_nowait(body)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def worker():
+        while not queue.empty():
+            body = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status != "200":
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    chars = sum(len(text) for text, _ in workload)
+    return {
+        "requests": len(requests),
+        "texts": len(workload),
+        "errors": errors,
+        "duration_s": duration,
+        "throughput_rps": len(requests) / duration if duration else 0.0,
+        "texts_per_s": len(workload) / duration if duration else 0.0,
+        "chars_per_s": chars / duration if duration else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0)
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_benchmark(args: argparse.Namespace, workload) -> Dict[str, Any]:
+    timeout = httpx.Timeout(args.request_timeout)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout) as client:
+            await wait_ready(client)
+            return await drive(client, workload, args.concurrency, args.endpoint, args.batch_items, args.threshold)
+
+    import main_service
+    if args.stub:
+        main_service.load_model = lambda *a, **k: StubModel(args.stub_ms_per_100_words)
+
+    if args.mode == "inprocess":
+        async with main_service.lifespan(main_service.app):
+            transport = httpx.ASGITransport(app=main_service.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+                await wait_ready(client)
+                return await drive(client, workload, args.concurrency, args.endpoint, args.batch_items, args.threshold)
+
+    import uvicorn
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main_service.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout, limits=limits) as client:
+            await wait_ready(client)
+            return await drive(client, workload, args.concurrency, args.endpoint, args.batch_items, args.threshold)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def check_regressions(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Metrics worse than the baseline by more than `tolerance` (a fraction)"""
+    regressions = []
+    for key, higher_is_better in REGRESSION_METRICS:
+        old, new = baseline["results"].get(key), result["results"].get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{key}: {old:.2f} -> {new:.2f} ({change:+.1%})")
+    if result["results"]["errors"] and not baseline["results"].get("errors"):
+        regressions.append(f"errors: {result['results']['errors']}")
+    return regressions
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the PII extraction API")
+    parser.add_argument("--mode", choices=["inprocess", "socket"], default="inprocess")
+    parser.add_argument("--url", default=None, help="Benchmark an already running service instead")
+    parser.add_argument("--stub", action="store_true", help="Use a stub model (no weights, works offline)")
+    parser.add_argument("--stub-ms-per-100-words", type=float, default=2.0)
+    parser.add_argument("--endpoint", choices=["extract", "batch"], default="extract")
+    parser.add_argument("--batch-items", type=int, default=16, help="Texts per /extract/batch request")
+    parser.add_argument("--requests", type=int, default=200, help="Number of texts to send")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--concat", default="1,1,2,4", help="Dataset samples joined per text, drawn uniformly")
+    parser.add_argument("--label-set-sizes", default="0,5,15", help="Labels per request, 0 = all supported labels")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--datasets", nargs="+", default=DEFAULT_DATASETS)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache on (off by default)")
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--write-baseline", action="store_true", help="Store this run as the baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args(argv)
+
+    # The service reads its configuration at import time
+    os.environ.setdefault("GLINER_CACHE_ENABLED", "true" if args.cache else "false")
+    if args.stub:
+        os.environ.setdefault("GLINER_WARMUP_WORDS", "")
+
+    from main_service import SUPPORTED_ENTITIES
+    workload = build_workload(
+        load_texts(args.datasets),
+        SUPPORTED_ENTITIES,
+        args.requests,
+        [int(n) for n in args.concat.split(",")],
+        [int(n) for n in args.label_set_sizes.split(",")],
+        args.seed
+    )
+
+    results = asyncio.run(run_benchmark(args, workload))
+    results["peak_rss_mb"] = peak_rss_mb()
+    report = {
+        "config": {
+            "mode": "url" if args.url else args.mode,
+            "model": "stub" if args.stub else os.getenv("GLINER_MODEL_NAME", "urchade/gliner_multi_pii-v1"),
+            "endpoint": args.endpoint,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "concat": args.concat,
+            "label_set_sizes": args.label_set_sizes,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.write_baseline and args.baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["config"] != report["config"]:
+            print("Baseline was recorded with a different configuration; skipping regression check")
+            return 0
+        regressions = check_regressions(report, baseline, args.tolerance)
+        if regressions:
+            print("Performance regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
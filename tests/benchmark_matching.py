@@ -0,0 +1,203 @@
+"""
+Benchmark for NERDatasetEvaluator.match_entities
+Times the original nested-loop matcher against the vectorized greedy and Hungarian
+modes on the bundled datasets, with predictions simulated from the ground truth
+
+Usage:
+    python tests/benchmark_matching.py
+
+    # Dense documents: every sample's entities repeated 20 times end to end
+    python tests/benchmark_matching.py --density 20 --repeat 3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "evals"))
+
+from evaluation_service import EntityMatch, EvaluationMetrics, NERDatasetEvaluator  # noqa: E402
+
+DEFAULT_DATASETS = [
+    os.path.join(ROOT, "data", name)
+    for name in (
+        "ner_evaluation_dataset.json",
+        "medical_phi_dataset.json",
+        "mixed_language_dataset.json",
+        "travel_pii_dataset.json"
+    )
+]
+
+Case = Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]
+
+
+def legacy_match_entities(
+    evaluator: NERDatasetEvaluator,
+    predicted: List[Dict[str, Any]],
+    ground_truth: List[Dict[str, Any]],
+    overlap_threshold: float = 0.5
+) -> Tuple[List[EntityMatch], EvaluationMetrics]:
+    """The original O(P*G) matcher, kept verbatim as the reference for timing and parity"""
+    metrics = EvaluationMetrics()
+    matches = []
+    gt_matched = set()
+    for pred in predicted:
+        pred_label = evaluator.normalize_label(pred.get("label", ""))
+        pred_start = pred.get("start", 0)
+        pred_end = pred.get("end", 0)
+        best_match, best_overlap, best_gt_idx = None, 0.0, -1
+        for g_idx, gt in enumerate(ground_truth):
+            if g_idx in gt_matched:
+                continue
+            evaluator.normalize_label(gt.get("label", ""))
+            overlap = evaluator.compute_overlap(pred_start, pred_end, gt.get("start", 0), gt.get("end", 0))
+            if overlap > best_overlap:
+                best_overlap, best_match, best_gt_idx = overlap, gt, g_idx
+        match = EntityMatch(
+            predicted_text=pred.get("text", ""),
+            predicted_label=pred_label,
+            predicted_start=pred_start,
+            predicted_end=pred_end,
+            predicted_score=pred.get("score", 0.0)
+        )
+        if best_match and best_overlap >= overlap_threshold:
+            gt_label = evaluator.normalize_label(best_match.get("label", ""))
+            match.ground_truth_text = best_match.get("text", "")
+            match.ground_truth_label = gt_label
+            match.ground_truth_start = best_match.get("start", 0)
+            match.ground_truth_end = best_match.get("end", 0)
+            if best_overlap >= 0.9 and pred_label == gt_label:
+                match.match_type = "exact"
+                metrics.true_positives += 1
+            elif pred_label == gt_label:
+                match.match_type = "partial"
+                metrics.partial_matches += 1
+                metrics.true_positives += 1
+            else:
+                match.match_type = "label_mismatch"
+                metrics.label_mismatches += 1
+                metrics.false_positives += 1
+            gt_matched.add(best_gt_idx)
+        else:
+            match.match_type = "none"
+            metrics.false_positives += 1
+        matches.append(match)
+    for g_idx in range(len(ground_truth)):
+        if g_idx not in gt_matched:
+            metrics.false_negatives += 1
+    return matches, metrics
+
+
+def simulate_predictions(ground_truth: List[Dict[str, Any]], labels: Sequence[str], rng: random.Random):
+    """Jittered, relabelled, dropped and spurious spans derived from the ground truth"""
+    predicted = []
+    for gt in ground_truth:
+        roll = rng.random()
+        if roll < 0.15:
+            continue
+        start = max(0, gt["start"] + rng.randint(-3, 3))
+        end = max(start + 1, gt["end"] + rng.randint(-3, 3))
+        label = rng.choice(labels) if roll > 0.9 else gt["label"]
+        predicted.append({"text": "", "label": label, "start": start, "end": end, "score": rng.random()})
+    for _ in range(rng.randint(0, 2)):
+        start = rng.randint(0, 200)
+        predicted.append({"text": "", "label": rng.choice(labels), "start": start,
+                          "end": start + rng.randint(2, 20), "score": rng.random()})
+    predicted.sort(key=lambda p: p["start"])
+    return predicted
+
+
+def build_cases(path: str, density: int, seed: int) -> List[Case]:
+    with open(path, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    rng = random.Random(seed)
+    labels = sorted({e["label"] for sample in dataset for e in sample.get("entities", [])}) or ["person"]
+    cases = []
+    for sample in dataset:
+        width = len(sample.get("text", "")) + 1
+        ground_truth = [
+            {**e, "start": e["start"] + copy * width, "end": e["end"] + copy * width}
+            for copy in range(density)
+            for e in sample.get("entities", [])
+            if "start" in e and "end" in e
+        ]
+        cases.append((simulate_predictions(ground_truth, labels, rng), ground_truth))
+    return cases
+
+
+def time_matcher(match_fn, cases: Sequence[Case], repeat: int) -> Tuple[float, list]:
+    """Best-of-`repeat` seconds for one pass over `cases`"""
+    best, results = float("inf"), []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [match_fn(predicted, ground_truth) for predicted, ground_truth in cases]
+        best = min(best, time.perf_counter() - started)
+    return best, results
+
+
+def run_benchmark(datasets: Sequence[str], density: int = 1, repeat: int = 5, seed: int = 7) -> Dict[str, Any]:
+    evaluator = NERDatasetEvaluator(model=object())
+    modes = {
+        "legacy": lambda p, g: legacy_match_entities(evaluator, p, g),
+        "greedy": lambda p, g: evaluator.match_entities(p, g, assignment="greedy"),
+        "hungarian": lambda p, g: evaluator.match_entities(p, g, assignment="hungarian")
+    }
+    report = {"density": density, "repeat": repeat, "datasets": {}}
+    for path in datasets:
+        if not os.path.exists(path):
+            continue
+        cases = build_cases(path, density, seed)
+        timings, outputs = {}, {}
+        for mode, match_fn in modes.items():
+            seconds, outputs[mode] = time_matcher(match_fn, cases, repeat)
+            timings[mode] = seconds
+        spans = sum(len(p) + len(g) for p, g in cases)
+        report["datasets"][os.path.basename(path)] = {
+            "samples": len(cases),
+            "spans": spans,
+            "us_per_sample": {mode: seconds / max(1, len(cases)) * 1e6 for mode, seconds in timings.items()},
+            "greedy_speedup": timings["legacy"] / timings["greedy"] if timings["greedy"] else None,
+            "greedy_matches_legacy": outputs["greedy"] == outputs["legacy"],
+            "hungarian_tp_gain": sum(m.true_positives for _, m in outputs["hungarian"])
+            - sum(m.true_positives for _, m in outputs["greedy"])
+        }
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\nmatch_entities benchmark (density {report['density']}, best of {report['repeat']})")
+    print(f"{'Dataset':<30} {'Samples':>8} {'legacy us':>10} {'greedy us':>10} {'hungar. us':>11} "
+          f"{'speedup':>8} {'parity':>7} {'TP gain':>8}")
+    for name, row in report["datasets"].items():
+        us = row["us_per_sample"]
+        print(f"{name:<30} {row['samples']:>8} {us['legacy']:>10.1f} {us['greedy']:>10.1f} {us['hungarian']:>11.1f} "
+              f"{row['greedy_speedup']:>7.2f}x {str(row['greedy_matches_legacy']):>7} {row['hungarian_tp_gain']:>8}")
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark span matching in the NER evaluation")
+    parser.add_argument("--datasets", nargs="+", default=DEFAULT_DATASETS)
+    parser.add_argument("--density", type=int, default=1, help="Copies of each sample's entities per document")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Optional JSON output path")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    report = run_benchmark(args.datasets, args.density, args.repeat, args.seed)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    # Greedy mode must reproduce the original matcher exactly
+    return 0 if all(row["greedy_matches_legacy"] for row in report["datasets"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""
+Shared pytest configuration
+Makes the service and evaluation modules importable from the tests
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for subdir in ("src", "evals"):
+    path = os.path.join(ROOT_DIR, subdir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
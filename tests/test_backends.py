@@ -0,0 +1,100 @@
+"""
+Tests for backend selection and backend parity checks
+"""
+import os
+
+import pytest
+
+from backends import compare_backends, load_model, prepare_shared_weights, quantize_dynamic_int8
+
+
+class FixedModel:
+    """Returns a fixed prediction with a configurable score offset"""
+
+    def __init__(self, score=0.9, extra=False):
+        self.score = score
+        self.extra = extra
+
+    def predict_entities(self, text, labels, threshold=0.5):
+        entities = [{"text": "John", "label": "person", "start": 0, "end": 4, "score": self.score}]
+        if self.extra:
+            entities.append({"text": "Smith", "label": "person", "start": 5, "end": 10, "score": 0.51})
+        return entities
+
+
+class TestCompareBackends:
+    def test_matching_backends_are_within_tolerance(self):
+        report = compare_backends(FixedModel(0.9), FixedModel(0.905), ["John Smith"] * 3, ["person"])
+        assert report["within_tolerance"]
+        assert report["max_score_diff"] == pytest.approx(0.005)
+
+    def test_score_drift_is_reported(self):
+        report = compare_backends(FixedModel(0.9), FixedModel(0.8), ["John Smith"], ["person"])
+        assert not report["within_tolerance"]
+
+    def test_span_differences_are_counted(self):
+        report = compare_backends(FixedModel(), FixedModel(extra=True), ["John Smith"] * 10, ["person"])
+        assert report["extra_spans"] == 10
+        assert report["mismatched_texts"] == 10
+        assert not report["within_tolerance"]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_model("urchade/gliner_multi_pii-v1", backend="tensorrt")
+
+
+def test_unknown_quantization_is_rejected():
+    with pytest.raises(ValueError):
+        load_model("urchade/gliner_multi_pii-v1", quantize="int4")
+
+
+class TestDynamicQuantization:
+    def test_linear_layers_become_int8(self):
+        import torch
+
+        holder = type("Holder", (), {})()
+        holder.model = torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+        reference = holder.model(torch.ones(1, 8))
+
+        quantize_dynamic_int8(holder)
+
+        layer = holder.model[0]
+        assert layer.weight().dtype == torch.qint8
+        assert torch.allclose(holder.model(torch.ones(1, 8)), reference, atol=0.05)
+
+
+class SavingModel:
+    """Writes a placeholder checkpoint like GLiNER.save_pretrained"""
+
+    def __init__(self):
+        self.saves = 0
+
+    def save_pretrained(self, save_directory, safe_serialization=False):
+        self.saves += 1
+        name = "model.safetensors" if safe_serialization else "pytorch_model.bin"
+        with open(os.path.join(save_directory, name), "wb") as f:
+            f.write(b"weights")
+
+
+class TestSharedWeights:
+    def test_writes_safetensors_once(self, tmp_path):
+        model = SavingModel()
+        shared_dir = str(tmp_path / "shared")
+
+        assert prepare_shared_weights("some/model", shared_dir, model=model) == shared_dir
+        assert prepare_shared_weights("some/model", shared_dir, model=model) == shared_dir
+
+        assert model.saves == 1
+        assert os.listdir(shared_dir) == ["model.safetensors"]
+        # No temporary directories are left next to it
+        assert os.listdir(tmp_path) == ["shared"]
+
+    def test_failed_save_leaves_nothing_behind(self, tmp_path):
+        class FailingModel:
+            def save_pretrained(self, save_directory, safe_serialization=False):
+                raise RuntimeError("disk full")
+
+        with pytest.raises(RuntimeError):
+            prepare_shared_weights("some/model", str(tmp_path / "shared"), model=FailingModel())
+        assert os.listdir(tmp_path) == []
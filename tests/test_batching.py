@@ -0,0 +1,100 @@
+"""
+Tests for the micro-batching inference scheduler
+"""
+import asyncio
+
+import pytest
+
+from batching import MicroBatcher
+
+
+class RecordingPredictor:
+    """Fake predict_fn that records every batched call"""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def __call__(self, texts, labels, threshold, flat_ner):
+        self.calls.append((list(texts), tuple(labels), threshold, flat_ner))
+        if self.fail_on and self.fail_on in texts:
+            raise ValueError("boom")
+        return [[{"text": t, "label": labels[0], "start": 0, "end": len(t), "score": threshold}] for t in texts]
+
+
+def run_concurrently(batcher, requests):
+    async def scenario():
+        await batcher.start()
+        try:
+            return await asyncio.gather(
+                *(batcher.submit(*req) for req in requests),
+                return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+    return asyncio.run(scenario())
+
+
+class TestMicroBatcher:
+    """Test request grouping and result slicing"""
+
+    def test_concurrent_requests_share_one_call(self):
+        predictor = RecordingPredictor()
+        batcher = MicroBatcher(predictor, max_batch_size=8, max_wait_ms=20)
+        texts = [f"text {i}" for i in range(5)]
+
+        results = run_concurrently(batcher, [(t, ["person"], 0.5, True) for t in texts])
+
+        assert len(predictor.calls) == 1
+        assert predictor.calls[0][0] == texts
+        assert [r[0]["text"] for r in results] == texts
+
+    def test_batches_respect_max_batch_size(self):
+        predictor = RecordingPredictor()
+        batcher = MicroBatcher(predictor, max_batch_size=2, max_wait_ms=20)
+
+        run_concurrently(batcher, [(f"t{i}", ["person"], 0.5, True) for i in range(5)])
+
+        assert [len(call[0]) for call in predictor.calls] == [2, 2, 1]
+
+    def test_different_parameters_are_not_mixed(self):
+        predictor = RecordingPredictor()
+        batcher = MicroBatcher(predictor, max_batch_size=8, max_wait_ms=20)
+
+        results = run_concurrently(batcher, [
+            ("a", ["person"], 0.5, True),
+            ("b", ["email"], 0.5, True),
+            ("c", ["person"], 0.3, True),
+            ("d", ["person"], 0.5, True),
+        ])
+
+        assert len(predictor.calls) == 3
+        assert sorted(len(call[0]) for call in predictor.calls) == [1, 1, 2]
+        assert results[1][0]["label"] == "email"
+        assert results[2][0]["score"] == 0.3
+
+    def test_failure_propagates_to_callers(self):
+        predictor = RecordingPredictor(fail_on="bad")
+        batcher = MicroBatcher(predictor, max_batch_size=8, max_wait_ms=20)
+
+        results = run_concurrently(batcher, [("bad", ["person"], 0.5, True)])
+
+        assert isinstance(results[0], ValueError)
+
+    def test_failing_text_does_not_fail_neighbours(self):
+        predictor = RecordingPredictor(fail_on="bad")
+        batcher = MicroBatcher(predictor, max_batch_size=8, max_wait_ms=20)
+
+        results = run_concurrently(batcher, [
+            ("good", ["person"], 0.5, True),
+            ("bad", ["person"], 0.5, True),
+            ("fine", ["person"], 0.5, True),
+        ])
+
+        assert results[0][0]["text"] == "good"
+        assert isinstance(results[1], ValueError)
+        assert results[2][0]["text"] == "fine"
+
+    def test_invalid_configuration(self):
+        with pytest.raises(ValueError):
+            MicroBatcher(RecordingPredictor(), max_batch_size=0)
@@ -0,0 +1,57 @@
+"""
+Tests for the API benchmark harness (runs the stub model, no weights needed)
+"""
+import asyncio
+
+from benchmark_api import (
+    StubModel,
+    build_workload,
+    check_regressions,
+    parse_args,
+    percentile,
+    run_benchmark
+)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_workload_is_reproducible():
+    texts = ["alpha beta", "gamma", "delta epsilon zeta"]
+    labels = ["person", "email", "iban"]
+    first = build_workload(texts, labels, 20, [1, 3], [0, 2], seed=3)
+    assert first == build_workload(texts, labels, 20, [1, 3], [0, 2], seed=3)
+    assert all(entity_labels is None or len(entity_labels) == 2 for _, entity_labels in first)
+
+
+def test_regressions_are_flagged_beyond_tolerance():
+    baseline = {"results": {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "throughput_rps": 100.0, "errors": {}}}
+    same = {"results": {"p50_ms": 11.0, "p95_ms": 21.0, "p99_ms": 31.0, "throughput_rps": 95.0, "errors": {}}}
+    slower = {"results": {"p50_ms": 10.0, "p95_ms": 40.0, "p99_ms": 30.0, "throughput_rps": 60.0, "errors": {}}}
+
+    assert check_regressions(same, baseline, tolerance=0.25) == []
+    flagged = check_regressions(slower, baseline, tolerance=0.25)
+    assert [line.split(":")[0] for line in flagged] == ["p95_ms", "throughput_rps"]
+
+
+def test_stub_model_finds_structured_entities():
+    entities = StubModel(ms_per_100_words=0).predict_entities(
+        "Write to John Smith at john@example.com", ["person", "email"]
+    )
+    assert [(e["label"], e["text"]) for e in entities] == [("person", "John Smith"), ("email", "john@example.com")]
+
+
+def test_in_process_run_with_stub_model():
+    args = parse_args(["--stub", "--stub-ms-per-100-words", "0", "--requests", "20", "--concurrency", "4"])
+    workload = build_workload(["Call John Smith on +1 555 010 0199"] * 3, ["person", "phone_number"], 20, [1, 2], [0, 1], 1)
+
+    results = asyncio.run(run_benchmark(args, workload))
+
+    assert results["requests"] == 20
+    assert results["errors"] == {}
+    assert 0 < results["p50_ms"] <= results["p95_ms"] <= results["p99_ms"] <= results["max_ms"]
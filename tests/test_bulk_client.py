@@ -0,0 +1,97 @@
+"""
+Tests for the Streamlit bulk upload client: file parsing, batched concurrent
+/extract/batch calls and the annotated/redacted downloads
+"""
+import json
+import os
+import re
+import threading
+
+import requests
+
+from bulk_client import annotated_jsonl, extract_bulk, parse_upload, redacted_jsonl
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Server Error")
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Answers /extract/batch by tagging email addresses; fails batches containing "boom" """
+
+    def __init__(self):
+        self.payloads = []
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None):
+        assert url.endswith("/extract/batch")
+        with self.lock:
+            self.payloads.append(json)
+        if any("boom" in item["text"] for item in json["items"]):
+            return FakeResponse({"detail": "failed"}, status_code=500)
+        results = []
+        for item in json["items"]:
+            entities = [
+                {"text": m.group(), "label": "email", "start": m.start(), "end": m.end(), "score": 0.9}
+                for m in re.finditer(r"\S+@\S+", item["text"])
+            ]
+            results.append({"id": item["id"], "result": {"entities": entities, "text": item["text"]}})
+        return FakeResponse({"results": results, "item_count": len(results), "error_count": 0})
+
+
+class TestParseUpload:
+    def test_headerless_csv_joins_cells(self):
+        with open(os.path.join(DATA_DIR, "structured_pii_phi.csv"), "rb") as f:
+            data = f.read()
+        documents = parse_upload("structured_pii_phi.csv", data)
+        assert len(documents) == len([line for line in data.decode("utf-8-sig").splitlines() if line.strip()])
+        assert documents[0].text.startswith("John Smith, 123 Main Street")
+
+    def test_csv_text_column(self):
+        documents = parse_upload("notes.csv", b"id,Text\n1,\"Hello, Anna\"\n2,Bye\n")
+        assert [d.text for d in documents] == ["Hello, Anna", "Bye"]
+
+    def test_jsonl_strings_and_objects(self):
+        data = b'"first"\n\n{"id": "x", "content": "second"}\n'
+        documents = parse_upload("docs.jsonl", data)
+        assert [(d.id, d.text) for d in documents] == [(0, "first"), ("x", "second")]
+
+    def test_text_lines(self):
+        assert [d.text for d in parse_upload("docs.txt", b"a\n\nb\n")] == ["a", "b"]
+
+
+class TestExtractBulk:
+    def test_batches_concurrently_and_keeps_order(self):
+        documents = parse_upload("docs.txt", "\n".join(f"mail user{i}@example.com now" for i in range(10)).encode())
+        session = FakeSession()
+        progress = []
+        result = extract_bulk(session, "http://api", documents, ["email"], 0.4, batch_size=3, concurrency=3,
+                              on_progress=lambda done, total: progress.append((done, total)))
+        assert result.requests == 4 and len(session.payloads) == 4
+        assert all(item["entities"] == ["email"] for p in session.payloads for item in p["items"])
+        assert progress[-1] == (10, 10)
+        assert [r["entities"][0]["text"] for r in result.results] == [f"user{i}@example.com" for i in range(10)]
+        assert result.error_count == 0 and result.characters == sum(len(d.text) for d in documents)
+
+    def test_failed_batch_is_reported_per_document(self):
+        documents = parse_upload("docs.txt", b"a@b.c\nboom x@y.z\nq@r.s\n")
+        result = extract_bulk(FakeSession(), "http://api", documents, None, 0.5, batch_size=1, concurrency=2)
+        assert result.error_count == 1 and "500" in result.errors[1]
+
+        redacted = [json.loads(line) for line in redacted_jsonl(result).splitlines()]
+        assert redacted[0] == {"id": 0, "text": "[EMAIL]"}
+        assert redacted[1]["text"] is None and "error" in redacted[1]
+
+        annotated = [json.loads(line) for line in annotated_jsonl(result).splitlines()]
+        assert annotated[2]["entities"][0]["text"] == "q@r.s"
@@ -0,0 +1,122 @@
+"""
+Tests for the append-only prediction checkpoint and resumable evaluation
+"""
+import json
+
+from checkpoint import PredictionCheckpoint, sample_hash
+from evaluation_service import NERDatasetEvaluator
+
+CONFIG = {"model": "test", "threshold": 0.4, "labels": ["person"]}
+
+
+class CountingModel:
+    """Tags capitalized words as persons and counts the texts it is asked about"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_entities(self, text, labels, threshold=0.5, flat_ner=True):
+        self.calls.append(text)
+        return [
+            {"text": word, "label": "person", "start": text.index(word), "end": text.index(word) + len(word),
+             "score": 0.9}
+            for word in text.split() if word.istitle()
+        ]
+
+
+def make_dataset(texts):
+    return [{"text": text, "language": "English", "entities": []} for text in texts]
+
+
+class TestPredictionCheckpoint:
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "checkpoint.jsonl")
+        with PredictionCheckpoint(path, CONFIG) as checkpoint:
+            checkpoint.add("ds", "Hello Anna", [{"label": "person", "start": 6, "end": 10, "score": 0.25}])
+        reloaded = PredictionCheckpoint(path, CONFIG)
+        assert reloaded.get("ds", "Hello Anna") == [{"label": "person", "start": 6, "end": 10, "score": 0.25}]
+        assert reloaded.get("other", "Hello Anna") is None
+
+    def test_predictions_are_read_back_from_the_file(self, tmp_path):
+        path = str(tmp_path / "checkpoint.jsonl")
+        entities = {text: [{"text": text.split()[-1], "label": "person"}] for text in ["Hi Zoë", "Hej Åsa", "Hi Bob"]}
+        with PredictionCheckpoint(path, CONFIG) as checkpoint:
+            for text, predictions in entities.items():
+                checkpoint.add("ds", text, predictions)
+            assert checkpoint.get("ds", "Hej Åsa") == entities["Hej Åsa"]
+        with PredictionCheckpoint(path, CONFIG) as reloaded:
+            assert {text: reloaded.get("ds", text) for text in entities} == entities
+
+    def test_other_config_is_ignored(self, tmp_path):
+        path = str(tmp_path / "checkpoint.jsonl")
+        with PredictionCheckpoint(path, CONFIG) as checkpoint:
+            checkpoint.add("ds", "Hello Anna", [])
+        assert len(PredictionCheckpoint(path, {**CONFIG, "threshold": 0.5})) == 0
+
+    def test_torn_last_line_is_skipped_and_appending_continues(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        with PredictionCheckpoint(str(path), CONFIG) as checkpoint:
+            checkpoint.add("ds", "first", [])
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"dataset": "ds", "sample": "')
+        with PredictionCheckpoint(str(path), CONFIG) as checkpoint:
+            assert len(checkpoint) == 1
+            checkpoint.add("ds", "second", [])
+        reloaded = PredictionCheckpoint(str(path), CONFIG)
+        assert reloaded.get("ds", "second") == []
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert json.loads(lines[-1])["sample"] == sample_hash("second")
+
+
+class TestResumableEvaluation:
+    def test_restart_only_predicts_new_and_edited_samples(self, tmp_path):
+        path = str(tmp_path / "checkpoint.jsonl")
+        texts = ["Hello Anna", "call Bob", "nothing here", "Meet Carla"]
+
+        first = NERDatasetEvaluator(model=CountingModel())
+        with PredictionCheckpoint(path, first.checkpoint_config()) as checkpoint:
+            expected = first.predict_dataset(make_dataset(texts), checkpoint=checkpoint, dataset_key="ds")
+        assert len(first.model.calls) == 4
+
+        edited = texts[:2] + ["something Else"] + texts[3:] + ["New Person"]
+        second = NERDatasetEvaluator(model=CountingModel())
+        with PredictionCheckpoint(path, second.checkpoint_config()) as checkpoint:
+            resumed = second.predict_dataset(make_dataset(edited), batch_size=1, checkpoint=checkpoint,
+                                             dataset_key="ds")
+        assert second.model.calls == ["something Else", "New Person"]
+        assert resumed[:2] == expected[:2] and resumed[3] == expected[3]
+        assert [e["text"] for e in resumed[2]] == ["Else"]
+
+    def test_evaluate_dataset_resumes_from_checkpoint(self, tmp_path):
+        dataset_path = tmp_path / "dataset.json"
+        dataset_path.write_text(json.dumps(make_dataset(["Hello Anna", "call Bob"])))
+        checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+
+        first = NERDatasetEvaluator(model=CountingModel())
+        report = first.evaluate_dataset(str(dataset_path), verbose=False, checkpoint_path=checkpoint_path)
+        second = NERDatasetEvaluator(model=CountingModel())
+        resumed = second.evaluate_dataset(str(dataset_path), verbose=False, checkpoint_path=checkpoint_path)
+        assert second.model.calls == []
+        assert resumed == report
+
+    def test_evaluation_script_resumes_from_checkpoint(self, tmp_path):
+        from evaluation import evaluate_dataset
+
+        path = str(tmp_path / "checkpoint.jsonl")
+        data = make_dataset(["Hello Anna", "call Bob", "Meet Carla"])
+        data[0]["entities"] = [{"text": "Anna", "label": "person"}]
+
+        first = CountingModel()
+        with PredictionCheckpoint(path, CONFIG) as checkpoint:
+            expected = evaluate_dataset(first, data[:2], "ds", checkpoint=checkpoint)
+        assert first.calls == ["Hello Anna", "call Bob"]
+
+        second = CountingModel()
+        with PredictionCheckpoint(path, CONFIG) as checkpoint:
+            collected = []
+            resumed = evaluate_dataset(second, data, "ds", collected, checkpoint=checkpoint)
+            assert len(checkpoint) == 3
+        assert second.calls == ["Meet Carla"]
+        assert resumed["examples"] == 3
+        assert resumed["labels"]["person"]["tp"] == expected["labels"]["person"]["tp"] == 1
+        assert [(p["text"], p["status"]) for p in collected[0]["predictions"]] == [("Hello", "FP"), ("Anna", "TP")]
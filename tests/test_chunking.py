@@ -0,0 +1,104 @@
+"""
+Tests for long-document chunking and cross-chunk entity stitching
+"""
+import re
+
+from chunking import WORD_PATTERN, plan_chunks, stitch_entities
+from inference import batch_predict
+
+
+class RegexModel:
+    """Offline stand-in for GLiNER that finds emails and records each call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def inference(self, texts, labels, flat_ner=True, threshold=0.5, batch_size=8):
+        self.calls.append((list(texts), batch_size))
+        return [
+            [
+                {"text": m.group(), "label": "email", "start": m.start(), "end": m.end(), "score": 0.9}
+                for m in re.finditer(r"[\w.]+@[\w.]+\w", text)
+            ]
+            for text in texts
+        ]
+
+
+class TestPlanChunks:
+    """Test chunk windows"""
+
+    def test_short_text_is_single_chunk(self):
+        chunks = plan_chunks("John Smith lives here.", max_words=50)
+        assert len(chunks) == 1
+        assert chunks[0].start == 0 and chunks[0].text == "John Smith lives here."
+
+    def test_chunks_respect_word_budget_and_overlap(self):
+        text = " ".join(f"word{i}" for i in range(1000))
+        chunks = plan_chunks(text, max_words=100, overlap_words=10)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.word_count <= 100
+            assert text[chunk.start:chunk.end] == chunk.text
+        for prev, nxt in zip(chunks, chunks[1:]):
+            assert nxt.start < prev.end
+        assert chunks[-1].end == len(text)
+
+    def test_chunks_prefer_sentence_ends(self):
+        text = " ".join(f"Sentence number {i} is here." for i in range(100))
+        chunks = plan_chunks(text, max_words=40, overlap_words=5)
+
+        for chunk in chunks[:-1]:
+            assert chunk.text.endswith(".")
+
+
+class TestStitching:
+    """Test merging of overlapping chunk predictions"""
+
+    def test_duplicates_from_overlap_are_merged(self):
+        text = "one two three four mail john@doe.com five six seven eight"
+        chunks = plan_chunks(text, max_words=10, overlap_words=5)
+        start = text.index("john")
+        end = start + len("john@doe.com")
+        per_chunk = [
+            [{"text": "john@doe.com", "label": "email", "start": start - c.start, "end": end - c.start, "score": 0.8}]
+            if c.start <= start and end <= c.end else []
+            for c in chunks
+        ]
+        assert sum(1 for found in per_chunk if found) > 1
+
+        merged = stitch_entities(text, chunks, per_chunk)
+
+        assert len(merged) == 1
+        assert (merged[0]["start"], merged[0]["end"]) == (start, end)
+        assert merged[0]["text"] == "john@doe.com"
+
+    def test_clipped_span_loses_to_whole_span(self):
+        text = "x " * 5 + "Jane Doe"
+        chunks = plan_chunks(text, max_words=6, overlap_words=2)
+        jane = text.index("Jane")
+        first, second = chunks[0], chunks[1]
+        clipped = {"text": "Jane", "label": "person", "start": jane - first.start, "end": first.end - first.start, "score": 0.95}
+        whole = {"text": "Jane Doe", "label": "person", "start": jane - second.start, "end": len(text) - second.start, "score": 0.7}
+
+        merged = stitch_entities(text, chunks, [[clipped], [whole]])
+
+        assert [e["text"] for e in merged] == ["Jane Doe"]
+
+
+class TestChunkedPrediction:
+    """Test the chunked batch_predict path end to end"""
+
+    def test_long_document_finds_entities_past_the_window(self):
+        filler = " ".join(["lorem"] * 40)
+        text = ". ".join(f"{filler} contact user{i}@mail.com" for i in range(10))
+        model = RegexModel()
+
+        chunked = batch_predict(model, [text], ["email"], max_words=30, overlap_words=8)[0]
+
+        expected = [m.group() for m in re.finditer(r"[\w.]+@[\w.]+\w", text)]
+        assert [e["text"] for e in chunked] == expected
+        assert all(text[e["start"]:e["end"]] == e["text"] for e in chunked)
+        # Every chunk of the document went through a single model call
+        assert len(model.calls) == 1
+        assert all(len(WORD_PATTERN.findall(t)) <= 30 for t in model.calls[0][0])
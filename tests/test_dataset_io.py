@@ -0,0 +1,124 @@
+"""
+Tests for the streaming dataset readers and writers
+"""
+import json
+import os
+
+import pytest
+
+from dataset_io import JsonArrayWriter, iter_dataset, iter_json_array, iter_jsonl, iter_windows, open_writer
+from evaluation_service import NERDatasetEvaluator
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "data", "ner_evaluation_dataset.json")
+
+
+class TaggingModel:
+    def predict_entities(self, text, labels, threshold=0.5, flat_ner=True):
+        return [
+            {"text": word, "label": "person", "start": text.index(word), "end": text.index(word) + len(word),
+             "score": 0.9}
+            for word in text.split() if word.istitle()
+        ]
+
+
+class TestReaders:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    def test_json_array_matches_json_load(self, chunk_size):
+        with open(DATASET, encoding="utf-8") as f:
+            expected = json.load(f)
+        assert list(iter_json_array(DATASET, chunk_size=chunk_size)) == expected
+
+    def test_numbers_split_across_chunks(self, tmp_path):
+        path = tmp_path / "numbers.json"
+        path.write_text(" [ 12345 , -6.5e3,\n\"a\" , [1, 2] , true, null ] ")
+        assert list(iter_json_array(str(path), chunk_size=2)) == [12345, -6.5e3, "a", [1, 2], True, None]
+
+    def test_empty_and_malformed_arrays(self, tmp_path):
+        empty = tmp_path / "empty.json"
+        empty.write_text("[ ]")
+        assert list(iter_json_array(str(empty))) == []
+        broken = tmp_path / "broken.json"
+        broken.write_text('[{"text": "a"} {"text": "b"}]')
+        with pytest.raises(ValueError):
+            list(iter_json_array(str(broken)))
+
+    def test_iter_dataset_sniffs_jsonl(self, tmp_path):
+        path = tmp_path / "dataset.txt"
+        path.write_text('{"text": "a"}\n\n{"text": "b"}\n')
+        assert list(iter_dataset(str(path))) == [{"text": "a"}, {"text": "b"}]
+        assert list(iter_jsonl(str(path))) == [{"text": "a"}, {"text": "b"}]
+
+    def test_iter_windows(self):
+        assert list(iter_windows(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+class TestWriters:
+    @pytest.mark.parametrize("indent", [None, 2])
+    @pytest.mark.parametrize("items", [[], [{"a": 1, "b": [1, {"c": "é\n"}]}, {}, 3]])
+    def test_json_array_writer_matches_json_dump(self, tmp_path, indent, items):
+        path = tmp_path / "out.json"
+        with JsonArrayWriter(str(path), indent=indent) as writer:
+            for item in items:
+                writer.write(item)
+        assert path.read_text(encoding="utf-8") == json.dumps(items, indent=indent, ensure_ascii=False)
+
+    def test_jsonl_writer_round_trip(self, tmp_path):
+        path = str(tmp_path / "nested" / "out.jsonl")
+        with open_writer(path) as writer:
+            writer.write({"text": "a"})
+            writer.write({"text": "b"})
+        assert list(iter_dataset(path)) == [{"text": "a"}, {"text": "b"}]
+
+
+class TestStreamingEvaluation:
+    def test_jsonl_windows_match_json_array(self, tmp_path):
+        with open(DATASET, encoding="utf-8") as f:
+            samples = json.load(f)[:50]
+        array_path = tmp_path / "dataset.json"
+        array_path.write_text(json.dumps(samples))
+        jsonl_path = tmp_path / "dataset.jsonl"
+        jsonl_path.write_text("".join(json.dumps(sample) + "\n" for sample in samples))
+
+        evaluator = NERDatasetEvaluator(model=TaggingModel())
+        expected = evaluator.evaluate_dataset(str(array_path), verbose=False)
+        streamed = evaluator.evaluate_dataset(str(jsonl_path), verbose=False, window_size=7)
+        assert streamed == expected
+        assert streamed.total_samples == 50
+
+
+class TestEvaluationScript:
+    def test_prediction_writer_matches_list_exports(self, tmp_path):
+        from evaluation import (
+            PredictionWriter,
+            evaluate_dataset,
+            load_json_dataset,
+            save_detailed_predictions_json,
+            save_predictions_to_csv
+        )
+
+        collected = []
+        expected = evaluate_dataset(TaggingModel(), load_json_dataset(DATASET), "NER", collected)
+        with PredictionWriter(str(tmp_path / "stream.csv"), str(tmp_path / "stream.json")) as writer:
+            results = evaluate_dataset(TaggingModel(), load_json_dataset(DATASET), "NER", writer)
+        save_predictions_to_csv(collected, str(tmp_path / "list.csv"))
+        save_detailed_predictions_json(collected, str(tmp_path / "list.json"))
+
+        assert results == expected
+        assert results["examples"] == len(collected)
+        for ext in ("csv", "json"):
+            assert (tmp_path / f"stream.{ext}").read_bytes() == (tmp_path / f"list.{ext}").read_bytes()
+
+    def test_failed_run_leaves_json_unterminated_and_reports_nothing(self, tmp_path, capsys):
+        from evaluation import PredictionWriter, evaluate_dataset
+
+        def failing_samples():
+            yield {"text": "Hello Anna", "entities": []}
+            raise RuntimeError("dataset went away")
+
+        with pytest.raises(RuntimeError):
+            with PredictionWriter(str(tmp_path / "out.csv"), str(tmp_path / "out.json")) as writer:
+                evaluate_dataset(TaggingModel(), failing_samples(), "NER", writer)
+
+        assert "saved" not in capsys.readouterr().out
+        with pytest.raises(json.JSONDecodeError):
+            json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
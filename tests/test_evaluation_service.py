@@ -0,0 +1,146 @@
+"""
+Tests for the batched and process-parallel dataset evaluation and span matching
+"""
+import importlib.util
+import json
+import re
+import sys
+
+import pytest
+
+from benchmark_matching import DEFAULT_DATASETS, build_cases, legacy_match_entities
+from evaluation_service import NERDatasetEvaluator, overlap_matrix
+
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+NAME_PATTERN = re.compile(r"\b[A-Z][a-z]+\b")
+EMAIL_PATTERN = re.compile(r"\S+@\S+\.\w+")
+
+
+class PatternModel:
+    """Tags capitalized words as persons and emails as emails; fails on texts containing 'BOOM'"""
+
+    def predict_entities(self, text, labels, threshold=0.5, flat_ner=True):
+        if "BOOM" in text:
+            raise RuntimeError("bad text")
+        entities = []
+        for pattern, label, score in ((NAME_PATTERN, "person", 0.8), (EMAIL_PATTERN, "email", 0.95)):
+            for match in pattern.finditer(text):
+                entities.append({
+                    "text": match.group(), "label": label,
+                    "start": match.start(), "end": match.end(), "score": score
+                })
+        return [entity for entity in entities if entity["score"] >= threshold]
+
+    def inference(self, texts, labels, flat_ner=True, threshold=0.5, batch_size=8):
+        return [self.predict_entities(text, labels, threshold=threshold) for text in texts]
+
+
+def pattern_model():
+    return PatternModel()
+
+
+def make_dataset(path, size=23):
+    samples = []
+    for i in range(size):
+        language = ("English", "German", "French")[i % 3]
+        if i % 5 == 0:
+            samples.append({"text": "nothing to see here", "language": language, "entities": []})
+            continue
+        text = f"Contact Anna at anna{i}@example.com about order {i}"
+        entities = [
+            {"text": "Anna", "label": "person", "start": 8, "end": 12},
+            {"text": f"anna{i}@example.com", "label": "email", "start": 16, "end": 16 + len(f"anna{i}@example.com")}
+        ]
+        if i % 7 == 0:
+            text += " BOOM"
+        samples.append({"text": text, "language": language, "entities": entities})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(samples, f)
+    return str(path)
+
+
+@pytest.fixture
+def dataset_path(tmp_path):
+    return make_dataset(tmp_path / "dataset.json")
+
+
+def evaluate(dataset_path, **kwargs):
+    evaluator = NERDatasetEvaluator(model_factory=pattern_model)
+    return evaluator.evaluate_dataset(dataset_path, verbose=False, **kwargs)
+
+
+def assert_same_report(report, expected):
+    assert report == expected
+    assert list(report.language_metrics) == list(expected.language_metrics)
+    assert list(report.entity_type_metrics) == list(expected.entity_type_metrics)
+
+
+class TestBatchedEvaluation:
+    @pytest.mark.parametrize("batch_size", [2, 8, 64])
+    def test_batched_report_matches_sequential(self, dataset_path, batch_size):
+        assert_same_report(evaluate(dataset_path, batch_size=batch_size), evaluate(dataset_path))
+
+    def test_failed_batch_falls_back_per_sample(self):
+        evaluator = NERDatasetEvaluator(model_factory=pattern_model)
+        predictions = evaluator.predict_batch(["Hello Anna", "BOOM", "Bob"])
+        assert predictions[1] == []
+        assert [e["text"] for e in predictions[0]] == ["Hello", "Anna"]
+        assert [e["text"] for e in predictions[2]] == ["Bob"]
+
+    def test_predictions_keep_dataset_order(self):
+        evaluator = NERDatasetEvaluator(model_factory=pattern_model)
+        names = ["Alice", "Bob", "Carla", "Dmitri", "Eve", "Farid", "Gus"]
+        predictions = evaluator.predict_texts([f"hi {name}" for name in names], batch_size=3)
+        assert [p[0]["text"] for p in predictions] == names
+
+
+class TestParallelEvaluation:
+    def test_sharded_report_matches_sequential(self, dataset_path):
+        assert_same_report(evaluate(dataset_path, batch_size=4, workers=2), evaluate(dataset_path))
+
+
+class TestMatchEntities:
+    @pytest.mark.parametrize("density", [1, 12])
+    def test_greedy_matches_original_matcher(self, density):
+        evaluator = NERDatasetEvaluator(model=PatternModel())
+        for predicted, ground_truth in build_cases(DEFAULT_DATASETS[0], density, seed=3):
+            assert evaluator.match_entities(predicted, ground_truth) == \
+                legacy_match_entities(evaluator, predicted, ground_truth)
+
+    def test_overlap_matrix_matches_compute_overlap(self):
+        evaluator = NERDatasetEvaluator(model=PatternModel())
+        pred = [(0, 5), (3, 9), (10, 10), (4, 2)]
+        gt = [(0, 5), (5, 9), (8, 20)]
+        matrix = overlap_matrix(pred, gt)
+        for i, (ps, pe) in enumerate(pred):
+            for j, (gs, ge) in enumerate(gt):
+                assert matrix[i, j] == evaluator.compute_overlap(ps, pe, gs, ge)
+
+    @pytest.mark.skipif(not HAS_SCIPY, reason="scipy is not installed")
+    def test_hungarian_finds_the_better_assignment(self):
+        evaluator = NERDatasetEvaluator(model=PatternModel())
+        # Greedy lets the first prediction take the only ground truth the second one fits
+        predicted = [
+            {"text": "a", "label": "person", "start": 0, "end": 10},
+            {"text": "b", "label": "person", "start": 2, "end": 10}
+        ]
+        ground_truth = [
+            {"text": "x", "label": "person", "start": 2, "end": 10},
+            {"text": "y", "label": "person", "start": 0, "end": 6}
+        ]
+        _, greedy = evaluator.match_entities(predicted, ground_truth)
+        _, optimal = evaluator.match_entities(predicted, ground_truth, assignment="hungarian")
+        assert (greedy.true_positives, greedy.false_negatives) == (1, 1)
+        assert (optimal.true_positives, optimal.false_negatives) == (2, 0)
+
+    def test_missing_scipy_is_reported(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "scipy.optimize", None)
+        evaluator = NERDatasetEvaluator(model=PatternModel())
+        span = [{"text": "a", "label": "person", "start": 0, "end": 1}]
+        with pytest.raises(ImportError, match="pip install scipy"):
+            evaluator.match_entities(span, span, assignment="hungarian")
+
+    def test_unknown_assignment_is_rejected(self):
+        with pytest.raises(ValueError, match="Unknown assignment"):
+            NERDatasetEvaluator(model=PatternModel(), assignment="random")
@@ -0,0 +1,91 @@
+"""
+Tests for the bounded inference executor
+"""
+import asyncio
+import threading
+
+import pytest
+
+from batching import MicroBatcher
+from executor import InferenceExecutor, InferenceQueueFull
+
+
+class TestAdmission:
+    """Test the bounded admission queue"""
+
+    def test_rejects_when_full(self):
+        executor = InferenceExecutor(max_workers=1, max_pending=2, retry_after=3)
+        try:
+            with executor.admission(), executor.admission():
+                with pytest.raises(InferenceQueueFull) as exc_info:
+                    with executor.admission():
+                        pass
+                assert exc_info.value.retry_after == 3
+            assert executor.pending == 0
+            assert executor.rejected == 1
+        finally:
+            executor.shutdown()
+
+    def test_slot_released_on_error(self):
+        executor = InferenceExecutor(max_workers=1, max_pending=1)
+        try:
+            with pytest.raises(RuntimeError):
+                with executor.admission():
+                    raise RuntimeError("inference failed")
+            assert executor.pending == 0
+        finally:
+            executor.shutdown()
+
+
+    def test_multi_slot_requests_are_charged_per_text(self):
+        executor = InferenceExecutor(max_workers=1, max_pending=4)
+        try:
+            with executor.admission(3):
+                assert executor.pending == 3
+                with pytest.raises(InferenceQueueFull):
+                    with executor.admission(2):
+                        pass
+                with executor.admission():
+                    assert executor.pending == 4
+            assert executor.pending == 0
+        finally:
+            executor.shutdown()
+
+    def test_oversized_request_is_capped_at_the_queue_bound(self):
+        executor = InferenceExecutor(max_workers=1, max_pending=4)
+        try:
+            with executor.admission(1000):
+                assert executor.pending == 4
+            with executor.admission():
+                with pytest.raises(InferenceQueueFull):
+                    with executor.admission(1000):
+                        pass
+        finally:
+            executor.shutdown()
+
+class TestOffloading:
+    """Test that batched inference leaves the event loop thread"""
+
+    def test_batches_run_on_pool_threads(self):
+        seen_threads = []
+
+        def predict(texts, labels, threshold, flat_ner):
+            seen_threads.append(threading.current_thread().name)
+            return [[] for _ in texts]
+
+        executor = InferenceExecutor(max_workers=2)
+        batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=5, executor=executor)
+
+        async def scenario():
+            await batcher.start()
+            try:
+                return await asyncio.gather(*(batcher.submit(f"t{i}", ["person"], 0.5, True) for i in range(6)))
+            finally:
+                await batcher.stop()
+                executor.shutdown()
+
+        results = asyncio.run(scenario())
+
+        assert results == [[] for _ in range(6)]
+        assert seen_threads
+        assert all(name.startswith("gliner-inference") for name in seen_threads)
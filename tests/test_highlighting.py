@@ -0,0 +1,62 @@
+"""
+Tests for the linear-time, HTML-escaped entity highlighter
+"""
+import re
+import time
+
+from highlighting import highlight_entities, resolve_overlaps
+
+
+def entity(start, end, label="person", score=0.9):
+    return {"start": start, "end": end, "label": label, "score": score}
+
+
+def strip_marks(html_text):
+    return re.sub(r"<mark[^>]*>|</mark>", "", html_text)
+
+
+class TestHighlightEntities:
+    def test_marks_spans_in_order(self):
+        text = "Anna met Bob"
+        html_text = highlight_entities(text, [entity(9, 12), entity(0, 4)])
+        assert re.findall(r">([^<]+)</mark>", html_text) == ["Anna", "Bob"]
+        assert strip_marks(html_text) == text
+
+    def test_escapes_text_and_labels(self):
+        text = '<script>alert("x")</script> & Anna'
+        html_text = highlight_entities(text, [entity(31, 35, label='a"b')])
+        assert "<script>" not in html_text
+        assert "&lt;script&gt;" in html_text and "&amp;" in html_text
+        assert 'title="a&quot;b: 0.90"' in html_text
+
+    def test_no_entities_is_escaped_text(self):
+        assert highlight_entities("a < b", []) == "a &lt; b"
+
+    def test_out_of_range_and_empty_spans_are_ignored(self):
+        text = "Anna"
+        html_text = highlight_entities(text, [entity(2, 2), entity(-3, 99)])
+        assert html_text.count("<mark") == 1
+        assert strip_marks(html_text) == text
+
+
+class TestResolveOverlaps:
+    def test_higher_score_wins(self):
+        kept = resolve_overlaps([entity(0, 10, score=0.5), entity(5, 15, score=0.8), entity(20, 25)], 30)
+        assert [(start, end) for start, end, _ in kept] == [(5, 15), (20, 25)]
+
+    def test_longer_span_wins_ties(self):
+        kept = resolve_overlaps([entity(0, 4), entity(0, 10), entity(2, 6)], 30)
+        assert [(start, end) for start, end, _ in kept] == [(0, 10)]
+
+    def test_touching_spans_are_both_kept(self):
+        kept = resolve_overlaps([entity(4, 8), entity(0, 4)], 10)
+        assert [(start, end) for start, end, _ in kept] == [(0, 4), (4, 8)]
+
+
+def test_large_document_is_linear():
+    text = "Anna Smith lives here. " * 50_000
+    entities = [entity(i * 23, i * 23 + 10) for i in range(50_000)]
+    started = time.perf_counter()
+    html_text = highlight_entities(text, entities)
+    assert time.perf_counter() - started < 5
+    assert html_text.count("<mark") == 50_000
@@ -0,0 +1,22 @@
+"""
+Tests for the shared inference helpers
+"""
+from inference import build_warmup_texts, run_warmup
+
+
+def test_warmup_texts_have_requested_lengths():
+    texts = build_warmup_texts([5, 40, 300])
+    assert [len(text.split()) for text in texts] == [5, 40, 300]
+
+
+def test_warmup_runs_one_full_batch_per_length():
+    calls = []
+
+    def predict_fn(texts, labels, threshold, flat_ner):
+        calls.append((len(texts), len(texts[0].split()), tuple(labels)))
+        return [[] for _ in texts]
+
+    seconds = run_warmup(predict_fn, ["person", "email"], [16, 64], batch_size=4)
+
+    assert calls == [(4, 16, ("person", "email")), (4, 64, ("person", "email"))]
+    assert seconds >= 0.0
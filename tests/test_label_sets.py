@@ -0,0 +1,61 @@
+"""
+Tests for label-set canonicalization and label embedding reuse
+"""
+from label_sets import LabelSetRegistry, canonical_labels
+
+
+class FakeBiEncoder:
+    """Counts label encodings instead of running a model"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode_labels(self, labels, batch_size=8):
+        self.encoded.append(tuple(labels))
+        return [f"emb:{label}" for label in labels]
+
+    def batch_predict_with_embeds(self, texts, labels_embeddings, labels, **kwargs):
+        return [[] for _ in texts]
+
+
+class FakeUniEncoder:
+    def inference(self, texts, labels, **kwargs):
+        return [[] for _ in texts]
+
+
+class TestCanonicalLabels:
+    def test_duplicates_and_blanks_are_dropped(self):
+        assert canonical_labels(["person", " email ", "person", "", "email"]) == ("person", "email")
+
+
+class TestLabelSetRegistry:
+    """Test when label embeddings are computed and reused"""
+
+    def test_registered_set_is_encoded_once(self):
+        model = FakeBiEncoder()
+        registry = LabelSetRegistry(model)
+        registry.register(["person", "email"])
+
+        assert registry.lookup(["person", "email", "person"]) == ["emb:person", "emb:email"]
+        assert registry.lookup(["person", "email"]) is not None
+        assert model.encoded == [("person", "email")]
+        assert registry.stats()["hits"] == 2
+
+    def test_repeated_set_is_promoted(self):
+        model = FakeBiEncoder()
+        registry = LabelSetRegistry(model, promote_after=2)
+
+        assert registry.lookup(["iban"]) is None
+        assert registry.lookup(["iban"]) == ["emb:iban"]
+        assert registry.lookup(["iban"]) == ["emb:iban"]
+        assert model.encoded == [("iban",)]
+
+    def test_switch_disables_embedding_path(self):
+        registry = LabelSetRegistry(FakeBiEncoder(), enabled=False)
+        assert registry.register(["person"]) is None
+        assert registry.lookup(["person"]) is None
+
+    def test_uni_encoder_is_not_supported(self):
+        registry = LabelSetRegistry(FakeUniEncoder())
+        assert registry.register(["person"]) is None
+        assert registry.stats()["embedding_cache_supported"] is False
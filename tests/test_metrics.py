@@ -0,0 +1,84 @@
+"""
+Tests for the Prometheus-style metrics registry and stage instrumentation
+"""
+import pytest
+
+from inference import instrument_stages
+from metrics import MetricsRegistry
+
+
+class TestCounter:
+    def test_counts_per_label(self):
+        registry = MetricsRegistry()
+        entities = registry.counter("entities_total", "Entities returned", ["label"])
+        entities.inc(label="email")
+        entities.inc(2, label="email")
+        entities.inc(label="person")
+
+        assert entities.value(label="email") == 3
+        text = registry.render()
+        assert "# TYPE entities_total counter" in text
+        assert 'entities_total{label="email"} 3' in text
+        assert 'entities_total{label="person"} 1' in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("c_total", "doc", ["label"])
+        counter.inc(label='say "hi"\n')
+        assert 'c_total{label="say \\"hi\\"\\n"} 1' in registry.render()
+
+    def test_duplicate_names_are_rejected(self):
+        registry = MetricsRegistry()
+        registry.counter("x_total", "doc")
+        with pytest.raises(ValueError):
+            registry.histogram("x_total", "doc")
+
+
+class TestHistogram:
+    def test_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("stage_seconds", "doc", ["stage"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, stage="forward")
+
+        lines = registry.render().splitlines()
+        assert 'stage_seconds_bucket{stage="forward",le="0.1"} 2' in lines
+        assert 'stage_seconds_bucket{stage="forward",le="1.0"} 3' in lines
+        assert 'stage_seconds_bucket{stage="forward",le="+Inf"} 4' in lines
+        assert 'stage_seconds_count{stage="forward"} 4' in lines
+        assert histogram.count(stage="forward") == 4
+        assert histogram.count(stage="tokenize") == 0
+
+
+class StagedModel:
+    """Calls its stage methods the way GLiNER's `inference` does"""
+
+    def prepare_batch(self, texts):
+        return texts
+
+    def collate_batch(self, batch):
+        return batch
+
+    def run_batch(self, batch):
+        return [len(t) for t in batch]
+
+    def decode_batch(self, output, batch):
+        return output
+
+    def inference(self, texts):
+        prepared = self.prepare_batch(texts)
+        output = self.run_batch(self.collate_batch(prepared))
+        return self.decode_batch(output, prepared)
+
+
+def test_instrument_stages_times_each_stage():
+    observed = []
+    model = StagedModel()
+
+    wrapped = instrument_stages(model, lambda stage, seconds: observed.append(stage))
+
+    assert model.inference(["ab", "c"]) == [2, 1]
+    assert wrapped == ["prepare_batch", "collate_batch", "run_batch", "decode_batch"]
+    assert observed == ["tokenize", "tokenize", "forward", "decode"]
+    # Other instances keep the plain methods
+    assert "run_batch" not in vars(StagedModel())
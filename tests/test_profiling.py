@@ -0,0 +1,58 @@
+"""
+Tests for per-request profiling helpers
+"""
+import threading
+import time
+
+from profiling import collect_stage_timings, count_inputs, profile_call, record_stage
+
+
+def test_stages_are_collected_only_on_the_profiling_thread():
+    other = threading.Thread(target=record_stage, args=("forward", 5.0))
+    with collect_stage_timings() as timings:
+        record_stage("forward", 0.5)
+        record_stage("forward", 0.25)
+        record_stage("tokenize", 0.1)
+        other.start()
+        other.join()
+    record_stage("forward", 1.0)
+
+    assert timings == {"forward": 0.75, "tokenize": 0.1}
+
+
+def test_profile_call_returns_entities_timings_and_report():
+    def predict_fn(texts, labels, threshold, flat_ner):
+        record_stage("forward", 0.002)
+        return [[{"text": "x", "label": labels[0], "start": 0, "end": 1, "score": threshold}] for _ in texts]
+
+    entities, timings, report = profile_call(
+        predict_fn, "x y", ["person"], 0.4, True, submitted_at=time.perf_counter(), cprofile=True
+    )
+
+    assert entities == [{"text": "x", "label": "person", "start": 0, "end": 1, "score": 0.4}]
+    assert timings["forward"] == 0.002
+    assert timings["queue_wait"] >= 0.0
+    assert timings["model_total"] >= 0.0
+    assert "predict_fn" in report
+
+
+def test_profile_call_without_cprofile_has_no_report():
+    _, _, report = profile_call(lambda t, l, th, f: [[]], "text", ["a"], 0.5, True, submitted_at=time.perf_counter())
+    assert report is None
+
+
+class WhitespaceTokenizer:
+    def __call__(self, words, is_split_into_words=True, add_special_tokens=False):
+        # Two subword pieces per word
+        return {"input_ids": [0, 0] * len(words)}
+
+
+def test_count_inputs():
+    model = type("Model", (), {})()
+    model.data_processor = type("Processor", (), {"transformer_tokenizer": WhitespaceTokenizer()})()
+    text = " ".join(["word"] * 50)
+
+    counts = count_inputs(model, text, ["person", "email"], max_words=20, overlap_words=5)
+
+    assert counts == {"words": 50, "tokens": 100, "labels": 2, "chunks": 3}
+    assert count_inputs(object(), text, ["person"], None, 5)["tokens"] is None
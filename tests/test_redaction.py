@@ -0,0 +1,47 @@
+"""
+Tests for single-pass redaction with mask, token and pseudonym strategies
+"""
+import pytest
+
+from redaction import Redactor, label_token, redact_text
+
+
+def entity(start, end, label="person", score=0.9):
+    return {"start": start, "end": end, "label": label, "score": score}
+
+
+class TestRedactor:
+    def test_token_strategy_is_the_default(self):
+        text = "Mail anna@example.com now"
+        assert redact_text(text, [entity(5, 21, "email address")]) == "Mail [EMAIL_ADDRESS] now"
+        assert label_token("social security number") == "[SOCIAL_SECURITY_NUMBER]"
+
+    def test_fixed_token(self):
+        redacted, _ = Redactor(token="[REDACTED]").redact("Anna and Bob", [entity(0, 4), entity(9, 12)])
+        assert redacted == "[REDACTED] and [REDACTED]"
+
+    def test_mask_keeps_length_and_whitespace(self):
+        redacted, _ = Redactor("mask", mask_char="#").redact("Hi Anna Smith!", [entity(3, 13)])
+        assert redacted == "Hi #### #####!"
+
+    def test_pseudonyms_are_consistent_per_label_and_text(self):
+        text = "Anna met Bob. Later anna called Bob."
+        spans = [entity(0, 4), entity(9, 12), entity(20, 24), entity(32, 35)]
+        redacted, replaced = Redactor("pseudonym").redact(text, spans)
+        assert redacted == "[PERSON_1] met [PERSON_2]. Later [PERSON_1] called [PERSON_2]."
+        assert [r["replacement"] for r in replaced] == ["[PERSON_1]", "[PERSON_2]", "[PERSON_1]", "[PERSON_2]"]
+
+    def test_per_label_overrides(self):
+        text = "Anna, anna@x.io"
+        redactor = Redactor("token", {"Email": "mask"})
+        redacted, replaced = redactor.redact(text, [entity(6, 15, "email"), entity(0, 4)])
+        assert redacted == "[PERSON], *********"
+        assert [(r["start"], r["end"], r["label"]) for r in replaced] == [(0, 4, "person"), (6, 15, "email")]
+
+    def test_overlapping_spans_are_replaced_once(self):
+        redacted, replaced = Redactor().redact("Dr Anna Smith", [entity(3, 7, score=0.5), entity(3, 13, score=0.9)])
+        assert redacted == "Dr [PERSON]" and len(replaced) == 1
+
+    def test_unknown_strategy(self):
+        with pytest.raises(ValueError):
+            Redactor("shred")
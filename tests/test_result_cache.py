@@ -0,0 +1,128 @@
+"""
+Tests for the content-addressed extraction result cache
+"""
+import time
+
+from result_cache import ResultCache
+
+
+ENTITIES = [{"text": "john@doe.com", "label": "email", "start": 5, "end": 17, "score": 0.9}]
+
+
+class TestCacheKey:
+    """Test what the key depends on"""
+
+    def test_duplicate_labels_do_not_matter(self):
+        a = ResultCache.make_key("text", ["person", "email"], 0.5, True, "model")
+        b = ResultCache.make_key("text", ["person", " email", "person"], 0.5, True, "model")
+        assert a == b
+
+    def test_label_order_changes_the_key(self):
+        # Label order is part of the model prompt and can change the predicted spans
+        a = ResultCache.make_key("text", ["person", "email"], 0.5, True, "model")
+        b = ResultCache.make_key("text", ["email", "person"], 0.5, True, "model")
+        assert a != b
+
+    def test_parameters_change_the_key(self):
+        base = ResultCache.make_key("text", ["person"], 0.5, True, "model")
+        assert base != ResultCache.make_key("text ", ["person"], 0.5, True, "model")
+        assert base != ResultCache.make_key("text", ["person"], 0.4, True, "model")
+        assert base != ResultCache.make_key("text", ["person"], 0.5, False, "model")
+        assert base != ResultCache.make_key("text", ["person"], 0.5, True, "other-model")
+
+
+class TestMemoryTier:
+    """Test LRU, TTL and counters"""
+
+    def test_hit_and_miss_counters(self):
+        cache = ResultCache()
+        assert cache.get("k") is None
+        cache.put("k", ENTITIES)
+        assert cache.get("k") == ENTITIES
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    def test_callers_cannot_mutate_cached_entries(self):
+        cache = ResultCache()
+        entities = [dict(e) for e in ENTITIES]
+        cache.put("k", entities)
+        entities[0]["label"] = "changed"
+        hit = cache.get("k")
+        hit[0]["score"] = 0.0
+        hit.append({})
+        assert cache.get("k") == ENTITIES
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", ENTITIES)
+        cache.put("b", ENTITIES)
+        cache.get("a")
+        cache.put("c", ENTITIES)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == ENTITIES
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_budget_is_enforced(self):
+        cache = ResultCache(max_bytes=400)
+        for i in range(20):
+            cache.put(str(i), ENTITIES)
+        assert cache.stats()["bytes"] <= 400
+
+    def test_expired_entries_are_misses(self):
+        cache = ResultCache(ttl_seconds=0.01)
+        cache.put("k", ENTITIES)
+        time.sleep(0.02)
+        assert cache.get("k") is None
+
+
+class TestDiskTier:
+    """Test persistence across cache instances"""
+
+    def test_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        first = ResultCache(disk_path=path)
+        first.put("k", ENTITIES)
+        first.close()
+
+        second = ResultCache(disk_path=path)
+        assert second.get("k") == ENTITIES
+        assert second.stats()["disk_hits"] == 1
+        second.close()
+
+    def test_queued_writes_are_committed_in_batches(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = ResultCache(disk_path=path)
+        for i in range(600):
+            cache.put(str(i), ENTITIES)
+        cache.flush()
+        reader = ResultCache(disk_path=path)
+        assert reader.get("599") == ENTITIES and reader.get("0") == ENTITIES
+        reader.close()
+        cache.close()
+
+    def test_memory_only_lookup_leaves_the_disk_alone(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        first = ResultCache(disk_path=path)
+        first.put("k", ENTITIES)
+        first.close()
+
+        second = ResultCache(disk_path=path)
+        assert second.get("k", memory_only=True) is None
+        assert second.stats()["misses"] == 0
+        assert second.get("k") == ENTITIES
+        assert second.get("k", memory_only=True) == ENTITIES
+        second.close()
+
+    def test_clear_drops_queued_writes(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = ResultCache(disk_path=path)
+        for i in range(100):
+            cache.put(str(i), ENTITIES)
+        cache.clear()
+        cache.close()
+
+        reopened = ResultCache(disk_path=path)
+        assert reopened.get("99") is None
+        reopened.close()
@@ -0,0 +1,352 @@
+"""
+In-process endpoint tests for the extraction service, driven by the benchmark's stub model
+"""
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.background import BackgroundTask
+
+import main_service
+from benchmark_api import StubModel
+
+
+class RecordingStub(StubModel):
+    """Uni-encoder stub that records which prediction entry point each call used"""
+
+    def __init__(self):
+        super().__init__(ms_per_100_words=0)
+        self.calls = []
+
+    def inference(self, texts, labels, **kwargs):
+        self.calls.append(("inference", tuple(labels)))
+        return super().inference(texts, labels, **kwargs)
+
+
+class BiEncoderStub(RecordingStub):
+    """Adds the bi-encoder API: labels are encoded once and reused across calls"""
+
+    def encode_labels(self, labels, batch_size=8):
+        return [f"emb:{label}" for label in labels]
+
+    def batch_predict_with_embeds(self, texts, labels_embeddings, labels, **kwargs):
+        assert labels_embeddings == self.encode_labels(labels)
+        self.calls.append(("batch_predict_with_embeds", tuple(labels)))
+        return super(RecordingStub, self).inference(texts, labels, **kwargs)
+
+
+@contextmanager
+def running_service(monkeypatch, model):
+    """Client for the service serving `model`, once it reports ready"""
+    monkeypatch.setattr(main_service, "load_model", lambda *args, **kwargs: model)
+    monkeypatch.setattr(main_service, "WARMUP_WORD_COUNTS", [])
+    monkeypatch.setattr(main_service, "CACHE_ENABLED", True)
+    monkeypatch.setattr(main_service, "CACHE_DISK_PATH", "")
+    with TestClient(main_service.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/readyz").status_code != 200:
+            assert time.monotonic() < deadline, "service did not become ready"
+            time.sleep(0.01)
+        yield client
+
+
+@pytest.fixture
+def client(monkeypatch):
+    with running_service(monkeypatch, StubModel(ms_per_100_words=0)) as client:
+        yield client
+
+
+def executor():
+    return main_service.model_state["executor"]
+
+
+def ndjson_lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+
+def metric(client, sample):
+    """Current value of one exposition line, e.g. 'gliner_requests_total{endpoint="/extract"}'"""
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class TestProbes:
+    def test_ready_service(self, client):
+        assert client.get("/livez").json()["status"] == "healthy"
+        ready = client.get("/readyz")
+        assert ready.status_code == 200 and ready.json()["error"] is None
+
+    def test_starting_service_is_live_but_not_ready(self, monkeypatch):
+        loaded = threading.Event()
+
+        def slow_load(*args, **kwargs):
+            loaded.wait(30)
+            return StubModel(ms_per_100_words=0)
+
+        monkeypatch.setattr(main_service, "load_model", slow_load)
+        monkeypatch.setattr(main_service, "WARMUP_WORD_COUNTS", [])
+        with TestClient(main_service.app) as client:
+            try:
+                assert client.get("/livez").status_code == 200
+                ready = client.get("/readyz")
+                assert ready.status_code == 503 and ready.json()["status"] == "starting"
+                response = client.post("/extract", json={"text": "Anna Berg"})
+                assert response.status_code == 503 and "Retry-After" in response.headers
+            finally:
+                loaded.set()
+
+    def test_failed_load_fails_liveness(self, monkeypatch):
+        def broken_load(*args, **kwargs):
+            raise OSError("weights not found")
+
+        monkeypatch.setattr(main_service, "load_model", broken_load)
+        with TestClient(main_service.app) as client:
+            deadline = time.monotonic() + 30
+            while client.get("/livez").status_code != 500:
+                assert time.monotonic() < deadline, "startup failure was not reported"
+                time.sleep(0.01)
+            ready = client.get("/readyz")
+            assert ready.status_code == 503
+            assert ready.json()["status"] == "unhealthy" and ready.json()["error"] == "weights not found"
+
+
+class TestMetrics:
+    def test_requests_texts_and_stages_are_counted(self, client):
+        requests = metric(client, 'gliner_requests_total{endpoint="/extract"}')
+        persons = metric(client, 'gliner_entities_total{label="person"}')
+        forwards = metric(client, 'gliner_stage_seconds_count{stage="forward"}')
+        client.post("/extract", json={"text": "Anna Berg met Carl Dahl", "entities": ["person"]})
+
+        assert metric(client, 'gliner_requests_total{endpoint="/extract"}') == requests + 1
+        assert metric(client, 'gliner_entities_total{label="person"}') == persons + 2
+        assert metric(client, 'gliner_stage_seconds_count{stage="forward"}') == forwards + 1
+        assert client.get("/metrics").headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    def test_rejections_are_counted(self, client, monkeypatch):
+        rejected = metric(client, 'gliner_rejections_total{reason="queue_full"}')
+        monkeypatch.setattr(executor(), "max_pending", 0)
+        assert client.post("/extract", json={"text": "Anna Berg"}).status_code == 503
+        assert metric(client, 'gliner_rejections_total{reason="queue_full"}') == rejected + 1
+
+
+class TestCacheEndpoint:
+    def test_repeated_request_is_a_hit_until_cleared(self, client):
+        body = {"text": "Anna Berg", "entities": ["person"]}
+        hits = metric(client, 'gliner_cache_lookups_total{result="hit"}')
+        first = client.post("/extract", json=body).json()
+        assert client.post("/extract", json=body).json() == first
+
+        stats = client.get("/cache").json()
+        assert stats["enabled"] and (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+        assert metric(client, 'gliner_cache_lookups_total{result="hit"}') == hits + 1
+
+        cleared = client.delete("/cache").json()
+        assert cleared["entries"] == 0
+        client.post("/extract", json=body)
+        assert client.get("/cache").json()["misses"] == 2
+
+    def test_disabled_cache(self, client, monkeypatch):
+        monkeypatch.delitem(main_service.model_state, "cache")
+        assert client.get("/cache").json() == main_service.CacheStats(enabled=False).model_dump()
+        assert client.delete("/cache").json()["enabled"] is False
+
+
+class TestBatchEndpoint:
+    def test_items_keep_ids_order_and_overrides(self, client, monkeypatch):
+        run_prediction = main_service.run_prediction
+        thresholds = {}
+
+        async def recording(text, labels, threshold, *args, **kwargs):
+            thresholds[text] = threshold
+            return await run_prediction(text, labels, threshold, *args, **kwargs)
+
+        monkeypatch.setattr(main_service, "run_prediction", recording)
+        items = [
+            {"id": "a", "text": "Anna Berg mailed anna@example.org", "entities": ["person"]},
+            {"id": 2, "text": "Call 555-123-4567", "entities": ["phone_number"], "threshold": 0.8},
+            {"id": "c", "text": "Carl Dahl mailed carl@example.org"},
+        ]
+        response = client.post("/extract/batch", json={"items": items, "threshold": 0.3})
+        assert response.status_code == 200
+        body = response.json()
+        assert [r["id"] for r in body["results"]] == ["a", 2, "c"]
+        assert (body["item_count"], body["error_count"]) == (3, 0)
+        assert [e["text"] for e in body["results"][0]["result"]["entities"]] == ["Anna Berg"]
+        assert [e["label"] for e in body["results"][1]["result"]["entities"]] == ["phone_number"]
+        # Items without entities get the default label set
+        assert [e["label"] for e in body["results"][2]["result"]["entities"]] == ["person", "email"]
+        assert thresholds == {items[0]["text"]: 0.3, items[1]["text"]: 0.8, items[2]["text"]: 0.3}
+        assert "timings" not in body["results"][0]["result"]
+        assert executor().pending == 0
+
+    def test_failed_item_does_not_fail_the_batch(self, client, monkeypatch):
+        run_prediction = main_service.run_prediction
+
+        async def failing_on_boom(text, *args, **kwargs):
+            if text == "boom":
+                raise RuntimeError("model exploded")
+            return await run_prediction(text, *args, **kwargs)
+
+        monkeypatch.setattr(main_service, "run_prediction", failing_on_boom)
+        items = [{"id": 1, "text": "Anna Berg"}, {"id": 2, "text": "boom"}]
+        body = client.post("/extract/batch", json={"items": items}).json()
+        assert body["error_count"] == 1
+        assert body["results"][0]["result"]["entity_count"] == 1
+        assert body["results"][1] == {"id": 2, "result": None, "error": "model exploded"}
+
+    def test_empty_and_oversized_batches_are_rejected(self, client):
+        assert client.post("/extract/batch", json={"items": []}).status_code == 422
+        too_many = [{"id": i, "text": "x"} for i in range(main_service.MAX_BATCH_ITEMS + 1)]
+        assert client.post("/extract/batch", json={"items": too_many}).status_code == 422
+
+    def test_full_queue_is_rejected_with_retry_after(self, client, monkeypatch):
+        monkeypatch.setattr(executor(), "pending", executor().max_pending)
+        response = client.post("/extract/batch", json={"items": [{"id": 1, "text": "Anna Berg"}]})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(main_service.RETRY_AFTER_SECONDS)
+
+    def test_items_count_against_the_queue(self, client, monkeypatch):
+        monkeypatch.setattr(executor(), "max_pending", 4)
+        monkeypatch.setattr(executor(), "pending", 2)
+        items = [{"id": i, "text": "Anna Berg"} for i in range(3)]
+        assert client.post("/extract/batch", json={"items": items}).status_code == 503
+        assert client.post("/extract/batch", json={"items": items[:2]}).status_code == 200
+        assert executor().pending == 2
+
+
+class TestRedactEndpoint:
+    TEXT = "Anna Berg mailed anna@example.org, then Anna Berg called."
+
+    def test_default_token_strategy(self, client):
+        response = client.post("/redact", json={"text": self.TEXT, "entities": ["person", "email"]})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["redacted_text"] == "[PERSON] mailed [EMAIL], then [PERSON] called."
+        assert body["text"] == self.TEXT
+        assert body["entity_types"] == {"person": 2, "email": 1} and body["entity_count"] == 3
+        assert [(e["start"], e["end"], e["replacement"]) for e in body["entities"]][1] == (17, 33, "[EMAIL]")
+        assert executor().pending == 0
+
+    def test_pseudonyms_overrides_and_no_echo(self, client):
+        body = client.post("/redact", json={
+            "text": self.TEXT,
+            "entities": ["person", "email"],
+            "strategy": "pseudonym",
+            "strategies": {"email": "mask"},
+            "mask_char": "#",
+            "include_text": False
+        }).json()
+        assert body["redacted_text"] == "[PERSON_1] mailed ################, then [PERSON_1] called."
+        assert "text" not in body
+
+    def test_invalid_strategy_is_rejected(self, client):
+        assert client.post("/redact", json={"text": self.TEXT, "strategy": "shred"}).status_code == 422
+        assert client.post("/redact", json={"text": self.TEXT, "mask_char": "##"}).status_code == 422
+
+    def test_full_queue_is_rejected_with_retry_after(self, client, monkeypatch):
+        monkeypatch.setattr(executor(), "max_pending", 0)
+        response = client.post("/redact", json={"text": self.TEXT})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(main_service.RETRY_AFTER_SECONDS)
+
+
+class TestProfiledExtract:
+    def test_profiled_request_takes_the_prepass_and_cache_path(self, client):
+        body = {"text": "Anna Berg mailed anna@example.org", "entities": ["person", "email"], "profile": True}
+        first = client.post("/extract", json=body).json()
+        # The email comes from the pattern pre-pass (score 1.0), the person from the model
+        assert [(e["label"], e["score"]) for e in first["entities"]] == [("person", 0.9), ("email", 1.0)]
+        assert first["timings"]["source"] == "model"
+        assert first["timings"]["forward_ms"] > 0 and first["timings"]["labels"] == 2
+
+        second = client.post("/extract", json=body).json()
+        assert second["entities"] == first["entities"]
+        assert second["timings"]["source"] == "cache" and second["timings"]["forward_ms"] is None
+        assert client.get("/cache").json()["hits"] == 1
+
+    def test_pattern_only_profiled_request_skips_the_model(self, client):
+        response = client.post("/extract", json={"text": "mail a@b.io", "entities": ["email"], "profile": True}).json()
+        assert response["entity_count"] == 1
+        assert response["timings"]["source"] == "pattern" and response["timings"]["queue_wait_ms"] is None
+        assert client.get("/cache").json()["misses"] == 0
+
+
+class TestLabelEmbeddingPath:
+    @pytest.mark.parametrize("model,entry_point", [
+        (BiEncoderStub(), "batch_predict_with_embeds"),
+        (RecordingStub(), "inference"),
+    ])
+    def test_default_labels_use_cached_embeddings_on_bi_encoders_only(self, monkeypatch, model, entry_point):
+        with running_service(monkeypatch, model) as client:
+            response = client.post("/extract", json={"text": "Anna Berg called"})
+        assert [e["text"] for e in response.json()["entities"]] == ["Anna Berg"]
+        assert model.calls == [(entry_point, tuple(main_service.SUPPORTED_ENTITIES))]
+
+    def test_uncached_label_set_falls_back_to_inference(self, monkeypatch):
+        model = BiEncoderStub()
+        with running_service(monkeypatch, model) as client:
+            client.post("/extract", json={"text": "Anna Berg called", "entities": ["person"]})
+        assert model.calls == [("inference", ("person",))]
+
+
+class TestStreamEndpoint:
+    def test_entities_offsets_and_summary(self, client):
+        text = "Mail jane@example.com now. " * 5
+        response = client.post("/extract/stream?entities=email", content=text.encode("utf-8"),
+                               headers={"Content-Type": "text/plain"})
+        assert response.status_code == 200
+        lines = ndjson_lines(response)
+        entities = [line for line in lines if line["type"] == "entity"]
+        assert len(entities) == 5
+        assert all(text[e["start"]:e["end"]] == "jane@example.com" for e in entities)
+        assert lines[-1] == {"type": "summary", "characters": len(text), "entity_count": 5,
+                             "entity_types": {"email": 5}}
+        assert executor().pending == 0
+
+    def test_boundary_entities_are_found_once(self, client, monkeypatch):
+        monkeypatch.setattr(main_service, "STREAM_SEGMENT_CHARS", 80)
+        monkeypatch.setattr(main_service, "STREAM_OVERLAP_CHARS", 20)
+        text = "".join(f"met Anna Berg{i % 10} and Carl Dahl at home " for i in range(30))
+        response = client.post("/extract/stream?entities=person", content=text.encode("utf-8"))
+        spans = [(e["start"], e["end"]) for e in ndjson_lines(response) if e["type"] == "entity"]
+        expected = [(m.start(), m.end()) for m in StubModel.PATTERNS[2][1].finditer(text)]
+        assert spans == expected
+
+    def test_invalid_ndjson_yields_error_line(self, client):
+        body = b'{"text": "Mail jane@example.com. "}\n{"id": 1}\n'
+        response = client.post("/extract/stream?entities=email", content=body,
+                               headers={"Content-Type": "application/x-ndjson"})
+        lines = ndjson_lines(response)
+        assert [line["type"] for line in lines] == ["error", "entity", "summary"]
+        assert "Line 2" in next(line for line in lines if line["type"] == "error")["detail"]
+        assert executor().pending == 0
+
+    def test_full_queue_is_rejected_with_retry_after(self, client, monkeypatch):
+        monkeypatch.setattr(executor(), "max_pending", 0)
+        response = client.post("/extract/stream", content=b"Anna Berg")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(main_service.RETRY_AFTER_SECONDS)
+        assert executor().pending == 0
+
+
+def test_stream_response_releases_cleanup_when_sending_fails():
+    released = []
+    started = []
+
+    async def body():
+        started.append(True)
+        yield b"never sent"
+
+    async def failing_send(message):
+        raise ConnectionResetError("client went away")
+
+    response = main_service.BodyStreamingResponse(body(), background=BackgroundTask(released.append, True))
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(response({"type": "http"}, None, failing_send))
+    assert released == [True] and started == []
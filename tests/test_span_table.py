@@ -0,0 +1,72 @@
+"""
+Tests for the columnar span output of the evaluation script
+"""
+import importlib.util
+
+import pytest
+
+from span_table import SpanTableWriter, open_span_table
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+class RecordingTable:
+    """Collects the rows the evaluation would write, without pyarrow"""
+
+    def __init__(self):
+        self.rows = []
+
+    def write_spans(self, dataset, language, sample_id, spans):
+        self.rows.extend((dataset, language, sample_id, span) for span in spans)
+
+
+class FixedModel:
+    def predict_entities(self, text, labels, threshold=0.5):
+        return [
+            {"text": "Anna", "label": "person", "start": 6, "end": 10, "score": 0.9},
+            {"text": "Acme", "label": "organization", "start": 15, "end": 19, "score": 0.6}
+        ]
+
+
+def test_evaluation_writes_one_row_per_span():
+    from evaluation import evaluate_dataset
+
+    data = [{
+        "text": "Hello Anna from Acme on 2024-01-01",
+        "language": "English",
+        "entities": [
+            {"text": "Anna", "label": "person", "start": 6, "end": 10},
+            {"text": "2024-01-01", "label": "date", "start": 24, "end": 34}
+        ]
+    }]
+    table = RecordingTable()
+    evaluate_dataset(FixedModel(), data, "Sample", span_table=table)
+    assert [(row[2], row[3]["label"], row[3]["status"], row[3]["start"]) for row in table.rows] == [
+        (0, "person", "TP", 6),
+        (0, "organization", "FP", 15),
+        (0, "date", "FN", 24)
+    ]
+    assert table.rows[2][3].get("score") is None
+
+
+@pytest.mark.skipif(HAS_PYARROW, reason="pyarrow is installed")
+def test_missing_pyarrow_is_reported():
+    with pytest.raises(ImportError, match="pip install pyarrow"):
+        SpanTableWriter("spans.parquet")
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow is not installed")
+@pytest.mark.parametrize("name", ["spans.parquet", "spans.arrow"])
+def test_round_trip(tmp_path, name):
+    path = str(tmp_path / name)
+    with SpanTableWriter(path, batch_rows=2) as writer:
+        writer.write_spans("ds", "English", 0, [
+            {"label": "person", "start": 0, "end": 4, "score": 0.5, "status": "TP"},
+            {"label": "email", "start": 5, "end": 9, "score": 0.25, "status": "FP"}
+        ])
+        writer.write_spans("ds", "German", 1, [{"label": "date", "status": "FN"}])
+    table = open_span_table(path)
+    assert table.num_rows == 3
+    assert table.column("status").to_pylist() == ["TP", "FP", "FN"]
+    assert table.column("score").to_pylist() == [0.5, 0.25, None]
+    assert table.column("sample_id").to_pylist() == [0, 0, 1]
@@ -0,0 +1,113 @@
+"""
+Tests for incremental text segmentation used by /extract/stream
+"""
+import asyncio
+import json
+import re
+
+import pytest
+
+from streaming import SegmentStitcher, TextSegmenter, iter_segments
+
+
+async def as_chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def collect_segments(data: bytes, segmenter: TextSegmenter, ndjson: bool = False, chunk_size: int = 7):
+    async def scenario():
+        return [seg async for seg in iter_segments(as_chunks(data, chunk_size), segmenter, ndjson=ndjson)]
+    return asyncio.run(scenario())
+
+
+class TestTextSegmenter:
+    """Test segment boundaries and absolute offsets"""
+
+    def test_segments_reassemble_input(self):
+        text = "Patient John Doe was admitted. " * 50 + "Email: john@doe.com\n" * 20
+        segments = collect_segments(text.encode("utf-8"), TextSegmenter(segment_chars=100))
+
+        assert "".join(seg for _, seg in segments) == text
+        for offset, seg in segments:
+            assert text[offset:offset + len(seg)] == seg
+
+    def test_segments_stay_bounded(self):
+        text = "x" * 1000
+        segments = collect_segments(text.encode("utf-8"), TextSegmenter(segment_chars=100, max_segment_chars=150))
+
+        assert all(len(seg) <= 150 for _, seg in segments)
+        assert "".join(seg for _, seg in segments) == text
+
+    def test_prefers_sentence_boundaries(self):
+        text = "First sentence here. Second sentence follows. Third one."
+        segments = TextSegmenter(segment_chars=25).feed(text)
+
+        assert segments[0][1].endswith(". ")
+
+    def test_multibyte_characters_split_across_chunks(self):
+        text = "Müller wohnt in Köln. " * 20
+        segments = collect_segments(text.encode("utf-8"), TextSegmenter(segment_chars=50), chunk_size=3)
+
+        assert "".join(seg for _, seg in segments) == text
+
+
+class TestNDJSONInput:
+    """Test NDJSON request bodies"""
+
+    def test_records_are_concatenated(self):
+        records = [{"text": "Call 555-1234. "}, "Mail a@b.com. ", {"text": "Done."}]
+        body = "\n".join(json.dumps(r) for r in records).encode("utf-8")
+        segments = collect_segments(body, TextSegmenter(segment_chars=1000), ndjson=True)
+
+        assert segments == [(0, "Call 555-1234. Mail a@b.com. Done.")]
+
+    def test_invalid_record_raises(self):
+        with pytest.raises(ValueError):
+            collect_segments(b'{"id": 1}\n', TextSegmenter(segment_chars=10), ndjson=True)
+
+    def test_long_line_across_many_chunks(self):
+        text = "word " * 20000
+        body = json.dumps({"text": text}).encode("utf-8") + b"\n"
+        segments = collect_segments(body, TextSegmenter(segment_chars=10 ** 6), ndjson=True, chunk_size=64)
+
+        assert segments == [(0, text)]
+
+
+class TestSegmentOverlap:
+    """Test overlapping segments and stitching of boundary-crossing entities"""
+
+    def test_segments_repeat_the_tail_of_the_previous_one(self):
+        text = "alpha beta gamma delta epsilon zeta eta theta iota kappa. " * 10
+        segments = collect_segments(text.encode("utf-8"), TextSegmenter(segment_chars=80, overlap_chars=20))
+
+        for offset, seg in segments:
+            assert text[offset:offset + len(seg)] == seg
+        for (prev_offset, prev), (offset, _) in zip(segments, segments[1:]):
+            assert prev_offset + len(prev) - 20 <= offset < prev_offset + len(prev)
+        assert segments[-1][0] + len(segments[-1][1]) == len(text)
+
+    def test_stitched_entities_match_whole_text(self):
+        # Segments are cut at whitespace, i.e. inside these card numbers; the model stand-in
+        # also tags the truncated pieces, as GLiNER would
+        text = "".join(f"card {4000 + i} 1111 2222 {3000 + i} ok " for i in range(40))
+        pattern = re.compile(r"\d{4}(?: \d{4}){0,3}")
+        expected = [m.span() for m in pattern.finditer(text)]
+
+        def stream(overlap_chars):
+            segmenter = TextSegmenter(segment_chars=80, overlap_chars=overlap_chars)
+            stitcher = SegmentStitcher(overlap_chars=segmenter.overlap_chars)
+            found = []
+            for offset, seg in collect_segments(text.encode("utf-8"), segmenter, chunk_size=len(text)):
+                entities = [
+                    {"text": m.group(), "label": "card", "start": m.start(), "end": m.end(), "score": 0.9}
+                    for m in pattern.finditer(seg)
+                ]
+                found.extend(stitcher.add(offset, seg, entities))
+            found.extend(stitcher.flush())
+            return found
+
+        assert [(e["start"], e["end"]) for e in stream(0)] != expected
+        found = stream(20)
+        assert [(e["start"], e["end"]) for e in found] == expected
+        assert all(text[e["start"]:e["end"]] == e["text"] for e in found)
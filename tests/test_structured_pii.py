@@ -0,0 +1,107 @@
+"""
+Tests for the regex/checksum pre-pass over structured identifiers
+"""
+import pytest
+
+from structured_pii import (
+    cpf_valid,
+    detect_structured,
+    iban_valid,
+    is_structured_label,
+    luhn_valid,
+    merge_entities,
+)
+
+ALL_LABELS = ["email", "ip_address", "iban", "credit_card_number", "social_security_number", "cpf"]
+
+
+def found(text, labels=ALL_LABELS):
+    return [(e["label"], e["text"]) for e in detect_structured(text, labels)]
+
+
+class TestChecksums:
+    @pytest.mark.parametrize("number,valid", [
+        ("4111 1111 1111 1111", True),
+        ("5500-0000-0000-0004", True),
+        ("4111 1111 1111 1112", False),
+        ("0000 0000 0000 0000", False),
+    ])
+    def test_luhn(self, number, valid):
+        assert luhn_valid(number) is valid
+
+    def test_iban(self):
+        assert iban_valid("DE89 3704 0044 0532 0130 00")
+        assert iban_valid("GB82WEST12345698765432")
+        assert not iban_valid("DE89 3704 0044 0532 0130 01")
+
+    def test_cpf(self):
+        assert cpf_valid("529.982.247-25") and cpf_valid("12345678909")
+        assert not cpf_valid("123.456.789-00") and not cpf_valid("111.111.111-11")
+
+
+class TestDetectStructured:
+    def test_finds_valid_identifiers_only(self):
+        text = (
+            "Mail john.smith@email.com from 192.168.1.10 or 2001:db8::ff00:42:8329 at 12:30:45. "
+            "IBAN DE89 3704 0044 0532 0130 00 BIC, card 4111 1111 1111 1111 not 4111 1111 1111 1112, "
+            "SSN 123-45-6789 not 000-12-3456, CPF 529.982.247-25 not 123.456.789-00, IP 999.1.1.1"
+        )
+        assert found(text) == [
+            ("email", "john.smith@email.com"),
+            ("ip_address", "192.168.1.10"),
+            ("ip_address", "2001:db8::ff00:42:8329"),
+            ("iban", "DE89 3704 0044 0532 0130 00"),
+            ("credit_card_number", "4111 1111 1111 1111"),
+            ("social_security_number", "123-45-6789"),
+            ("cpf", "529.982.247-25"),
+        ]
+
+    def test_offsets_and_requested_label_spelling(self):
+        text = "write to anna@example.org"
+        [hit] = detect_structured(text, ["Email Address", "email"])
+        assert hit["label"] == "Email Address" and text[hit["start"]:hit["end"]] == "anna@example.org"
+        assert hit["score"] == 1.0
+
+    def test_only_requested_detectors_run(self):
+        assert found("anna@example.org 123-45-6789", ["social_security_number", "person"]) == [
+            ("social_security_number", "123-45-6789")
+        ]
+
+    def test_cpf_needs_punctuation_or_a_cpf_label(self):
+        assert found("call 52998224725 or 529.982247-25 today") == []
+        assert found("CPF: 52998224725, cpf 529.982.247-25") == [
+            ("cpf", "52998224725"),
+            ("cpf", "529.982.247-25"),
+        ]
+
+    def test_structured_labels(self):
+        assert is_structured_label("credit card number") and is_structured_label("ip_address")
+        assert not is_structured_label("person") and not is_structured_label("phone_number")
+
+
+def test_merge_prefers_pattern_hits_over_overlapping_model_spans():
+    pattern = [{"text": "a@b.io", "label": "email", "start": 10, "end": 16, "score": 1.0}]
+    model = [
+        {"text": "Anna", "label": "person", "start": 0, "end": 4, "score": 0.9},
+        {"text": "a@b", "label": "email", "start": 10, "end": 13, "score": 0.6},
+        {"text": "Bob", "label": "person", "start": 20, "end": 23, "score": 0.8},
+    ]
+    merged = merge_entities(model, pattern)
+    assert [(e["start"], e["score"]) for e in merged] == [(0, 0.9), (10, 1.0), (20, 0.8)]
+
+
+def test_merge_keeps_other_labels_that_enclose_a_pattern_hit():
+    text = "Ship to 4111 1111 1111 1111 Main St"
+    pattern = detect_structured(text, ["credit_card_number"])
+    model = [{"text": text[8:], "label": "address", "start": 8, "end": len(text), "score": 0.7}]
+    assert merge_entities(model, pattern) == model
+
+
+def test_merge_trims_other_labels_that_partly_overlap_a_pattern_hit():
+    pattern = [{"text": "a@b.io", "label": "email", "start": 10, "end": 16, "score": 1.0}]
+    model = [{"text": "Anna Lee a@b", "label": "person", "start": 1, "end": 13, "score": 0.6}]
+    merged = merge_entities(model, pattern)
+    assert [(e["text"], e["label"], e["start"], e["end"]) for e in merged] == [
+        ("Anna Lee", "person", 1, 9),
+        ("a@b.io", "email", 10, 16),
+    ]
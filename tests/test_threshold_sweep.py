@@ -0,0 +1,127 @@
+"""
+Tests for the cached-prediction threshold sweep
+"""
+import json
+import random
+
+import pytest
+
+from evaluation_service import NERDatasetEvaluator
+from threshold_sweep import (
+    PredictionStore,
+    collect_predictions,
+    parse_thresholds,
+    summarize_report,
+    sweep_thresholds
+)
+
+LABELS = ["person", "email", "phone_number"]
+
+
+class GreedyModel:
+    """Scores pseudo-random candidate spans per text and decodes them greedily like flat GLiNER
+
+    Scores are multiples of 1/256 so they survive the store's float32 column unchanged.
+    """
+
+    def predict_entities(self, text, labels, threshold=0.5, flat_ner=True):
+        rng = random.Random(text)
+        candidates = []
+        for _ in range(8):
+            start = rng.randrange(0, max(1, len(text) - 4))
+            end = min(len(text), start + rng.randrange(2, 10))
+            candidates.append((rng.randrange(256) / 256, start, end, rng.choice(LABELS)))
+        kept = []
+        for score, start, end, label in sorted(candidates, reverse=True):
+            if score < threshold or any(start < e and s < end for s, e, _, _ in kept):
+                continue
+            kept.append((start, end, label, score))
+        return [
+            {"text": text[s:e], "label": label, "start": s, "end": e, "score": score}
+            for s, e, label, score in sorted(kept)
+        ]
+
+    def inference(self, texts, labels, flat_ner=True, threshold=0.5, batch_size=8):
+        return [self.predict_entities(text, labels, threshold=threshold) for text in texts]
+
+
+def greedy_model():
+    return GreedyModel()
+
+
+@pytest.fixture
+def dataset():
+    samples = []
+    for i in range(30):
+        text = f"Sample {i}: call Anna on 555-01{i:02d} or mail anna{i}@example.com today"
+        entities = [
+            {"text": "Anna", "label": "person", "start": text.index("Anna"), "end": text.index("Anna") + 4},
+            {"text": f"anna{i}@example.com", "label": "email",
+             "start": text.index("anna"), "end": text.index("anna") + len(f"anna{i}@example.com")}
+        ]
+        samples.append({"text": text, "language": ("English", "Spanish")[i % 2], "entities": entities})
+    return samples
+
+
+@pytest.fixture
+def store(dataset):
+    evaluator = NERDatasetEvaluator(threshold=0.05, model_factory=greedy_model)
+    return collect_predictions(evaluator, dataset, batch_size=4, verbose=False)
+
+
+class TestPredictionStore:
+    @pytest.mark.parametrize("threshold", [0.05, 0.3, 0.5, 0.77, 0.99])
+    def test_filtering_matches_running_at_threshold(self, dataset, store, threshold):
+        evaluator = NERDatasetEvaluator(threshold=threshold, model_factory=greedy_model)
+        expected = evaluator.predict_texts([sample["text"] for sample in dataset])
+        assert store.predictions_at(threshold, dataset) == expected
+
+    def test_save_and_load_round_trip(self, dataset, store, tmp_path):
+        path = str(tmp_path / "store.npz")
+        store.save(path)
+        loaded = PredictionStore.load(path)
+        assert loaded.num_spans == store.num_spans
+        assert loaded.metadata == store.metadata
+        assert loaded.predictions_at(0.4, dataset) == store.predictions_at(0.4, dataset)
+
+    def test_rejects_threshold_below_floor(self, dataset, store):
+        with pytest.raises(ValueError, match="floor"):
+            store.predictions_at(0.01, dataset)
+
+    def test_rejects_other_dataset(self, dataset, store):
+        with pytest.raises(ValueError, match="different dataset"):
+            store.predictions_at(0.5, dataset[:-1])
+
+
+class TestSweep:
+    def test_sweep_matches_full_evaluation(self, dataset, store, tmp_path):
+        path = tmp_path / "dataset.json"
+        path.write_text(json.dumps(dataset))
+        sweep = sweep_thresholds(NERDatasetEvaluator(), dataset, store, [0.3, 0.6])
+        for threshold in (0.3, 0.6):
+            evaluator = NERDatasetEvaluator(threshold=threshold, model_factory=greedy_model)
+            report = evaluator.evaluate_dataset(str(path), verbose=False)
+            assert sweep["thresholds"][f"{threshold:g}"] == summarize_report(report)
+        assert set(sweep["thresholds"]["0.3"]["languages"]) == {"English", "Spanish"}
+        assert sweep["best"]["overall"]["threshold"] in (0.3, 0.6)
+
+    def test_parse_thresholds(self):
+        assert parse_thresholds("0.1:0.3:0.1") == [0.1, 0.2, 0.3]
+        assert parse_thresholds("0.25,0.5") == [0.25, 0.5]
+
+    def test_evaluation_script_sweep_matches_per_threshold_runs(self, dataset, monkeypatch):
+        import evaluation
+
+        class CountingGreedyModel(GreedyModel):
+            calls = 0
+
+            def predict_entities(self, text, labels, threshold=0.5, flat_ner=True):
+                CountingGreedyModel.calls += 1
+                return super().predict_entities(text, labels, threshold=threshold, flat_ner=flat_ner)
+
+        sweep = evaluation.sweep_dataset(CountingGreedyModel(), iter(dataset), "NER", [0.6, 0.3])
+        assert list(sweep) == [0.3, 0.6] and CountingGreedyModel.calls == len(dataset)
+        for threshold in (0.3, 0.6):
+            monkeypatch.setattr(evaluation, "THRESHOLD", threshold)
+            assert sweep[threshold] == evaluation.evaluate_dataset(GreedyModel(), dataset, "NER")
+        assert sweep[0.3]["overall"]["fp"] > sweep[0.6]["overall"]["fp"]